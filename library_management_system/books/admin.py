@@ -1,13 +1,106 @@
-from django.contrib import admin
-from .models import Publisher, Category, Author, Book, FavoriteBook
+import io
+from datetime import date
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Max, Min
+from django.template.response import TemplateResponse
+from django.urls import path
+from .autocomplete import normalize, prefix_q
+from .importer import BookImporter, ImportFormatError
+from .models import Publisher, Category, Author, Book, BulkDeleteJob, FavoriteBook
+from .pagination import EstimatedCountPaginator
+from .search import apply_search
+
+
+class BookImportForm(forms.Form):
+    file = forms.FileField(label="CSV file")
+    batch_size = forms.IntegerField(min_value=1, initial=5000)
+
+
+class DecadeListFilter(admin.SimpleListFilter):
+    """
+    Publication decade, in place of a date filter or ``date_hierarchy`` that
+    would read the dates of every book: the range comes from the earliest
+    and latest date (two seeks on the publish_date index), and each choice
+    is an index range.
+    """
+
+    title = "publication decade"
+    parameter_name = "decade"
+
+    def lookups(self, request, model_admin):
+        books = model_admin.get_queryset(request)
+        # Separate queries: SQLite answers a lone MIN or MAX from the index,
+        # but scans the table for both in one SELECT
+        earliest = books.aggregate(value=Min("publish_date"))["value"]
+        latest = books.aggregate(value=Max("publish_date"))["value"]
+        if earliest is None:
+            return []
+        decades = range(latest.year // 10 * 10, earliest.year // 10 * 10 - 1, -10)
+        return [(str(decade), f"{decade}s") for decade in decades]
+
+    def queryset(self, request, queryset):
+        if not (self.value() or "").isdigit():
+            return queryset
+        decade = int(self.value())
+        return queryset.filter(publish_date__gte=date(decade, 1, 1), publish_date__lt=date(decade + 10, 1, 1))
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
+    # Tuned for catalogues of millions of rows; query counts are covered by
+    # books/tests/test_admin.py and the benchmark's admin_book_changelist
     list_display = ("title", "publisher", "category", "publish_date", "availability_status", "price")
-    list_filter = ("publisher", "category", "availability_status", "publish_date")
+    list_select_related = ("publisher", "category")
+    list_filter = ("publisher", "category", "availability_status", DecadeListFilter)
+    # Shows the search box; get_search_results does the searching
     search_fields = ("title", "authors__full_name", "isbn")
     autocomplete_fields = ("authors",)
+    paginator = EstimatedCountPaginator
+    # Otherwise every page also counts the whole table for "N total"
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # An ISBN is a unique-index lookup; anything else goes through the
+        # full-text index instead of LIKE over title and the authors join
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit() and len(term) == 13:
+            return queryset.filter(isbn=term), False
+        return apply_search(queryset, term), False
+
+    def get_urls(self):
+        return [
+            path("import/", self.admin_site.admin_view(self.import_csv), name="books_book_import"),
+        ] + super().get_urls()
+
+    def import_csv(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        importer = None
+        form = BookImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            # Read the upload as a text stream rather than loading it whole
+            source = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                importer = BookImporter(batch_size=form.cleaned_data["batch_size"]).run(source)
+            except (ImportFormatError, UnicodeDecodeError) as exc:
+                messages.error(request, f"Import stopped: {exc}")
+                importer = None
+            else:
+                messages.success(request, f"Imported {upload.name}.")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import books",
+            "form": form,
+            "importer": importer,
+        }
+        return TemplateResponse(request, "admin/books/book/import_csv.html", context)
 
 
 admin.site.register(Publisher)
@@ -15,6 +108,24 @@ admin.site.register(Category)
 
 @admin.register(Author)
 class AuthorAdmin(admin.ModelAdmin):
+    # Required by BookAdmin.autocomplete_fields; the search itself is below
     search_fields = ("full_name",)
+    # The name_key index then serves both the filter and the page order
+    ordering = ("name_key", "id")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Name prefix as an index range seek, instead of a LIKE scan over
+        # every author on each keystroke of the book form's autocomplete
+        prefix = normalize(search_term)
+        if not prefix:
+            return queryset, False
+        return queryset.filter(prefix_q("name_key", prefix)), False
 
 admin.site.register(FavoriteBook)
+
+
+@admin.register(BulkDeleteJob)
+class BulkDeleteJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "deleted", "total", "created_by", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("filter_key", "created_by", "total", "deleted", "last_pk", "error", "created_at", "updated_at", "finished_at")
@@ -0,0 +1,226 @@
+import hashlib
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_safe
+
+from library_management_system.routers import replica_reads
+
+from .autocomplete import DEFAULT_LIMIT, SOURCES, asuggest
+from .caching import get_version
+from .changelog import entries_since
+from .filters import BookFilter
+from .models import Author, Book, Category, Publisher
+from .pagination import KeysetPaginator, cursor_querystring
+from .search import annotate_rank
+
+MAX_PAGE_SIZE = 100
+CHANGES_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 5000
+
+
+def catalogue_etag(*namespaces):
+    """
+    ETag function for ``condition``: a digest of the cache versions of
+    ``namespaces``, which every catalogue write replaces. Computing it reads
+    only the cache, so a matching ``If-None-Match`` is answered with 304
+    before the view runs a single catalogue query.
+    """
+    def etag(request, *args, **kwargs):
+        versions = ':'.join(str(get_version(namespace)) for namespace in namespaces)
+        return hashlib.sha1(versions.encode()).hexdigest()
+    return etag
+
+
+def api_view(*namespaces):
+    """
+    Read-only async JSON endpoint: session auth (401 instead of a login
+    redirect) and, given the cache ``namespaces`` its data depends on,
+    conditional GET; endpoints without them read from a replica.
+    """
+    def decorator(view):
+        if namespaces:
+            # Read from the primary: the ETag names the newest write, and a body
+            # from a lagging replica would be revalidated as current until the
+            # next one
+            conditional = condition(etag_func=catalogue_etag(*namespaces))(require_safe(view))
+        else:
+            conditional = replica_reads(require_safe(view))
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not (await request.auser()).is_authenticated:
+                return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            try:
+                response = await conditional(request, *args, **kwargs)
+            except Http404:
+                response = JsonResponse({'detail': 'Not found.'}, status=404)
+            # Clients must revalidate, which is cheap thanks to the ETag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get('limit', ''))
+    except ValueError:
+        return None
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+async def apaginated(request, queryset, ordering, serialize):
+    page = await KeysetPaginator(queryset, ordering=ordering, per_page=page_size(request)).apage(request.GET.get('cursor'))
+
+    def link(cursor):
+        return request.build_absolute_uri(f'{request.path}?{cursor_querystring(request.GET, cursor)}')
+
+    return JsonResponse({
+        'results': [serialize(obj) for obj in page],
+        'next': link(page.next_cursor) if page.has_next() else None,
+        'previous': link(page.previous_cursor) if page.has_previous() else None,
+    })
+
+
+def serialize_author(author):
+    return {'id': author.pk, 'full_name': author.full_name, 'bio': author.bio}
+
+
+def serialize_category(category):
+    return {
+        'id': category.pk, 'name': category.name, 'parent_id': category.parent_category_id,
+        'path': category.path, 'depth': category.depth,
+    }
+
+
+def serialize_publisher(publisher):
+    return {'id': publisher.pk, 'name': publisher.name, 'address': publisher.address}
+
+
+def serialize_book(book):
+    return {
+        'id': book.pk,
+        'isbn': book.isbn,
+        'title': book.title,
+        'authors': [{'id': author.pk, 'full_name': author.full_name} for author in book.authors.all()],
+        'category': {'id': book.category.pk, 'name': book.category.name} if book.category else None,
+        'publisher': {'id': book.publisher.pk, 'name': book.publisher.name},
+        'price': str(book.price),
+        'publish_date': book.publish_date.isoformat(),
+        'availability_status': book.availability_status,
+    }
+
+
+def _books():
+    return Book.objects.select_related('publisher', 'category').prefetch_related('authors')
+
+
+# Book payloads embed category and publisher names, so both namespaces count
+@api_view('books', 'reference')
+async def book_list(request):
+    book_filter = BookFilter(request.GET)
+    books = await book_filter.aapply(_books())
+    ordering = ('title', 'id')
+    if book_filter.get('q'):
+        books, ranked = annotate_rank(books, book_filter.get('q'))
+        if ranked:
+            ordering = ('search_rank', 'id')
+    return await apaginated(request, books, ordering, serialize_book)
+
+
+@api_view('books', 'reference')
+async def book_detail(request, pk):
+    return JsonResponse(serialize_book(await aget_object_or_404(_books(), pk=pk)))
+
+
+@api_view('books', 'reference')
+async def book_by_isbn(request, isbn):
+    return JsonResponse(serialize_book(await aget_object_or_404(_books(), isbn=isbn)))
+
+
+@api_view('books')
+async def author_list(request):
+    authors = Author.objects.all()
+    name = ' '.join(request.GET.get('q', '').split())
+    if name:
+        authors = authors.filter(full_name__icontains=name)
+    return await apaginated(request, authors, ('full_name', 'id'), serialize_author)
+
+
+@api_view('books')
+async def author_detail(request, pk):
+    return JsonResponse(serialize_author(await aget_object_or_404(Author, pk=pk)))
+
+
+@api_view('reference')
+async def category_list(request):
+    categories = Category.objects.all()
+    parent = request.GET.get('parent', '')
+    if parent.isdigit():
+        categories = categories.filter(parent_category_id=int(parent))
+    # Tree order: every category directly follows its parent
+    return await apaginated(request, categories, ('path', 'id'), serialize_category)
+
+
+@api_view('reference')
+async def category_detail(request, pk):
+    return JsonResponse(serialize_category(await aget_object_or_404(Category, pk=pk)))
+
+
+@api_view('reference')
+async def publisher_list(request):
+    publishers = Publisher.objects.all()
+    name = ' '.join(request.GET.get('q', '').split())
+    if name:
+        publishers = publishers.filter(name__icontains=name)
+    return await apaginated(request, publishers, ('name', 'id'), serialize_publisher)
+
+
+@api_view('reference')
+async def publisher_detail(request, pk):
+    return JsonResponse(serialize_publisher(await aget_object_or_404(Publisher, pk=pk)))
+
+
+# Suggestions embed author names, titles and publisher names
+@api_view('books', 'reference')
+async def autocomplete(request, kind):
+    if kind not in SOURCES:
+        raise Http404
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse({'results': await asuggest(kind, request.GET.get('q', ''), limit)})
+
+
+def serialize_change(entry):
+    return {
+        'seq': entry.seq, 'model': entry.model, 'id': entry.object_id,
+        'action': entry.action, 'at': entry.created_at.isoformat(),
+    }
+
+
+# No ETag: favorites are logged too, and they move no cache version
+@api_view()
+async def changes(request):
+    try:
+        since = max(int(request.GET.get('since', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', CHANGES_PAGE_SIZE)), 1), MAX_CHANGES_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'detail': '"since" and "limit" must be integers.'}, status=400)
+    entries = [entry async for entry in entries_since(since, limit + 1)]
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    last_seq = entries[-1].seq if entries else since
+    query = request.GET.copy()
+    query['since'] = last_seq
+    return JsonResponse({
+        'results': [serialize_change(entry) for entry in entries],
+        # Where to continue from; poll with it again once next is null
+        'last_seq': last_seq,
+        'next': request.build_absolute_uri(f'{request.path}?{query.urlencode()}') if has_more else None,
+    })
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'books'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from library_management_system.db import configure_sqlite
+        from . import signals  # noqa: F401
+
+        # Project-wide SQLite tuning; connected here as the project has no app of its own
+        connection_created.connect(configure_sqlite, dispatch_uid='library_management_system.configure_sqlite')
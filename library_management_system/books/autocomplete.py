@@ -0,0 +1,120 @@
+"""
+Prefix autocompletion for author names, book titles and publisher names.
+
+Each source has a lowercase key column generated by the database and indexed
+together with the id, so a prefix is one index range seek (``low <= key <
+high``) that already returns rows in suggestion order. Results are kept in a
+small per-process LRU keyed by the cache version of the namespace that writes
+to the source invalidate, so hot prefixes skip the database until the next
+write.
+"""
+import string
+import sys
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+
+from library_management_system.routers import primary_reads
+
+from .caching import aget_version
+from .models import Author, Book, Publisher
+
+# kind: (model, label field, indexed key field, cache namespace)
+SOURCES = {
+    'authors': (Author, 'full_name', 'name_key', 'books'),
+    'titles': (Book, 'title', 'title_key', 'books'),
+    'publishers': (Publisher, 'name', 'name_key', 'reference'),
+}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+
+# SQLite's lower(), which computes the key columns, only folds ASCII letters
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize(text):
+    """``text`` as stored in the key columns: ASCII-lowercased, whitespace collapsed."""
+    return ' '.join(text.split()).translate(_ASCII_LOWER)
+
+
+def prefix_bounds(prefix):
+    """
+    ``(low, high)`` so that ``low <= key < high`` selects every key starting
+    with ``prefix``; ``high`` is None when nothing sorts above the prefix.
+    """
+    # The last character below U+10FFFF is incremented; maximal ones are
+    # dropped, carrying into the character before them
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    code = ord(stem[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates cannot be encoded for the database; none is a valid key
+        code = 0xE000
+    return prefix, stem[:-1] + chr(code)
+
+
+def prefix_q(field, prefix):
+    low, high = prefix_bounds(prefix)
+    if high is None:
+        return Q(**{f'{field}__gte': low})
+    return Q(**{f'{field}__gte': low, f'{field}__lt': high})
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry; safe across threads."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+hot_prefixes = LRUCache(getattr(settings, 'BOOKS_AUTOCOMPLETE_LRU_SIZE', 1024))
+
+
+def suggestions_queryset(kind, prefix, limit):
+    model, label, key, _ = SOURCES[kind]
+    return model.objects.filter(prefix_q(key, prefix)).order_by(key, 'id').values_list('id', label)[:limit]
+
+
+async def asuggest(kind, text, limit=DEFAULT_LIMIT):
+    """Up to ``limit`` ``{'id', 'label'}`` suggestions of ``kind`` whose name starts with ``text``."""
+    prefix = normalize(text)
+    if not prefix:
+        return []
+    limit = min(max(limit, 1), MAX_LIMIT)
+    key = (kind, prefix, limit, await aget_version(SOURCES[kind][3]))
+    suggestions = hot_prefixes.get(key)
+    if suggestions is None:
+        # From the primary, like every cached value: see caching.get_or_load
+        with primary_reads():
+            suggestions = [
+                {'id': pk, 'label': label}
+                async for pk, label in suggestions_queryset(kind, prefix, limit)
+            ]
+        hot_prefixes.set(key, suggestions)
+    return suggestions
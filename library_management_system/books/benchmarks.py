@@ -0,0 +1,235 @@
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from io import StringIO
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library_management_system.middleware import template_timer
+
+from .favorites import rebuild_weekly_counts, recount, week_start
+from .models import Book, Category, FavoriteBook
+
+BENCH_PASSWORD = 'bench-pass-123'
+
+
+class Scenario:
+    def __init__(self, name, label, call, client='member', rollback=False):
+        self.name = name
+        self.label = label
+        self.call = call
+        self.client = client
+        # Destructive requests run inside a transaction that is rolled back
+        self.rollback = rollback
+
+    def run(self, client):
+        if not self.rollback:
+            return self.call(client)
+        with transaction.atomic():
+            response = self.call(client)
+            transaction.set_rollback(True)
+        return response
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def seed_catalogue(size, seed):
+    """Grow the catalogue to ``size`` books (sizes are benchmarked in ascending order)."""
+    missing = size - Book.objects.count()
+    if missing > 0:
+        call_command(
+            'populate_db', count=missing, batch_size=10000, seed=seed + size,
+            authors=max(10, size // 100), categories=max(6, min(60, size // 1000)),
+            publishers=max(6, size // 5000), stdout=StringIO(),
+        )
+
+
+def seed_users(favorites=50):
+    User = get_user_model()
+    users = {}
+    for username, role in (('bench-member', 'member'), ('bench-admin', 'admin')):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            # The admin is also staff, for the Django admin changelist scenarios
+            user = User.objects.create_user(
+                username=username, password=BENCH_PASSWORD, full_name=username, role=role,
+                is_staff=role == 'admin', is_superuser=role == 'admin',
+            )
+        users[role] = user
+    FavoriteBook.objects.filter(user=users['member']).delete()
+    favorited = FavoriteBook.objects.bulk_create([
+        FavoriteBook(user=users['member'], book_id=book_id)
+        for book_id in Book.objects.order_by('?').values_list('id', flat=True)[:favorites]
+    ])
+    # bulk_create bypasses the signals that maintain the counts
+    recount([favorite.book_id for favorite in favorited])
+    rebuild_weekly_counts(since=week_start())
+    return users
+
+
+def follow_pages(url, params, pages):
+    """Request ``pages`` pages deep, following next cursors."""
+    def call(client):
+        response = client.get(url, params)
+        for _ in range(pages - 1):
+            next_query = response.context['next_query'] if response.context else None
+            if not next_query:
+                break
+            response = client.get(url + '?' + next_query)
+        return response
+    return call
+
+
+def build_scenarios():
+    book_list = reverse('book_list')
+    changelist = reverse('admin:books_book_changelist')
+    category = Category.objects.order_by('path').first()
+    sample_book = Book.objects.order_by('id').first()
+    filters = {
+        'all': {},
+        'title': {'title': 'harry'},
+        'author': {'author': 'king'},
+        'category': {'category': str(category.id)} if category else {},
+        'category-tree': {'category': str(category.id), 'subcategories': '1'} if category else {},
+        'availability+price': {'availability': 'available', 'min_price': '20', 'max_price': '30'},
+        'date-range': {'start_date': '1990-01-01', 'end_date': '1999-12-31'},
+        'search': {'q': 'potter'},
+        # Matches a tenth of the seeded titles: ranking cost grows with the matches
+        'search-broad': {'q': 'harry'},
+    }
+    scenarios = [
+        Scenario('book_list', label, lambda client, params=params: client.get(book_list, params))
+        for label, params in filters.items()
+    ]
+    scenarios += [
+        # Every row rendered on every request, as before row fragments were cached
+        Scenario('book_list', 'all-uncached-rows', override_settings(BOOKS_ROW_CACHE=False)(
+            lambda client: client.get(book_list),
+        )),
+        Scenario('book_list', 'page-5', follow_pages(book_list, {}, 5)),
+        Scenario('book_list', 'search-page-5', follow_pages(book_list, {'q': 'harry'}, 5)),
+        Scenario('api_book_list', 'search', lambda client: client.get(reverse('api_book_list'), {'q': 'harry'})),
+        Scenario('book_list', 'popular', lambda client: client.get(book_list, {'sort': 'popular'})),
+        Scenario('favorites_list', 'first-page', lambda client: client.get(reverse('favorites_list'))),
+        Scenario('popular_books', 'leaderboards', lambda client: client.get(reverse('popular_books'))),
+        Scenario(
+            'delete_filtered_books', 'narrow',
+            lambda client: client.post(reverse('delete_filtered_books'), {'title': 'harry', 'max_price': '11'}),
+            client='admin', rollback=True,
+        ),
+        Scenario('admin_book_changelist', 'first-page', lambda client: client.get(changelist), client='admin'),
+        Scenario('admin_book_changelist', 'page-5', lambda client: client.get(changelist, {'p': '5'}), client='admin'),
+        Scenario('admin_book_changelist', 'decade', lambda client: client.get(changelist, {'decade': '1990'}), client='admin'),
+        Scenario('admin_book_changelist', 'search', lambda client: client.get(changelist, {'q': 'king'}), client='admin'),
+        Scenario('login_view', 'get', lambda client: client.get(reverse('login')), client='anonymous'),
+        Scenario(
+            'login_view', 'post',
+            lambda client: client.post(reverse('login'), {'username': 'bench-member', 'password': BENCH_PASSWORD}),
+            client='anonymous',
+        ),
+    ]
+    if sample_book is not None:
+        toggle = reverse('book_favorite_toggle', args=[sample_book.pk])
+        scenarios.append(Scenario('toggle_favorite', 'toggle', lambda client: client.get(toggle)))
+    return scenarios
+
+
+def measure(scenario, client, iterations):
+    scenario.run(client)  # warm caches and connections
+    latencies, template_times, query_counts = [], [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as queries, template_timer() as rendering:
+            started = time.perf_counter()
+            response = scenario.run(client)
+            latencies.append((time.perf_counter() - started) * 1000)
+        template_times.append(rendering[0] * 1000)
+        query_counts.append(len(queries))
+    tracemalloc.start()
+    try:
+        scenario.run(client)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'template_p50_ms': round(percentile(template_times, 50), 3),
+        'queries': max(query_counts),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_suite(sizes, iterations=20, seed=42, only=None, log=None):
+    """Benchmark every scenario at every catalogue size; returns a JSON-ready report."""
+    results = []
+    for size in sorted(sizes):
+        seed_catalogue(size, seed)
+        users = seed_users()
+        clients = {'anonymous': Client()}
+        for role in ('member', 'admin'):
+            clients[role] = Client()
+            clients[role].force_login(users[role])
+        for scenario in build_scenarios():
+            if only and scenario.name not in only:
+                continue
+            metrics = measure(scenario, clients[scenario.client], iterations)
+            result = {'scenario': scenario.name, 'label': scenario.label, 'size': size, **metrics}
+            results.append(result)
+            if log:
+                log(result)
+    return {
+        'meta': {
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def result_key(result):
+    return f"{result['scenario']}[{result['label']}]@{result['size']}"
+
+
+def compare(report, baseline, threshold=0.25, min_delta_ms=1.0):
+    """
+    Regressions of ``report`` against ``baseline``.
+
+    A scenario regresses when its p95 grows by more than ``threshold`` (and by
+    at least ``min_delta_ms``, to ignore timer noise), when it issues more
+    queries, or when its peak memory grows by more than ``threshold``.
+    """
+    base = {result_key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = base.get(result_key(result))
+        if before is None:
+            continue
+        problems = []
+        if (result['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                and result['p95_ms'] - before['p95_ms'] >= min_delta_ms):
+            problems.append(f"p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['queries'] > before['queries']:
+            problems.append(f"queries {before['queries']} -> {result['queries']}")
+        if result['peak_kb'] > before['peak_kb'] * (1 + threshold):
+            problems.append(f"peak memory {before['peak_kb']}KB -> {result['peak_kb']}KB")
+        if problems:
+            regressions.append({'key': result_key(result), 'problems': problems})
+    return regressions
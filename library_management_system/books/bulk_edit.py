@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Round
+
+from .models import Book
+from .signals import books_bulk_changed
+
+
+def default_chunk_size():
+    return getattr(settings, 'BOOKS_BULK_UPDATE_CHUNK_SIZE', 5000)
+
+
+def adjusted_price(percent):
+    """An expression for the price changed by ``percent`` (e.g. -10 or 15), rounded to cents."""
+    price_field = Book._meta.get_field('price')
+    factor = Value(1 + Decimal(percent) / 100, output_field=DecimalField())
+    return Round(F('price') * factor, price_field.decimal_places, output_field=price_field)
+
+
+def update_books(books, values, chunk_size=None, using=DEFAULT_DB_ALIAS):
+    """
+    Apply ``values`` (``QuerySet.update`` keyword arguments, expressions
+    allowed) to the books of ``books``. Returns the number updated.
+
+    Each chunk of ``chunk_size`` ids, in ascending primary-key order, is one
+    set-based UPDATE in its own short transaction, so a filter matching a few
+    thousand books is a single statement and a huge one never holds the write
+    lock for long. Chunks are taken by primary key, so a change to a field
+    the filter tests does not skip or repeat books.
+    """
+    chunk_size = chunk_size or default_chunk_size()
+    books = books.using(using)
+    last_pk, updated = 0, 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(books.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            updated += Book.objects.using(using).filter(pk__in=ids).update(**values)
+            # Caches, row versions and the change log; no reindex unless indexed text changed
+            books_bulk_changed.send(sender=Book, book_ids=ids, using=using, fields=set(values))
+        if len(ids) < chunk_size:
+            break
+        last_pk = ids[-1]
+    return updated
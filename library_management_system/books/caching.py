@@ -0,0 +1,155 @@
+import os
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from library_management_system.routers import primary_reads
+
+REFERENCE_TIMEOUT = 60 * 60 * 24
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """The cache backing the books app (``BOOKS_CACHE_ALIAS``, default ``'default'``)."""
+    return caches[getattr(settings, 'BOOKS_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'books:version:{namespace}'
+
+
+def _new_version():
+    # A fresh random token rather than a counter: a version can never be
+    # reused, even if the stored one is evicted and re-created.
+    return uuid.uuid4().hex
+
+
+def get_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every entry cached under ``namespace`` by moving to a new version."""
+    version = _new_version()
+    get_cache().set(_version_key(namespace), version, timeout=None)
+    return version
+
+
+def invalidate(namespace, using=DEFAULT_DB_ALIAS):
+    """
+    Bump ``namespace`` now and, inside a transaction, again once it commits.
+
+    The second bump discards anything another request cached from the
+    not-yet-committed state in between.
+    """
+    bump_version(namespace)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: bump_version(namespace), using=using)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join(['books', namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+async def aversioned_key(namespace, *parts):
+    return ':'.join(['books', namespace, str(await aget_version(namespace)), *map(str, parts)])
+
+
+def _count(name, outcome):
+    with _stats_lock:
+        _stats[(name, outcome)] += 1
+
+
+def get_or_load(namespace, name, loader, timeout=None):
+    """
+    Return ``loader()`` cached under the current ``namespace`` version,
+    counting hits and misses. The loader reads from the primary: a stale
+    replica would otherwise fill the new version with the old data.
+    """
+    cache = get_cache()
+    key = versioned_key(namespace, name)
+    value = cache.get(key)
+    if value is None:
+        _count(name, 'misses')
+        with primary_reads():
+            value = loader()
+        cache.set(key, value, timeout)
+    else:
+        _count(name, 'hits')
+    return value
+
+
+async def aget_or_load(namespace, name, loader, timeout=None):
+    """``get_or_load`` for async views; ``loader`` is a coroutine function."""
+    cache = get_cache()
+    key = await aversioned_key(namespace, name)
+    value = await cache.aget(key)
+    if value is None:
+        _count(name, 'misses')
+        with primary_reads():
+            value = await loader()
+        await cache.aset(key, value, timeout)
+    else:
+        _count(name, 'hits')
+    return value
+
+
+def stats():
+    """Hit/miss counters of this process, e.g. ``{'categories': {'hits': 3, 'misses': 1}}``."""
+    with _stats_lock:
+        items = list(_stats.items())
+    result = {}
+    for (name, outcome), count in items:
+        result.setdefault(name, {'hits': 0, 'misses': 0})[outcome] = count
+    return {'pid': os.getpid(), 'caches': result}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# --- Reference data ---
+
+def get_categories():
+    """All categories in tree (materialized path) order."""
+    from .models import Category
+
+    return get_or_load('reference', 'categories', lambda: list(Category.objects.order_by('path')), REFERENCE_TIMEOUT)
+
+
+async def aget_categories():
+    from .models import Category
+
+    async def load():
+        return [category async for category in Category.objects.order_by('path')]
+
+    return await aget_or_load('reference', 'categories', load, REFERENCE_TIMEOUT)
+
+
+def get_publishers():
+    from .models import Publisher
+
+    return get_or_load('reference', 'publishers', lambda: list(Publisher.objects.order_by('name', 'pk')), REFERENCE_TIMEOUT)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+
+from .models import ChangeLogEntry
+
+_BATCH_SIZE = 500
+
+
+def default_chunk_size():
+    return getattr(settings, 'BOOKS_CHANGELOG_COMPACT_CHUNK_SIZE', 10000)
+
+
+def record(model, object_ids, action=ChangeLogEntry.UPSERT, using=DEFAULT_DB_ALIAS):
+    """Append one entry per id in ``object_ids`` (an iterable or a ``values_list`` queryset) of ``model``."""
+    name = model._meta.model_name
+    ChangeLogEntry.objects.using(using).bulk_create(
+        (ChangeLogEntry(model=name, object_id=object_id, action=action) for object_id in object_ids),
+        batch_size=_BATCH_SIZE,
+    )
+
+
+def entries_since(seq, limit):
+    """The first ``limit`` entries after ``seq``, in order: an index seek on the primary key."""
+    return ChangeLogEntry.objects.filter(seq__gt=seq).order_by('seq')[:limit]
+
+
+def superseded(entries):
+    """The entries of ``entries`` followed by a later one for the same object."""
+    later = ChangeLogEntry.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'),
+    )
+    return entries.filter(Exists(later))
+
+
+def compact(up_to_seq=None, chunk_size=None):
+    """
+    Delete entries up to ``up_to_seq`` (default: all) that a later entry for
+    the same object supersedes, in seq windows of ``chunk_size``, one short
+    transaction each. Returns the number deleted.
+
+    The latest entry of every object is kept, deletes included, so a
+    consumer reading from any ``since`` still learns the final state of
+    everything that changed after it.
+    """
+    chunk_size = chunk_size or default_chunk_size()
+    bounds = ChangeLogEntry.objects.aggregate(low=Min('seq'), high=Max('seq'))
+    if bounds['low'] is None:
+        return 0
+    high = bounds['high'] if up_to_seq is None else min(up_to_seq, bounds['high'])
+    deleted = 0
+    for start in range(bounds['low'], high + 1, chunk_size):
+        window = ChangeLogEntry.objects.filter(seq__gte=start, seq__lte=min(start + chunk_size - 1, high))
+        with transaction.atomic():
+            count, _ = superseded(window).delete()
+        deleted += count
+    return deleted
@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from library_management_system.routers import primary_reads
+
+from .caching import aversioned_key, get_cache
+from .models import Book
+
+# (label, lower, upper); lower inclusive, upper exclusive
+PRICE_BUCKETS = [
+    ('Under $10', None, Decimal('10')),
+    ('$10 – $25', Decimal('10'), Decimal('25')),
+    ('$25 – $50', Decimal('25'), Decimal('50')),
+    ('$50 – $100', Decimal('50'), Decimal('100')),
+    ('$100 and up', Decimal('100'), None),
+]
+
+FACET_TIMEOUT = 300
+
+# The filters that select within each facet. A facet is counted without its
+# own filters, so picking a category still shows what the others would hold.
+OWN_FILTERS = {
+    'category': ('category', 'subcategories'),
+    'availability': ('availability',),
+    'price': ('min_price', 'max_price'),
+}
+
+
+def _price_step():
+    # The smallest price difference: the listing's max_price is inclusive, so
+    # a bucket links to just below its exclusive upper bound
+    return Decimal(1).scaleb(-Book._meta.get_field('price').decimal_places)
+
+
+def _price_bucket():
+    whens = [
+        When(price__lt=upper, then=Value(index))
+        for index, (_, _, upper) in enumerate(PRICE_BUCKETS)
+        if upper is not None
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+async def acompute_facets(queryset):
+    """
+    Category, availability and price-bucket counts for ``queryset``.
+
+    A single GROUP BY over the three dimensions, folded in Python, so the
+    cost is one query however many categories exist.
+    """
+    return _fold([row async for row in _grouped(queryset)])
+
+
+def _grouped(queryset):
+    return (
+        queryset.order_by()
+        .values('category_id', 'availability_status', price_bucket=_price_bucket())
+        .annotate(count=Count('id'))
+    )
+
+
+def _fold(rows):
+    categories, availability = {}, {}
+    prices = [0] * len(PRICE_BUCKETS)
+    total = 0
+    for row in rows:
+        count = row['count']
+        total += count
+        categories[row['category_id']] = categories.get(row['category_id'], 0) + count
+        availability[row['availability_status']] = availability.get(row['availability_status'], 0) + count
+        prices[row['price_bucket']] += count
+    return {
+        'total': total,
+        'category': categories,
+        'availability': availability,
+        'price': [
+            {
+                'label': label, 'min_price': lower, 'max_price': None if upper is None else upper - _price_step(),
+                'count': prices[index],
+            }
+            for index, (label, lower, upper) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def _selections(book_filter):
+    """
+    ``{facet: filter}`` to count under: the whole filter (key None) for the
+    total and every facet, plus the filter without its own dimension for each
+    facet that dimension is filtered on.
+    """
+    selections = {None: book_filter}
+    for facet, names in OWN_FILTERS.items():
+        if any(name in book_filter.cleaned for name in names):
+            selections[facet] = book_filter.without(*names)
+    return selections
+
+
+def _merge(counted):
+    facets = counted.pop(None)
+    for facet, other in counted.items():
+        facets[facet] = other[facet]
+    return facets
+
+
+async def aget_facets(book_filter):
+    """
+    Facet counts for a ``BookFilter``, cached by its canonical key until the
+    next book write. Computed on the primary, like every cached value: one
+    grouped query, plus one per facet the filter selects within.
+    """
+    cache = get_cache()
+    key = await aversioned_key('books', 'facets', book_filter.digest)
+    facets = await cache.aget(key)
+    if facets is None:
+        with primary_reads():
+            facets = _merge({
+                facet: await acompute_facets(await selection.aapply(Book.objects.all()))
+                for facet, selection in _selections(book_filter).items()
+            })
+        await cache.aset(key, facets, FACET_TIMEOUT)
+    return facets
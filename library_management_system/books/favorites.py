@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, DateField, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from .models import Book, FavoriteBook, WeeklyFavoriteCount
+
+
+async def afavorited_among(user, book_ids):
+    """The subset of ``book_ids`` that ``user`` has favorited: one indexed lookup per page."""
+    if not user.is_authenticated or not book_ids:
+        return set()
+    favorites = FavoriteBook.objects.filter(user=user, book_id__in=book_ids).values_list('book_id', flat=True)
+    return {book_id async for book_id in favorites}
+
+
+def recount(book_ids=None):
+    """
+    Recompute ``Book.favorites_count`` from the FavoriteBook rows, for
+    ``book_ids`` or every book. Needed after writes that bypass signals,
+    such as ``bulk_create`` of favorites.
+    """
+    counts = (
+        FavoriteBook.objects.filter(book_id=OuterRef('pk'))
+        .order_by().values('book_id').annotate(n=Count('pk')).values('n')
+    )
+    books = Book.objects.all() if book_ids is None else Book.objects.filter(pk__in=book_ids)
+    return books.update(favorites_count=Coalesce(Subquery(counts), 0))
+
+
+def toggle(user, book_id):
+    """
+    Flip ``user``'s favorite on a book: delete the row if there is one,
+    otherwise insert it. Returns ``(favorited, favorites_count)``; raises
+    ``Book.DoesNotExist`` for an unknown book.
+    """
+    with transaction.atomic():
+        removed, _ = FavoriteBook.objects.filter(user=user, book_id=book_id).delete()
+        favorited = not removed
+        if favorited:
+            if not Book.objects.filter(pk=book_id).exists():
+                raise Book.DoesNotExist(book_id)
+            try:
+                with transaction.atomic():
+                    FavoriteBook.objects.create(user=user, book_id=book_id)
+            except IntegrityError:
+                # A concurrent request (double click) inserted it first
+                pass
+        count = Book.objects.filter(pk=book_id).values_list('favorites_count', flat=True).get()
+    return favorited, count
+
+
+def week_start(when=None):
+    """The Monday of the (local) week containing ``when``, default now."""
+    day = timezone.localdate(when)
+    return day - timedelta(days=day.weekday())
+
+
+def add_to_week(book_id, week, delta, using=DEFAULT_DB_ALIAS):
+    """Adjust a book's count for ``week`` by ``delta``, creating the row on first use."""
+    counts = WeeklyFavoriteCount.objects.using(using).filter(book_id=book_id, week=week)
+    if delta < 0:
+        counts.filter(count__gte=-delta).update(count=F('count') + delta)
+        return
+    if counts.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic(using=using):
+            WeeklyFavoriteCount.objects.using(using).create(book_id=book_id, week=week, count=delta)
+    except IntegrityError:
+        # Created concurrently between the UPDATE and the INSERT
+        counts.update(count=F('count') + delta)
+
+
+def rebuild_weekly_counts(since=None):
+    """
+    Recompute the weekly counts from FavoriteBook, for weeks from ``since``
+    (a date) on, or all of them. Returns the number of rows written.
+    """
+    favorites = FavoriteBook.objects.filter(created_at__isnull=False)
+    counts = WeeklyFavoriteCount.objects.all()
+    if since is not None:
+        since -= timedelta(days=since.weekday())
+        favorites = favorites.filter(created_at__date__gte=since)
+        counts = counts.filter(week__gte=since)
+    rows = (
+        favorites.annotate(week=Trunc('created_at', 'week', output_field=DateField()))
+        .order_by().values('book_id', 'week').annotate(n=Count('pk'))
+    )
+    with transaction.atomic():
+        counts.delete()
+        created = WeeklyFavoriteCount.objects.bulk_create(
+            (WeeklyFavoriteCount(book_id=row['book_id'], week=row['week'], count=row['n']) for row in rows.iterator()),
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def most_favorited(limit=10):
+    """All-time top ``limit``: a read of the (-favorites_count, id) index."""
+    return list(
+        Book.objects.filter(favorites_count__gt=0).select_related('publisher', 'category')
+        .order_by('-favorites_count', 'id')[:limit]
+    )
+
+
+def trending(limit=10, week=None):
+    """Books favorited most in ``week`` (default this week), as ``(book, count)`` pairs."""
+    counts = (
+        WeeklyFavoriteCount.objects.filter(week=week or week_start(), count__gt=0)
+        .select_related('book__publisher', 'book__category').order_by('-count', 'book_id')[:limit]
+    )
+    return [(row.book, row.count) for row in counts]
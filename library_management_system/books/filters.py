@@ -0,0 +1,167 @@
+import copy
+import hashlib
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
+
+from django.db.models import Exists, OuterRef
+
+from .caching import aget_categories, get_categories
+from .models import Book, subtree_bounds
+from .search import afts_available, apply_search
+
+AVAILABILITY_CHOICES = ('available', 'unavailable')
+
+
+def _text(value):
+    return ' '.join((value or '').split())
+
+
+def _decimal(value):
+    try:
+        number = Decimal((value or '').strip())
+    except InvalidOperation:
+        return None
+    if not number.is_finite():
+        return None
+    # Too large for the price column (and for normalizing in ``params``)
+    price = Book._meta.get_field('price')
+    if number and number.adjusted() >= price.max_digits - price.decimal_places:
+        return None
+    return number
+
+
+def _date(value):
+    try:
+        return date.fromisoformat((value or '').strip())
+    except ValueError:
+        return None
+
+
+class BookFilter:
+    """
+    The book listing filters, parsed once from GET or POST data.
+
+    ``key`` is a canonical, order-independent encoding of the active filters:
+    two requests with the same key select exactly the same rows, which is what
+    bulk actions and cached results rely on.
+    """
+
+    text_fields = ('q', 'title', 'author')
+    date_fields = ('publish_date', 'start_date', 'end_date')
+    price_fields = ('min_price', 'max_price')
+
+    def __init__(self, data):
+        self.cleaned = self.clean(data)
+        self.categories = None
+
+    def clean(self, data):
+        cleaned = {}
+        for name in self.text_fields:
+            value = _text(data.get(name))
+            if value:
+                cleaned[name] = value
+        category = (data.get('category') or '').strip()
+        if category.isdigit():
+            cleaned['category'] = int(category)
+            # Include books from every descendant category as well
+            if data.get('subcategories') in ('1', 'on', 'true'):
+                cleaned['subcategories'] = 1
+        availability = data.get('availability')
+        if availability in AVAILABILITY_CHOICES:
+            cleaned['availability'] = availability
+        for name in self.price_fields:
+            value = _decimal(data.get(name))
+            if value is not None:
+                cleaned[name] = value
+        for name in self.date_fields:
+            value = _date(data.get(name))
+            if value is not None:
+                cleaned[name] = value
+        return cleaned
+
+    def __bool__(self):
+        return bool(self.cleaned)
+
+    def get(self, name, default=None):
+        return self.cleaned.get(name, default)
+
+    @property
+    def params(self):
+        """Active filters as canonical strings, e.g. for hidden inputs or links."""
+        params = {}
+        for name, value in self.cleaned.items():
+            if isinstance(value, Decimal):
+                # 5, 5.0 and 5.00 are the same filter
+                value = format(value.normalize(), 'f')
+            elif isinstance(value, date):
+                value = value.isoformat()
+            params[name] = str(value)
+        return params
+
+    @property
+    def key(self):
+        return urlencode(sorted(self.params.items()))
+
+    @property
+    def digest(self):
+        """Fixed-length form of ``key`` suitable for cache keys."""
+        return hashlib.sha1(self.key.encode()).hexdigest()
+
+    def without(self, *names):
+        """A copy of this filter with the filters ``names`` removed."""
+        other = copy.copy(self)
+        other.cleaned = {name: value for name, value in self.cleaned.items() if name not in names}
+        return other
+
+    def category_path(self, category_id):
+        # Served from the cached category tree, so the subtree filter costs no extra query
+        for category in self.categories if self.categories is not None else get_categories():
+            if category.id == category_id:
+                return category.path
+        return None
+
+    async def aapply(self, queryset=None):
+        """``apply`` for async views: loads what it reads (categories, FTS availability) without blocking."""
+        if 'subcategories' in self.cleaned:
+            self.categories = await aget_categories()
+        if 'q' in self.cleaned:
+            await afts_available()
+        return self.apply(queryset)
+
+    def apply(self, queryset=None):
+        books = Book.objects.all() if queryset is None else queryset
+        cleaned = self.cleaned
+
+        if 'q' in cleaned:
+            books = apply_search(books, cleaned['q'])
+        if 'title' in cleaned:
+            books = books.filter(title__icontains=cleaned['title'])
+        if 'author' in cleaned:
+            # EXISTS keeps one row per book, so no join fan-out and no DISTINCT
+            author_match = Book.authors.through.objects.filter(
+                book_id=OuterRef('pk'), author__full_name__icontains=cleaned['author'],
+            )
+            books = books.filter(Exists(author_match))
+        if 'subcategories' in cleaned:
+            path = self.category_path(cleaned['category'])
+            if path is None:
+                books = books.none()
+            else:
+                low, high = subtree_bounds(path)
+                books = books.filter(category__path__gte=low, category__path__lt=high)
+        elif 'category' in cleaned:
+            books = books.filter(category_id=cleaned['category'])
+        if 'availability' in cleaned:
+            books = books.filter(availability_status=cleaned['availability'])
+        if 'min_price' in cleaned:
+            books = books.filter(price__gte=cleaned['min_price'])
+        if 'max_price' in cleaned:
+            books = books.filter(price__lte=cleaned['max_price'])
+        if 'publish_date' in cleaned:
+            books = books.filter(publish_date=cleaned['publish_date'])
+        if 'start_date' in cleaned:
+            books = books.filter(publish_date__gte=cleaned['start_date'])
+        if 'end_date' in cleaned:
+            books = books.filter(publish_date__lte=cleaned['end_date'])
+        return books
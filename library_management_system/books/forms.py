@@ -1,8 +1,46 @@
 from django import forms
-from django.core.exceptions import ValidationError
-from .models import Book
+from django.forms.models import ModelChoiceIterator
+from .bulk_edit import adjusted_price
+from .caching import get_categories, get_publishers
+from .models import Book, Category, Publisher
+from .validators import clean_isbn
+
+
+class CachedChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in self.field.load():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.load()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.load())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """
+    A ``ModelChoiceField`` whose options come from ``load()``, a cached list
+    of the queryset's objects, so rendering the dropdown runs no query.
+    Submitted values are still checked against ``queryset``.
+    """
+    iterator = CachedChoiceIterator
+
+    def __init__(self, queryset, load, **kwargs):
+        self.load = load
+        super().__init__(queryset, **kwargs)
+
 
 class BookForm(forms.ModelForm):
+    publisher = CachedModelChoiceField(Publisher.objects.all(), load=get_publishers)
+    category = CachedModelChoiceField(Category.objects.all(), load=get_categories)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['category'].label_from_instance = lambda category: category.tree_label
+
     class Meta:
         model = Book
         fields = ['title', 'isbn', 'price', 'publish_date', 'availability_status', 'publisher', 'category', 'authors']
@@ -11,7 +49,40 @@ class BookForm(forms.ModelForm):
         }
 
     def clean_isbn(self):
-        isbn = self.cleaned_data.get('isbn', '').strip()
-        if len(isbn) != 13 or not isbn.isdigit():
-            raise ValidationError('ISBN must be 13 numeric characters.')
-        return isbn
+        return clean_isbn(self.cleaned_data.get('isbn'))
+
+
+class BulkEditForm(forms.Form):
+    """Changes applied to every filtered book; blank fields are left as they are."""
+    # Prefixed so its fields never collide with the listing filters posted alongside
+    prefix = 'set'
+
+    availability_status = forms.ChoiceField(
+        required=False, choices=[('', 'No change'), *Book._meta.get_field('availability_status').choices],
+    )
+    category = CachedModelChoiceField(Category.objects.all(), load=get_categories, required=False, empty_label='No change')
+    price_change_percent = forms.DecimalField(
+        required=False, min_value=-90, max_value=100, max_digits=5, decimal_places=2,
+        help_text='Raise (e.g. 10) or lower (e.g. -15) every price by this percentage.',
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['category'].label_from_instance = lambda category: category.tree_label
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.errors and not self.values():
+            raise forms.ValidationError('Choose at least one change.')
+        return cleaned_data
+
+    def values(self):
+        """The changes as ``QuerySet.update`` keyword arguments."""
+        values = {}
+        if self.cleaned_data.get('availability_status'):
+            values['availability_status'] = self.cleaned_data['availability_status']
+        if self.cleaned_data.get('category') is not None:
+            values['category'] = self.cleaned_data['category']
+        if self.cleaned_data.get('price_change_percent'):
+            values['price'] = adjusted_price(self.cleaned_data['price_change_percent'])
+        return values
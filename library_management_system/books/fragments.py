@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db.models import aprefetch_related_objects
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .caching import get_cache
+
+ROW_TEMPLATE = 'books/book_row.html'
+# Change when book_row.html changes, so rows cached by the old markup are not reused
+ROW_TEMPLATE_REVISION = 1
+ROW_TIMEOUT = 60 * 60 * 24
+
+
+def row_cache_enabled():
+    return getattr(settings, 'BOOKS_ROW_CACHE', True)
+
+
+def row_key(book):
+    return f'books:row:{ROW_TEMPLATE_REVISION}:{book.pk}:{book.version}'
+
+
+async def aattach_rows(books):
+    """
+    Set ``row_html`` on each book: the listing cells that look the same to
+    every user, cached under the book's version.
+
+    All rows of a page are fetched with one ``get_many``; only the missing
+    ones load their authors and are rendered, then stored with one
+    ``set_many``. Anything per user (favorite state, admin controls) must
+    stay outside ``book_row.html``.
+    """
+    books = list(books)
+    keys = {book.pk: row_key(book) for book in books}
+    rows = await get_cache().aget_many(list(keys.values())) if row_cache_enabled() else {}
+    missing = [book for book in books if keys[book.pk] not in rows]
+    if missing:
+        await aprefetch_related_objects(missing, 'authors')
+        template = get_template(ROW_TEMPLATE)
+        rendered = {keys[book.pk]: template.render({'book': book}) for book in missing}
+        if row_cache_enabled():
+            await get_cache().aset_many(rendered, ROW_TIMEOUT)
+        rows.update(rendered)
+    for book in books:
+        book.row_html = mark_safe(rows[keys[book.pk]])
+    return books
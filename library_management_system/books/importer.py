@@ -0,0 +1,189 @@
+import csv
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .caching import invalidate
+from .models import Author, Book, Category, Publisher
+from .signals import books_bulk_changed
+from .validators import clean_isbn
+
+REQUIRED_COLUMNS = ('isbn', 'title', 'publisher', 'price', 'publish_date')
+# Book fields overwritten when an ISBN already exists, each only when the file
+# has its column; likewise an existing book's authors are only replaced by an
+# ``authors`` column
+UPDATE_FIELDS = ('title', 'price', 'publish_date', 'availability_status', 'publisher', 'category')
+MAX_ERROR_SAMPLES = 100
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole cannot be imported, e.g. a required column is missing."""
+
+
+def _lookup(model, field, using):
+    # Names are not unique; the oldest row wins, as in a get-or-create by name
+    return {name: pk for pk, name in model.objects.using(using).order_by('-pk').values_list('pk', field)}
+
+
+class BookImporter:
+    """
+    Upsert books by ISBN from CSV, in batches.
+
+    The columns are those written by the export (``id`` is ignored); authors
+    are separated by ``;``. Publishers, categories and authors are resolved by
+    name through in-memory maps loaded once, creating any that are missing.
+    Each batch is one transaction: a ``bulk_create(update_conflicts=True)``
+    for the books and a replacement of their author rows. Invalid rows are
+    counted and reported through ``error_file`` instead of stopping the import.
+    """
+
+    def __init__(self, batch_size=5000, error_file=None, on_batch=None, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.on_batch = on_batch
+        self.error_writer = None
+        self.error_file = error_file
+        self.rows = self.created = self.updated = self.error_count = 0
+        self.error_samples = []
+        self.elapsed = 0.0
+        self.fields = {name: Book._meta.get_field(name) for name in ('title', 'price', 'publish_date', 'availability_status')}
+
+    @property
+    def rows_per_second(self):
+        return self.rows / max(self.elapsed, 1e-9)
+
+    def run(self, lines):
+        """Import an iterable of CSV text lines (e.g. an open text file)."""
+        started = time.perf_counter()
+        reader = csv.DictReader(lines)
+        columns = reader.fieldnames or []
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+        self.update_fields = [name for name in UPDATE_FIELDS if name in columns]
+        self.replace_authors = 'authors' in columns
+        if self.error_file is not None:
+            self.error_writer = csv.DictWriter(
+                self.error_file, fieldnames=['line', 'error', *columns], extrasaction='ignore',
+            )
+            self.error_writer.writeheader()
+
+        self.publishers = _lookup(Publisher, 'name', self.using)
+        self.categories = _lookup(Category, 'name', self.using)
+        self.authors = _lookup(Author, 'full_name', self.using)
+
+        batch = {}
+        for row in reader:
+            self.rows += 1
+            try:
+                cleaned = self.clean_row(row)
+            except ValidationError as exc:
+                self.error(reader.line_num, row, '; '.join(exc.messages))
+                continue
+            # A later row for the same ISBN wins, as it would across batches
+            batch[cleaned['isbn']] = cleaned
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = {}
+        if batch:
+            self.flush(batch)
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def clean_row(self, row):
+        if None in row:
+            raise ValidationError('Too many fields.')
+        cleaned = {'isbn': clean_isbn(row.get('isbn'))}
+        errors = []
+        for name, field in self.fields.items():
+            value = (row.get(name) or '').strip()
+            if name == 'availability_status' and not value:
+                value = 'available'
+            try:
+                cleaned[name] = field.clean(value, None)
+            except ValidationError as exc:
+                errors.extend(f'{name}: {message}' for message in exc.messages)
+        cleaned['publisher'] = (row.get('publisher') or '').strip()
+        if not cleaned['publisher']:
+            errors.append('publisher: This field cannot be blank.')
+        if errors:
+            raise ValidationError(errors)
+        cleaned['category'] = (row.get('category') or '').strip()
+        cleaned['authors'] = list(dict.fromkeys(
+            name for name in (part.strip() for part in (row.get('authors') or '').split(';')) if name
+        ))
+        return cleaned
+
+    def error(self, line, row, message):
+        self.error_count += 1
+        if len(self.error_samples) < MAX_ERROR_SAMPLES:
+            self.error_samples.append({'line': line, 'isbn': (row.get('isbn') or '').strip(), 'error': message})
+        if self.error_writer is not None:
+            self.error_writer.writerow({**row, 'line': line, 'error': message})
+
+    def resolve(self, model, field, lookup, wanted):
+        """Add ids for names in ``wanted`` that are not in ``lookup`` yet, creating the rows."""
+        missing = [name for name in dict.fromkeys(wanted) if name and name not in lookup]
+        if not missing:
+            return False
+        if model is Category:
+            # Saved one by one so the materialized path is maintained
+            for name in missing:
+                lookup[name] = Category.objects.using(self.using).create(name=name).pk
+            return True
+        model.objects.using(self.using).bulk_create([model(**{field: name}) for name in missing], batch_size=500)
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = model.objects.using(self.using).filter(**{f'{field}__in': chunk}).order_by('-pk')
+            lookup.update((name, pk) for pk, name in rows.values_list('pk', field))
+        return True
+
+    def flush(self, batch):
+        batch_started = time.perf_counter()
+        rows = list(batch.values())
+        with transaction.atomic(using=self.using):
+            new_publishers = self.resolve(Publisher, 'name', self.publishers, [row['publisher'] for row in rows])
+            self.resolve(Category, 'name', self.categories, [row['category'] for row in rows])
+            self.resolve(Author, 'full_name', self.authors, [name for row in rows for name in row['authors']])
+            if new_publishers:
+                # bulk_create sends no post_save, so drop cached reference data here
+                invalidate('reference', using=self.using)
+
+            existing = set(Book.objects.using(self.using).filter(isbn__in=batch).values_list('isbn', flat=True))
+            books = [
+                Book(
+                    isbn=row['isbn'], title=row['title'], price=row['price'],
+                    publish_date=row['publish_date'], availability_status=row['availability_status'],
+                    publisher_id=self.publishers[row['publisher']],
+                    category_id=self.categories.get(row['category']),
+                )
+                for row in rows
+            ]
+            Book.objects.using(self.using).bulk_create(
+                books, update_conflicts=True, unique_fields=['isbn'], update_fields=self.update_fields,
+            )
+            if any(book.pk is None for book in books):
+                # Backends that cannot return ids from an upsert
+                ids = dict(Book.objects.using(self.using).filter(isbn__in=batch).values_list('isbn', 'pk'))
+                for book in books:
+                    book.pk = ids[book.isbn]
+
+            through = Book.authors.through
+            book_ids = [book.pk for book in books]
+            if self.replace_authors:
+                through.objects.using(self.using).filter(book_id__in=book_ids).delete()
+            through.objects.using(self.using).bulk_create(
+                [
+                    through(book_id=book.pk, author_id=self.authors[name])
+                    for book, row in zip(books, rows)
+                    for name in row['authors']
+                ],
+                batch_size=self.batch_size,
+            )
+            books_bulk_changed.send(sender=Book, book_ids=book_ids, using=self.using)
+
+        self.updated += len(existing)
+        self.created += len(rows) - len(existing)
+        if self.on_batch:
+            self.on_batch(self, len(rows), time.perf_counter() - batch_started)
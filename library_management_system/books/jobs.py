@@ -0,0 +1,110 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils import timezone
+
+from .filters import BookFilter
+from .models import Book, BulkDeleteJob
+
+logger = logging.getLogger(__name__)
+
+
+def default_chunk_size():
+    return getattr(settings, 'BOOKS_BULK_DELETE_CHUNK_SIZE', 500)
+
+
+def claim(job_id, stale_after=None, retry_failed=False):
+    """
+    Mark a job as running if nobody else is running it; True if we got it.
+
+    A running job whose heartbeat is older than ``stale_after`` is assumed to
+    belong to a worker that died and can be claimed again. With
+    ``retry_failed``, so can a failed job: its progress was saved with each
+    chunk, so it continues after the last one that committed.
+    """
+    claimable = Q(status=BulkDeleteJob.PENDING)
+    if stale_after is not None:
+        claimable |= Q(status=BulkDeleteJob.RUNNING, updated_at__lt=timezone.now() - stale_after)
+    if retry_failed:
+        claimable |= Q(status=BulkDeleteJob.FAILED)
+    claimed = BulkDeleteJob.objects.filter(claimable, pk=job_id).update(
+        status=BulkDeleteJob.RUNNING, error='', updated_at=timezone.now(),
+    )
+    return claimed == 1
+
+
+def run_job(job_id, chunk_size=None, stale_after=None, retry_failed=False):
+    """
+    Delete the job's books in ascending primary-key chunks, one short
+    transaction each, so other writers get the database between chunks.
+
+    Progress (``last_pk``, ``deleted``) is saved in the same transaction as
+    each chunk, so a crashed job resumes exactly where it stopped. Returns the
+    job, or None when it was not claimable.
+    """
+    if not claim(job_id, stale_after, retry_failed):
+        return None
+    job = BulkDeleteJob.objects.get(pk=job_id)
+    chunk_size = chunk_size or default_chunk_size()
+    book_filter = BookFilter(QueryDict(job.filter_key))
+    try:
+        if job.total is None:
+            job.total = book_filter.apply().count()
+            job.save(update_fields=['total', 'updated_at'])
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    book_filter.apply().filter(pk__gt=job.last_pk)
+                    .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                _, per_model = Book.objects.filter(pk__in=ids).delete()
+                job.deleted += per_model.get(Book._meta.label, 0)
+                job.last_pk = ids[-1]
+                job.save(update_fields=['deleted', 'last_pk', 'updated_at'])
+    except Exception as exc:
+        logger.exception('Bulk delete job %s failed', job.pk)
+        job.status, job.error = BulkDeleteJob.FAILED, f'{type(exc).__name__}: {exc}'
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+    job.status, job.finished_at = BulkDeleteJob.DONE, timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # The thread's connections are never reused by a request
+        connections.close_all()
+
+
+def start_job(job):
+    """
+    Run ``job`` according to ``settings.BOOKS_JOB_RUNNER``: ``'thread'`` (the
+    default) in a background thread once the current transaction commits,
+    ``'inline'`` right away in the calling thread.
+    """
+    if getattr(settings, 'BOOKS_JOB_RUNNER', 'thread') == 'inline':
+        run_job(job.pk)
+        return
+    transaction.on_commit(
+        lambda: threading.Thread(target=_run_in_thread, args=(job.pk,), name=f'bulk-delete-{job.pk}', daemon=True).start()
+    )
+
+
+def resumable_jobs(stale_after, retry_failed=False):
+    resumable = (
+        Q(status=BulkDeleteJob.PENDING)
+        | Q(status=BulkDeleteJob.RUNNING, updated_at__lt=timezone.now() - stale_after)
+    )
+    if retry_failed:
+        resumable |= Q(status=BulkDeleteJob.FAILED)
+    return BulkDeleteJob.objects.filter(resumable).order_by('pk')
+
@@ -0,0 +1,198 @@
+"""
+In-process load test of the ASGI and WSGI entry points.
+
+Both applications are the ones deployed (``library_management_system.asgi``
+and ``.wsgi``), called directly rather than over a socket, so the numbers
+compare the request paths, not the servers in front of them. ASGI requests
+run as concurrent coroutines on one event loop, like a uvicorn worker; WSGI
+requests run on a thread pool of the same size, like a threaded gunicorn or
+mod_wsgi worker.
+"""
+import asyncio
+import io
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import django
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .benchmarks import percentile, seed_catalogue, seed_users
+
+HOST = 'testserver'
+
+
+class Target:
+    def __init__(self, name, path, params=None, user='member'):
+        self.name = name
+        self.path = path
+        self.query = urlencode(params or {})
+        self.user = user
+
+
+def build_targets():
+    return [
+        Target('book_list', reverse('book_list')),
+        Target('book_list[search]', reverse('book_list'), {'q': 'potter'}),
+        Target('favorites_list', reverse('favorites_list')),
+        Target('api_book_list', reverse('api_book_list'), {'limit': 50}),
+        # A sync view, as a control: it runs in a thread under both servers
+        Target('login_view', reverse('login'), user=None),
+    ]
+
+
+def session_cookies(users):
+    cookies = {None: ''}
+    for role, user in users.items():
+        client = Client()
+        client.force_login(user)
+        cookies[role] = '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+    return cookies
+
+
+def wsgi_request(application, target, cookie):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': target.path,
+        'QUERY_STRING': target.query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    result = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(application, target, cookie):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': target.path,
+        'raw_path': target.path.encode(),
+        'root_path': '',
+        'query_string': target.query.encode(),
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    status = []
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    # Django listens for a disconnect while the view runs; the client never leaves
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def summarize(latencies, statuses, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'errors': sum(1 for status in statuses if status >= 400),
+    }
+
+
+def run_wsgi(application, target, cookie, requests, concurrency):
+    def timed(_):
+        started = time.perf_counter()
+        status = wsgi_request(application, target, cookie)
+        return (time.perf_counter() - started) * 1000, status
+
+    wsgi_request(application, target, cookie)  # warm caches and connections
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(timed, range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize([latency for latency, _ in results], [status for _, status in results], elapsed)
+
+
+async def _run_asgi(application, target, cookie, requests, concurrency):
+    latencies, statuses = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            statuses.append(await asgi_request(application, target, cookie))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asgi_request(application, target, cookie)  # warm caches and connections
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def run_asgi(application, target, cookie, requests, concurrency):
+    return asyncio.run(_run_asgi(application, target, cookie, requests, concurrency))
+
+
+RUNNERS = {'asgi': run_asgi, 'wsgi': run_wsgi}
+
+
+def run_suite(size, requests=200, concurrency=(1, 16, 64), seed=42, only=None, log=None):
+    """Load every target through both servers at each concurrency; returns a JSON-ready report."""
+    from library_management_system.asgi import application as asgi_application
+    from library_management_system.wsgi import application as wsgi_application
+
+    applications = {'asgi': asgi_application, 'wsgi': wsgi_application}
+    seed_catalogue(size, seed)
+    cookies = session_cookies(seed_users())
+    results = []
+    for target in build_targets():
+        if only and target.name.split('[')[0] not in only:
+            continue
+        for level in concurrency:
+            for server, run in RUNNERS.items():
+                metrics = run(applications[server], target, cookies[target.user], requests, level)
+                result = {'target': target.name, 'server': server, 'concurrency': level, 'size': size, **metrics}
+                results.append(result)
+                if log:
+                    log(result)
+    return {
+        'meta': {
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'requests': requests,
+            'seed': seed,
+        },
+        'results': results,
+    }
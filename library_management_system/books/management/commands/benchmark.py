@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from books import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark book_list, favorites_list, toggle_favorite, delete_filtered_books, the admin book '
+        'changelist and login_view '
+        'against seeded catalogues in a throwaway test database; reports p50/p95 latency, '
+        'template render time, query count and peak memory as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000', help='Comma-separated catalogue sizes (default 1000,10000)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the generated catalogue')
+        parser.add_argument('--only', default='', help='Comma-separated view names to run, e.g. book_list,login_view')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--compare', metavar='BASELINE', help='Flag regressions against a saved report')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative growth before flagging (default 0.25)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if not sizes or min(sizes) < 1 or options['iterations'] < 1:
+            raise CommandError('--sizes and --iterations must be positive')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        only = {name.strip() for name in options['only'].split(',') if name.strip()}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = benchmarks.run_suite(
+                sizes, iterations=options['iterations'], seed=options['seed'], only=only, log=self.log,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = benchmarks.compare(report, baseline, threshold=options['threshold'])
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(f"REGRESSION {regression['key']}: {'; '.join(regression['problems'])}"))
+            if regressions:
+                raise CommandError(f'{len(regressions)} scenario(s) regressed against {options["compare"]}')
+            self.stderr.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def log(self, result):
+        self.stderr.write(
+            f"{benchmarks.result_key(result):45} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+            f"tpl={result['template_p50_ms']:8.2f}ms queries={result['queries']:3} peak={result['peak_kb']:8.1f}KB"
+        )
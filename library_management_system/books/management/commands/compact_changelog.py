@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.changelog import compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete change log entries superseded by a later entry for the same object; the latest entry '
+        'of every object is kept, so consumers syncing from any seq still end up with the same state'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--up-to-seq', type=int, default=None, help='Only compact entries up to this seq (default: all)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Seqs examined per transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        deleted = compact(up_to_seq=options['up_to_seq'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} superseded change log entries.'))
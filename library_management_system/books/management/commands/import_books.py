@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from books.importer import BookImporter, ImportFormatError
+
+
+class Command(BaseCommand):
+    help = 'Import books from a CSV file, inserting new ISBNs and updating existing ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with columns isbn,title,authors,category,publisher,price,publish_date,availability_status')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per upsert batch and transaction')
+        parser.add_argument('--errors', default=None, help='Where to write rejected rows (default: <path>.errors.csv)')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'{path} does not exist')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be >= 1')
+        error_path = Path(options['errors'] or f'{path}.errors.csv')
+
+        def report(importer, batch_rows, batch_elapsed):
+            self.stdout.write(
+                f'  {importer.rows} rows read, {importer.created} created, {importer.updated} updated, '
+                f'{importer.error_count} rejected  ({batch_rows / max(batch_elapsed, 1e-9):,.0f} rows/s this batch)'
+            )
+
+        # newline='' lets the csv module handle quoted line breaks; utf-8-sig drops a BOM
+        with path.open(newline='', encoding='utf-8-sig') as source, error_path.open('w', newline='', encoding='utf-8') as errors:
+            importer = BookImporter(batch_size=options['batch_size'], error_file=errors, on_batch=report)
+            try:
+                importer.run(source)
+            except ImportFormatError as exc:
+                raise CommandError(str(exc))
+
+        if importer.error_count:
+            self.stdout.write(self.style.WARNING(f'{importer.error_count} rows rejected; see {error_path}'))
+        else:
+            error_path.unlink()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.rows - importer.error_count} rows ({importer.created} created, {importer.updated} updated) '
+            f'in {importer.elapsed:.1f}s, {importer.rows_per_second:,.0f} rows/s'
+        ))
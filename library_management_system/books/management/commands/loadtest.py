@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from books import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the catalogue views through the ASGI and WSGI applications at several concurrency levels '
+        'against a seeded catalogue in a throwaway test database; reports requests/sec and p50/p99 latency as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000, help='Catalogue size (default 10000)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per target, server and concurrency level')
+        parser.add_argument('--concurrency', default='1,16,64', help='Comma-separated concurrency levels (default 1,16,64)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the generated catalogue')
+        parser.add_argument('--only', default='', help='Comma-separated targets to run, e.g. book_list,api_book_list')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            concurrency = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers')
+        if not concurrency or min(concurrency) < 1 or options['size'] < 1 or options['requests'] < 1:
+            raise CommandError('--size, --requests and --concurrency must be positive')
+        only = {name.strip() for name in options['only'].split(',') if name.strip()}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = loadtest.run_suite(
+                options['size'], requests=options['requests'], concurrency=concurrency,
+                seed=options['seed'], only=only, log=self.log,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def log(self, result):
+        self.stderr.write(
+            f"{result['target']:20} {result['server']} c={result['concurrency']:<3} rps={result['rps']:8.1f} "
+            f"p50={result['p50_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms errors={result['errors']}"
+        )
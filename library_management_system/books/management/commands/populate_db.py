@@ -1,94 +1,150 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
 from books.models import Author, Category, Publisher, Book
+from books.signals import books_bulk_changed
 from datetime import date
 import random
+import time
 
 
-def generate_isbn(existing: set[str] | None = None) -> str:
-    """Generate a unique 13-digit ISBN not in existing."""
-    if existing is None:
-        existing = set()
-    while True:
-        candidate = ''.join([str(random.randint(0, 9)) for _ in range(13)])
-        if candidate not in existing:
-            return candidate
+AUTHOR_NAMES = [
+    "J.K. Rowling", "George Orwell", "Agatha Christie", "Isaac Asimov",
+    "Haruki Murakami", "Terry Pratchett", "Dan Brown", "Suzanne Collins",
+    "Stephen King", "Neil Gaiman"
+]
+CATEGORY_NAMES = ["Fiction", "Mystery", "Science Fiction", "Fantasy", "Non-Fiction", "Thriller"]
+PUBLISHER_NAMES = ["Penguin Books", "Bloomsbury", "HarperCollins", "Random House", "Macmillan", "Simon & Schuster"]
+BOOK_TITLES = [
+    "Harry Potter and the Sorcerer's Stone", "1984", "Murder on the Orient Express",
+    "Foundation", "Kafka on the Shore", "The Hobbit", "Angels & Demons",
+    "The Hunger Games", "The Shining", "American Gods", "Harry Potter and the Chamber of Secrets",
+    "Animal Farm", "Death on the Nile", "I, Robot", "Norwegian Wood", "Good Omens",
+    "Inferno", "Catching Fire", "It", "Coraline"
+]
+
+
+def isbn_block_start(rng: random.Random, count: int) -> int:
+    """Pick the first of ``count`` consecutive 13-digit ISBNs that are all unused."""
+    for _ in range(100):
+        start = rng.randrange(10 ** 12, 10 ** 13 - count)
+        if not Book.objects.filter(isbn__gte=f"{start:013d}", isbn__lt=f"{start + count:013d}").exists():
+            return start
+    raise CommandError(f"Could not find {count} consecutive free ISBNs")
+
+
+def names(base: list[str], wanted: int, label: str) -> list[str]:
+    """The built-in names, topped up with numbered synthetic ones when more are wanted."""
+    return base[:wanted] + [f"{label} {i + 1:05d}" for i in range(max(0, wanted - len(base)))]
 
 
 class Command(BaseCommand):
     help = 'Populate database with rich sample authors, categories, publishers, and books'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help='Number of books to create (default 100)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Books per INSERT batch and transaction')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed; the same seed on an empty database gives the same catalogue')
+        parser.add_argument('--authors', type=int, default=len(AUTHOR_NAMES), help='Number of authors')
+        parser.add_argument('--categories', type=int, default=len(CATEGORY_NAMES), help='Number of categories')
+        parser.add_argument('--publishers', type=int, default=len(PUBLISHER_NAMES), help='Number of publishers')
+
     def handle(self, *args, **options):
+        count, batch_size = options['count'], options['batch_size']
+        if count < 0 or batch_size < 1:
+            raise CommandError('--count must be >= 0 and --batch-size >= 1')
+        for name in ('authors', 'categories', 'publishers'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1')
+        rng = random.Random(options['seed'])
+
         # --- Authors ---
-        authors_list = [
-            "J.K. Rowling", "George Orwell", "Agatha Christie", "Isaac Asimov",
-            "Haruki Murakami", "Terry Pratchett", "Dan Brown", "Suzanne Collins",
-            "Stephen King", "Neil Gaiman"
-        ]
-        authors = []
-        for name in authors_list:
-            author, _ = Author.objects.get_or_create(full_name=name)
-            authors.append(author)
+        authors = self.ensure(Author, 'full_name', names(AUTHOR_NAMES, options['authors'], 'Author'))
         self.stdout.write(self.style.SUCCESS(f'Created {len(authors)} authors'))
 
         # --- Categories ---
-        categories_list = ["Fiction", "Mystery", "Science Fiction", "Fantasy", "Non-Fiction", "Thriller"]
-        categories = []
-        for name in categories_list:
-            category, _ = Category.objects.get_or_create(name=name)
-            categories.append(category)
+        categories = self.ensure_categories(names(CATEGORY_NAMES, options['categories'], 'Category'), rng)
         self.stdout.write(self.style.SUCCESS(f'Created {len(categories)} categories'))
 
         # --- Publishers ---
-        publishers_list = ["Penguin Books", "Bloomsbury", "HarperCollins", "Random House", "Macmillan", "Simon & Schuster"]
-        publishers = []
-        for name in publishers_list:
-            publisher, _ = Publisher.objects.get_or_create(name=name)
-            publishers.append(publisher)
+        publishers = self.ensure(Publisher, 'name', names(PUBLISHER_NAMES, options['publishers'], 'Publisher'))
         self.stdout.write(self.style.SUCCESS(f'Created {len(publishers)} publishers'))
 
         # --- Books ---
-        book_titles = [
-            "Harry Potter and the Sorcerer's Stone", "1984", "Murder on the Orient Express",
-            "Foundation", "Kafka on the Shore", "The Hobbit", "Angels & Demons",
-            "The Hunger Games", "The Shining", "American Gods", "Harry Potter and the Chamber of Secrets",
-            "Animal Farm", "Death on the Nile", "I, Robot", "Norwegian Wood", "Good Omens",
-            "Inferno", "Catching Fire", "It", "Coraline"
-        ]
-
-        existing_isbns = set(Book.objects.values_list('isbn', flat=True))
-        # Create many books including repeated titles with unique ISBNs
+        # ISBNs come from one unused consecutive block, so no per-row uniqueness checks
+        isbn_start = isbn_block_start(rng, count) if count else 0
+        author_ids = [author.pk for author in authors]
+        category_ids = [category.pk for category in categories]
+        publisher_ids = [publisher.pk for publisher in publishers]
+        through = Book.authors.through
+
         total = 0
-        for i in range(100):
-            title = random.choice(book_titles) + f" #{i+1}"
-            num_authors = random.choice([1, 2])
-            book_authors = random.sample(authors, num_authors)
-            category = random.choice(categories)
-            publisher = random.choice(publishers)
-            price = round(random.uniform(10.0, 50.0), 2)
-            year = random.randint(1930, 2020)
-            month = random.randint(1, 12)
-            day = random.randint(1, 28)
-            publish_date = date(year, month, day)
-            availability_status = random.choice(["available", "unavailable"])
-            isbn = generate_isbn(existing_isbns)
-            existing_isbns.add(isbn)
-
-            book = Book.objects.create(
-                title=title,
-                isbn=isbn,
-                price=price,
-                publish_date=publish_date,
-                availability_status=availability_status,
-                publisher=publisher,
-                category=category
-            )
+        started = time.perf_counter()
+        for batch_start in range(0, count, batch_size):
+            batch_started = time.perf_counter()
+            books, book_authors = [], []
+            for i in range(batch_start, min(batch_start + batch_size, count)):
+                books.append(Book(
+                    title=rng.choice(BOOK_TITLES) + f" #{i+1}",
+                    isbn=f"{isbn_start + i:013d}",
+                    price=round(rng.uniform(10.0, 50.0), 2),
+                    publish_date=date(rng.randint(1930, 2020), rng.randint(1, 12), rng.randint(1, 28)),
+                    availability_status=rng.choice(["available", "unavailable"]),
+                    publisher_id=rng.choice(publisher_ids),
+                    category_id=rng.choice(category_ids),
+                ))
+                book_authors.append(rng.sample(author_ids, min(rng.choice([1, 2]), len(author_ids))))
 
-            # ✅ Correct: assign authors INSIDE the loop
-            for author in book_authors:
-                book.authors.add(author)
+            with transaction.atomic():
+                created = Book.objects.bulk_create(books, batch_size=batch_size)
+                if any(book.pk is None for book in created):
+                    # Backends that cannot return ids from a bulk insert
+                    ids = dict(Book.objects.filter(isbn__in=[b.isbn for b in books]).values_list('isbn', 'pk'))
+                    for book in created:
+                        book.pk = ids[book.isbn]
+                through.objects.bulk_create(
+                    [
+                        through(book_id=book.pk, author_id=author_id)
+                        for book, ids_for_book in zip(created, book_authors)
+                        for author_id in ids_for_book
+                    ],
+                    batch_size=batch_size,
+                )
+                books_bulk_changed.send(sender=Book, book_ids=[book.pk for book in created], using=DEFAULT_DB_ALIAS)
 
-            book.save()
-            total += 1
+            total += len(created)
+            batch_elapsed = time.perf_counter() - batch_started
+            overall = total / max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f'  {total}/{count} books  '
+                f'({len(created) / max(batch_elapsed, 1e-9):,.0f} rows/s this batch, {overall:,.0f} rows/s overall)'
+            )
 
-        self.stdout.write(self.style.SUCCESS(f'Created {total} books'))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Created {total} books in {elapsed:.1f}s'))
         self.stdout.write(self.style.SUCCESS('Database population completed successfully!'))
+
+    def ensure(self, model, field, wanted):
+        """Fetch the named rows, bulk-creating whichever do not exist yet, in ``wanted`` order."""
+        existing = {}
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start:start + 500]
+            existing.update((getattr(obj, field), obj) for obj in model.objects.filter(**{f'{field}__in': chunk}))
+        missing = [model(**{field: name}) for name in wanted if name not in existing]
+        if missing:
+            model.objects.bulk_create(missing, batch_size=500)
+            for start in range(0, len(missing), 500):
+                chunk = [getattr(obj, field) for obj in missing[start:start + 500]]
+                existing.update((getattr(obj, field), obj) for obj in model.objects.filter(**{f'{field}__in': chunk}))
+        return [existing[name] for name in wanted]
+
+    def ensure_categories(self, wanted, rng):
+        # Saved one by one so the materialized path is maintained; synthetic
+        # categories hang under a built-in one to give the tree some depth.
+        categories = []
+        for name in wanted:
+            category = Category.objects.filter(name=name).first()
+            if category is None:
+                parent = rng.choice(categories[:len(CATEGORY_NAMES)]) if len(categories) >= len(CATEGORY_NAMES) else None
+                category = Category.objects.create(name=name, parent_category=parent)
+            categories.append(category)
+        return categories
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from books import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FTS5 full-text index over book titles and author names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild on')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if not search.fts_supported(connection):
+            raise CommandError('This database does not support SQLite FTS5; search falls back to LIKE matching.')
+        with transaction.atomic(using=using):
+            search.create_index(connection)
+            count = search.rebuild_index(using=using)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} books'))
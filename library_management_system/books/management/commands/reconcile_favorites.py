@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from books.favorites import rebuild_weekly_counts, recount
+
+
+class Command(BaseCommand):
+    help = 'Recompute Book.favorites_count and the weekly favorite counts from the FavoriteBook rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=None,
+                            help='Only rebuild this many recent weeks of counts (default: all)')
+
+    def handle(self, *args, **options):
+        weeks = options['weeks']
+        if weeks is not None and weeks < 1:
+            raise CommandError('--weeks must be >= 1')
+        books = recount()
+        self.stdout.write(f'Recounted favorites for {books} books.')
+        since = timezone.localdate() - timedelta(weeks=weeks - 1) if weeks else None
+        rows = rebuild_weekly_counts(since)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} weekly counts.'))
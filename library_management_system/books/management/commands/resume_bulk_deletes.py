@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from books.jobs import resumable_jobs, run_job
+from books.models import BulkDeleteJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending bulk delete jobs and resume ones whose worker stopped (e.g. after a crash or restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds without progress after which a running job counts as crashed (default 300)')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Also resume failed jobs (e.g. after "database is locked") from their last chunk')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Books deleted per transaction')
+
+    def handle(self, *args, **options):
+        if options['stale_after'] < 0:
+            raise CommandError('--stale-after must be >= 0')
+        stale_after = timedelta(seconds=options['stale_after'])
+        job_ids = list(resumable_jobs(stale_after, options['retry_failed']).values_list('pk', flat=True))
+        if not job_ids:
+            self.stdout.write('No bulk delete jobs to run.')
+            return
+        for job_id in job_ids:
+            job = run_job(job_id, chunk_size=options['chunk_size'], stale_after=stale_after, retry_failed=options['retry_failed'])
+            if job is None:
+                self.stdout.write(f'Job #{job_id} was picked up by another worker.')
+            elif job.status == BulkDeleteJob.FAILED:
+                self.stdout.write(self.style.ERROR(f'Job #{job.pk} failed after {job.deleted} books: {job.error}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Job #{job.pk}: deleted {job.deleted} books.'))
@@ -0,0 +1,56 @@
+from django.db import DatabaseError, migrations
+
+# Frozen copies of the DDL and backfill in books.search as of this migration,
+# so later changes there do not alter what it does.
+CREATE_INDEX_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_book_fts USING fts5("
+    "title, authors, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+BACKFILL_SQL = (
+    "INSERT INTO books_book_fts(rowid, title, authors) "
+    "SELECT b.id, b.title, COALESCE(("
+    "SELECT group_concat(a.full_name, ' ') FROM books_book_authors ba "
+    "JOIN books_author a ON a.id = ba.author_id "
+    "WHERE ba.book_id = b.id), '') "
+    "FROM books_book b"
+)
+
+
+def fts_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.books_fts5_probe USING fts5(x)')
+        except DatabaseError:
+            return False
+        cursor.execute('DROP TABLE temp.books_fts5_probe')
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_INDEX_SQL)
+        cursor.execute('DELETE FROM books_book_fts')
+        cursor.execute(BACKFILL_SQL)
+        cursor.execute("INSERT INTO books_book_fts(books_book_fts) VALUES ('optimize')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS books_book_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_alter_favoritebook_unique_together'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('books', 'Category')
+    parents = dict(Category.objects.values_list('pk', 'parent_category_id'))
+    children = {}
+    for pk, parent_id in parents.items():
+        children.setdefault(parent_id, []).append(pk)
+    paths = {}
+
+    def walk(root, parent_path):
+        pending = [(root, parent_path)]
+        while pending:
+            pk, prefix = pending.pop()
+            paths[pk] = prefix + f'{pk:08d}/'
+            pending.extend((child, paths[pk]) for child in children.get(pk, []) if child not in paths)
+
+    for pk in children.get(None, []):
+        walk(pk, '')
+    # Anything unreached sits on a parent cycle; turn one member into a root
+    for pk in sorted(parents):
+        if pk not in paths:
+            Category.objects.filter(pk=pk).update(parent_category=None)
+            walk(pk, '')
+    for pk, path in paths.items():
+        Category.objects.filter(pk=pk).update(path=path, depth=path.count('/') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_book_catalogue_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
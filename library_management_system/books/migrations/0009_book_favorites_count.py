@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_favorites(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    FavoriteBook = apps.get_model('books', 'FavoriteBook')
+    counts = (
+        FavoriteBook.objects.filter(book_id=OuterRef('pk'))
+        .order_by().values('book_id').annotate(n=Count('pk')).values('n')
+    )
+    Book.objects.update(favorites_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_bulkdeletejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-favorites_count', 'id'], name='book_popularity_idx'),
+        ),
+    ]
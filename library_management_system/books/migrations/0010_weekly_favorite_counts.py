@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forget_backfilled_dates(apps, schema_editor):
+    # AddField stamps existing rows with the migration time; their real
+    # creation time is unknown, so keep them out of the weekly counts.
+    apps.get_model('books', 'FavoriteBook').objects.update(created_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_book_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoritebook',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.RunPython(forget_backfilled_dates, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='WeeklyFavoriteCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_favorite_counts', to='books.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['week', '-count', 'book'], name='weekly_favorite_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('book', 'week'), name='weekly_favorite_count_unique')],
+            },
+        ),
+    ]
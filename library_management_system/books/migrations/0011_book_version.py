@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:18
+
+import books.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_weekly_favorite_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='version',
+            field=models.CharField(default=books.models.new_row_version, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:30
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_book_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('full_name'), output_field=models.CharField(max_length=200)),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='title_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('title'), output_field=models.CharField(max_length=255)),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=models.CharField(max_length=200)),
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['name_key', 'id'], name='author_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title_key', 'id'], name='book_title_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publisher',
+            index=models.Index(fields=['name_key', 'id'], name='publisher_name_key_idx'),
+        ),
+    ]
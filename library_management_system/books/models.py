@@ -1,30 +1,122 @@
-from django.db import models
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Concat, Lower, Substr
 from django.conf import settings
 
+from .caching import invalidate
+
+
+def lowercase_key(field, max_length):
+    """
+    Lowercased copy of ``field`` computed by the database on every write,
+    bulk ones included; indexed with the id, it serves prefix autocompletion
+    (``books.autocomplete``) as index range seeks.
+    """
+    return models.GeneratedField(
+        expression=Lower(field), output_field=models.CharField(max_length=max_length), db_persist=True,
+    )
+
 
 class Publisher(models.Model):
     name = models.CharField(max_length=200)
     address= models.TextField(blank=True)
+    name_key = lowercase_key("name", 200)
 
     def __str__(self):
         return self.name
+
+    class Meta:
+        indexes = [models.Index(fields=["name_key", "id"], name="publisher_name_key_idx")]
     
 
+# Width of one materialized-path segment: a zero-padded primary key plus "/"
+PATH_DIGITS = 8
+
+
+def path_segment(pk):
+    return f"{pk:0{PATH_DIGITS}d}/"
+
+
+def subtree_bounds(path):
+    """``(low, high)`` so that ``low <= p < high`` selects ``path`` and all its descendants."""
+    # Every descendant starts with "<path>"; "/" sorts just below "0"
+    return path, path[:-1] + "0"
+
+
 class Category(models.Model):
     name = models.CharField(max_length=200)
     parent_category = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL)
+    # Materialized path of zero-padded ids from the root, e.g. "00000001/00000004/"
+    path = models.CharField(max_length=255, db_index=True, editable=False, default="")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
+    @property
+    def tree_label(self):
+        return "\u2014 " * self.depth + self.name
+
+    def subtree_q(self, prefix=""):
+        low, high = subtree_bounds(self.path)
+        return models.Q(**{f"{prefix}path__gte": low, f"{prefix}path__lt": high})
+
+    def _parent_path(self):
+        if self.parent_category_id is None:
+            return ""
+        return Category.objects.filter(pk=self.parent_category_id).values_list("path", flat=True).get()
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_category_id:
+            if self.parent_category_id == self.pk or self._parent_path().startswith(self.path):
+                raise ValidationError({"parent_category": "A category cannot be moved under itself."})
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        parent_path = self._parent_path()
+        if self.pk and self.path and parent_path.startswith(self.path):
+            raise ValueError("A category cannot be moved under itself.")
+        super().save(*args, **kwargs)
+        old_path, old_depth = self.path, self.depth
+        new_path = parent_path + path_segment(self.pk)
+        if new_path == old_path:
+            return
+        new_depth = new_path.count("/") - 1
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            # Move the whole subtree with one UPDATE by swapping the path prefix
+            low, high = subtree_bounds(old_path)
+            Category.objects.filter(path__gt=low, path__lt=high).update(
+                path=Concat(models.Value(new_path), Substr("path", len(old_path) + 1)),
+                depth=models.F("depth") + (new_depth - old_depth),
+            )
+        self.path, self.depth = new_path, new_depth
+        # Subtree filters now select different books; post_save ran before the move
+        invalidate("books")
+
 
 class Author(models.Model):
     full_name = models.CharField(max_length=200)
     bio = models.TextField(blank=True)
+    name_key = lowercase_key("full_name", 200)
 
     def __str__(self):
         return self.full_name
 
+    class Meta:
+        indexes = [models.Index(fields=["name_key", "id"], name="author_name_key_idx")]
+
+
+def new_row_version():
+    # Random rather than a counter: bulk bumps can set it with a plain UPDATE,
+    # and a counter could hand out the same value again after a rolled-back
+    # transaction or a restored backup, matching rows rendered from the
+    # discarded state that may still be in the shared cache
+    return uuid.uuid4().hex
+
 
 class Book(models.Model):
     title = models.CharField(max_length=255)
@@ -35,18 +127,135 @@ class Book(models.Model):
     publisher = models.ForeignKey(Publisher, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     authors = models.ManyToManyField(Author)
+    # Denormalized number of FavoriteBook rows, kept current by signals
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    # Replaced by every save and, through signals, by changes to the authors or
+    # to the category/publisher names shown with the book; keys its cached
+    # listing row (books.fragments)
+    version = models.CharField(max_length=32, default=new_row_version, editable=False)
+    title_key = lowercase_key("title", 255)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = new_row_version()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        # Each index leads with a book_list filter and ends with the (title, id)
+        # keyset ordering, so filtered pages are index seeks rather than sorts.
+        indexes = [
+            models.Index(fields=["title", "id"], name="book_title_id_idx"),
+            models.Index(fields=["availability_status", "title", "id"], name="book_avail_title_idx"),
+            models.Index(fields=["category", "title", "id"], name="book_category_title_idx"),
+            models.Index(fields=["price"], name="book_price_idx"),
+            models.Index(fields=["publish_date"], name="book_publish_date_idx"),
+            # Popularity sort: ("-favorites_count", "id") keyset pages
+            models.Index(fields=["-favorites_count", "id"], name="book_popularity_idx"),
+            models.Index(fields=["title_key", "id"], name="book_title_key_idx"),
+        ]
+
 
 class FavoriteBook(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    # Null for favorites that predate the column; those count towards no week
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
 
     def __str__(self):
         return f"{self.user} - {self.book}"
     
     class Meta:
         unique_together = ("user", "book")
-    
\ No newline at end of file
+    
+
+class BulkDeleteJob(models.Model):
+    """
+    A delete of every book matching a listing filter, run in primary-key
+    chunks by ``books.jobs`` so it can report progress and resume.
+    """
+
+    PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    # BookFilter.key of the filters to delete by
+    filter_key = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    deleted = models.PositiveIntegerField(default=0)
+    # Highest book id already processed; a resumed run continues after it
+    last_pk = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Heartbeat: touched after every chunk, so a stale running job has crashed
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Bulk delete #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == self.DONE:
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(self.deleted / self.total, 1.0)
+
+
+class WeeklyFavoriteCount(models.Model):
+    """
+    Favorites added to a book in one week (starting Monday), kept current by
+    FavoriteBook signals, so "trending this week" is an indexed top-N read.
+    """
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="weekly_favorite_counts")
+    week = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["book", "week"], name="weekly_favorite_count_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["week", "-count", "book"], name="weekly_favorite_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} @ {self.week}: {self.count}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One append-only record per catalogue change, for consumers that sync
+    incrementally: they read the entries after the last ``seq`` they saw and
+    re-fetch (or drop) each named object. Written by signals in the same
+    transaction as the change; ``compact_changelog`` removes entries
+    superseded by a later one for the same object.
+    """
+
+    UPSERT, DELETE = "upsert", "delete"
+    ACTION_CHOICES = [(UPSERT, "Created or updated"), (DELETE, "Deleted")]
+
+    # AUTOINCREMENT on SQLite, so never reused; with a single writer, entries
+    # commit in seq order and a reader past seq N never misses one below N
+    seq = models.BigAutoField(primary_key=True)
+    # Lowercase model name: book, author, category, publisher or favoritebook
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Compaction: the latest entry of each object
+            models.Index(fields=["model", "object_id", "seq"], name="changelog_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.action} {self.model} {self.object_id}"
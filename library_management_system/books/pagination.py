@@ -0,0 +1,176 @@
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class _CursorSerializer:
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DjangoJSONEncoder, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+def default_page_size():
+    return getattr(settings, 'BOOKS_PAGE_SIZE', 25)
+
+
+def cursor_querystring(params, cursor):
+    """Return ``params`` as a query string with ``cursor`` swapped in, keeping every filter."""
+    query = params.copy()
+    query.pop('cursor', None)
+    if cursor:
+        query['cursor'] = cursor
+    return query.urlencode()
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over ``ordering``, which must end with a unique column.
+
+    Each page is one ``WHERE (ordering) > (last row) ORDER BY ordering LIMIT n``
+    query, so page N costs the same as page 1. Cursors are signed, so a
+    tampered token is rejected instead of producing an arbitrary seek.
+    """
+
+    salt = 'books.pagination'
+
+    def __init__(self, queryset, ordering=('title', 'id'), per_page=None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page or default_page_size()
+
+    def _fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else '-' + field for field in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _ in self._fields()]
+        payload = {'o': list(self.ordering), 'v': values, 'd': direction}
+        return signing.dumps(payload, salt=self.salt, serializer=_CursorSerializer, compress=True)
+
+    def decode_cursor(self, token):
+        try:
+            payload = signing.loads(token, salt=self.salt, serializer=_CursorSerializer)
+        except (signing.BadSignature, ValueError):
+            raise InvalidCursor(token)
+        if (
+            not isinstance(payload, dict)
+            or payload.get('o') != list(self.ordering)
+            or payload.get('d') not in ('n', 'p')
+            or len(payload.get('v') or ()) != len(self.ordering)
+        ):
+            raise InvalidCursor(token)
+        return payload['v'], payload['d']
+
+    def _seek(self, values, forward):
+        # Row-value comparison spelled out as (a > x) OR (a = x AND b > y) ...
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'gt' if forward != descending else 'lt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        # ... plus a redundant bound on the leading column: SQLite cannot seek
+        # an index on the OR alone and would walk it from the start
+        (name, descending), value = self._fields()[0], values[0]
+        return Q(**{f'{name}__{"gte" if forward != descending else "lte"}': value}) & condition
+
+    def _rows(self, queryset):
+        return list(queryset[:self.per_page + 1])
+
+    def _build_page(self, rows, direction):
+        if direction == 'p':
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = direction == 'n'
+        next_cursor = self.encode_cursor(rows[-1], 'n') if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], 'p') if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_queryset(self, cursor=None):
+        """Return ``(queryset, direction)`` for the page addressed by ``cursor``."""
+        if cursor:
+            try:
+                values, direction = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+            else:
+                if direction == 'n':
+                    return self.queryset.filter(self._seek(values, True)).order_by(*self.ordering), direction
+                return self.queryset.filter(self._seek(values, False)).order_by(*self._reversed_ordering()), direction
+        return self.queryset.order_by(*self.ordering), None
+
+    def page(self, cursor=None):
+        """Return the page addressed by ``cursor``; an invalid cursor yields the first page."""
+        queryset, direction = self.get_queryset(cursor)
+        return self._build_page(self._rows(queryset), direction)
+
+    async def apage(self, cursor=None):
+        """``page`` for async views."""
+        queryset, direction = self.get_queryset(cursor)
+        return self._build_page([obj async for obj in queryset[:self.per_page + 1]], direction)
+
+
+def exact_count_limit():
+    return getattr(settings, 'BOOKS_ADMIN_EXACT_COUNT_LIMIT', 10000)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Offset paginator for the admin whose ``count`` does not read a large table.
+
+    The exact count is taken over at most ``BOOKS_ADMIN_EXACT_COUNT_LIMIT`` + 1
+    rows. Past that, an unfiltered queryset is estimated by its highest
+    primary key (one index seek), which can only overshoot by deleted rows:
+    the last pages may then come out empty. Filtered querysets are still
+    counted exactly, over the narrower index their filters use.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        limit = exact_count_limit()
+        bounded = queryset[:limit + 1].count()
+        if bounded <= limit:
+            return bounded
+        if queryset.query.where:
+            return queryset.count()
+        return max(bounded, queryset.aggregate(highest=Max('pk'))['highest'] or 0)
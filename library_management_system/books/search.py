@@ -0,0 +1,157 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Exists, FloatField, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Author, Book
+
+FTS_TABLE = 'books_book_fts'
+
+# SQLite caps bound parameters per statement; stay well below the old default of 999
+_BATCH_SIZE = 500
+
+_available = {}
+
+
+def _book_table():
+    return Book._meta.db_table
+
+
+def _index_select_sql():
+    through = Book.authors.through._meta.db_table
+    return (
+        f'SELECT b.id, b.title, COALESCE(('
+        f'SELECT group_concat(a.full_name, \' \') FROM {through} ba '
+        f'JOIN {Author._meta.db_table} a ON a.id = ba.author_id '
+        f'WHERE ba.book_id = b.id), \'\') '
+        f'FROM {_book_table()} b'
+    )
+
+
+def fts_supported(connection):
+    """Whether ``connection`` is SQLite built with the FTS5 extension."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.books_fts5_probe USING fts5(x)')
+        except DatabaseError:
+            return False
+        cursor.execute('DROP TABLE temp.books_fts5_probe')
+    return True
+
+
+def create_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, authors, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    _available.clear()
+
+
+def fts_available(using=DEFAULT_DB_ALIAS):
+    """Whether the FTS5 index exists on ``using``; cached per database file."""
+    connection = connections[using]
+    key = (using, str(connection.settings_dict['NAME']))
+    if key not in _available:
+        _available[key] = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+    return _available[key]
+
+
+async def afts_available(using=DEFAULT_DB_ALIAS):
+    """``fts_available`` for async code: only the first check per database leaves the event loop."""
+    connection = connections[using]
+    key = (using, str(connection.settings_dict['NAME']))
+    if key in _available:
+        return _available[key]
+    return await sync_to_async(fts_available)(using)
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), _BATCH_SIZE):
+        yield ids[start:start + _BATCH_SIZE]
+
+
+def remove_books(book_ids, using=DEFAULT_DB_ALIAS):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        for chunk in _chunks(book_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+
+
+def index_books(book_ids, using=DEFAULT_DB_ALIAS):
+    """(Re)index the given books from their current title and authors."""
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        for chunk in _chunks(book_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, title, authors) '
+                f'{_index_select_sql()} WHERE b.id IN ({placeholders})',
+                chunk,
+            )
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Repopulate the whole index; returns the number of indexed books."""
+    connection = connections[using]
+    if not fts_available(using):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, title, authors) {_index_select_sql()}')
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r'\w+', text)
+    return ' '.join('"%s"*' % word for word in words)
+
+
+def apply_search(queryset, text, using=DEFAULT_DB_ALIAS):
+    """
+    Restrict ``queryset`` to books matching ``text`` in title or author names.
+
+    Uses the FTS5 index when present and falls back to ``icontains`` matching
+    (author via ``EXISTS``) on backends without it.
+    """
+    match = match_expression(text)
+    if not match:
+        return queryset.none()
+    if fts_available(using):
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        )
+    author_match = Book.authors.through.objects.filter(book_id=OuterRef('pk'), author__full_name__icontains=text)
+    return queryset.filter(Q(title__icontains=text) | Exists(author_match))
+
+
+def annotate_rank(queryset, text, using=DEFAULT_DB_ALIAS):
+    """
+    Annotate ``search_rank`` (bm25, lower is better) on an already searched queryset.
+
+    Returns ``(queryset, ranked)``; ``ranked`` is False when there is no index
+    to rank with. Only meant for top-level listing queries, not subqueries.
+    """
+    match = match_expression(text)
+    if not match or not fts_available(using):
+        return queryset, False
+    # Joined rather than a correlated subquery, which would rerun the whole
+    # MATCH for every matching book (and again for a cursor's rank bound)
+    queryset = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {_book_table()}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    ).annotate(search_rank=RawSQL(f'{FTS_TABLE}.rank', [], output_field=FloatField()))
+    return queryset, True
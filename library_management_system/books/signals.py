@@ -0,0 +1,260 @@
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from . import changelog, favorites, search
+from .caching import invalidate
+from .models import Author, Book, Category, ChangeLogEntry, FavoriteBook, Publisher, new_row_version, subtree_bounds
+
+# Sent after bulk operations that bypass model signals (bulk_create, queryset
+# update). Arguments: ``book_ids`` (the affected books) and ``using``;
+# optionally ``fields``, the Book fields that changed when known.
+books_bulk_changed = Signal()
+
+# Book data the full-text index is built from
+INDEXED_FIELDS = {'title', 'authors'}
+
+
+# --- Category tree maintenance ---
+
+@receiver(post_delete, sender=Category)
+def reroot_orphaned_subtrees(sender, instance, using, **kwargs):
+    # SET_NULL has already detached the children; strip the deleted prefix
+    # from every descendant so each child becomes the root of its subtree.
+    if not instance.path:
+        return
+    low, high = subtree_bounds(instance.path)
+    Category.objects.using(using).filter(path__gt=low, path__lt=high).update(
+        path=Substr('path', len(instance.path) + 1),
+        depth=F('depth') - (instance.depth + 1),
+    )
+
+
+# --- Favorite counts ---
+
+@receiver(post_save, sender=FavoriteBook)
+def count_added_favorite(sender, instance, created, using, **kwargs):
+    if created:
+        Book.objects.using(using).filter(pk=instance.book_id).update(favorites_count=F('favorites_count') + 1)
+        favorites.add_to_week(instance.book_id, favorites.week_start(instance.created_at), 1, using=using)
+
+
+@receiver(post_delete, sender=FavoriteBook)
+def count_removed_favorite(sender, instance, using, **kwargs):
+    Book.objects.using(using).filter(pk=instance.book_id, favorites_count__gt=0).update(
+        favorites_count=F('favorites_count') - 1,
+    )
+    if instance.created_at is not None:
+        favorites.add_to_week(instance.book_id, favorites.week_start(instance.created_at), -1, using=using)
+
+
+# --- Full-text index sync ---
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, using, **kwargs):
+    search.index_books([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, using, **kwargs):
+    search.remove_books([instance.pk], using=using)
+
+
+@receiver(books_bulk_changed)
+def index_bulk_changed_books(sender, book_ids, using, fields=None, **kwargs):
+    if fields is None or INDEXED_FIELDS.intersection(fields):
+        search.index_books(book_ids, using=using)
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, using, created, **kwargs):
+    if not created:
+        search.index_books(instance.book_set.values_list('id', flat=True), using=using)
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    # The through rows are gone by post_delete, so collect the books now
+    instance._indexed_book_ids = list(instance.book_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def reindex_former_author_books(sender, instance, using, **kwargs):
+    search.index_books(getattr(instance, '_indexed_book_ids', ()), using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def reindex_on_author_change(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._indexed_book_ids = list(instance.book_set.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        book_ids = [instance.pk]
+    elif action == 'post_clear':
+        book_ids = getattr(instance, '_indexed_book_ids', ())
+    else:
+        book_ids = pk_set or ()
+    search.index_books(book_ids, using=using)
+
+
+# --- Listing row versions ---
+# Book.save replaces its own version; these cover every other change to what a
+# cached listing row shows.
+
+def bump_versions(books):
+    # One token for the whole batch is enough: row keys include the book id
+    books.update(version=new_row_version())
+
+
+@receiver(books_bulk_changed)
+def bump_bulk_changed_versions(sender, book_ids, using, **kwargs):
+    bump_versions(Book.objects.using(using).filter(pk__in=book_ids))
+
+
+@receiver(post_save, sender=Author)
+def bump_author_book_versions(sender, instance, created, using, **kwargs):
+    if not created:
+        bump_versions(Book.objects.using(using).filter(authors=instance))
+
+
+@receiver(post_delete, sender=Author)
+def bump_former_author_book_versions(sender, instance, using, **kwargs):
+    bump_versions(Book.objects.using(using).filter(pk__in=getattr(instance, '_indexed_book_ids', ())))
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def bump_versions_on_author_change(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        book_ids = [instance.pk]
+    elif action == 'post_clear':
+        # Collected at pre_clear by reindex_on_author_change
+        book_ids = getattr(instance, '_indexed_book_ids', ())
+    else:
+        book_ids = pk_set or ()
+    bump_versions(Book.objects.using(using).filter(pk__in=book_ids))
+
+
+@receiver(post_save, sender=Category)
+def bump_category_book_versions(sender, instance, created, using, **kwargs):
+    if not created:
+        bump_versions(Book.objects.using(using).filter(category=instance))
+
+
+@receiver(pre_delete, sender=Category)
+def bump_versions_before_uncategorizing(sender, instance, using, **kwargs):
+    # SET_NULL runs as a bulk UPDATE without Book signals, in the same transaction
+    bump_versions(Book.objects.using(using).filter(category=instance))
+
+
+@receiver(post_save, sender=Publisher)
+def bump_publisher_book_versions(sender, instance, created, using, **kwargs):
+    if not created:
+        bump_versions(Book.objects.using(using).filter(publisher=instance))
+
+
+# --- Cache invalidation ---
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Category)
+@receiver(books_bulk_changed)
+def invalidate_book_results(sender, using, **kwargs):
+    # Anything that can change which books match a filter; deleting a category
+    # nulls Book.category_id with a bulk UPDATE that sends no Book signals.
+    invalidate('books', using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def invalidate_book_results_on_author_change(sender, action, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate('books', using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Publisher)
+def invalidate_reference_data(sender, using, **kwargs):
+    invalidate('reference', using=using)
+
+
+# --- Change log ---
+# Every save and delete is logged, plus the books whose listed data changes
+# with it: their authors, or the name of their author, category or publisher.
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=FavoriteBook)
+def log_saved(sender, instance, using, **kwargs):
+    changelog.record(sender, [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=FavoriteBook)
+def log_deleted(sender, instance, using, **kwargs):
+    changelog.record(sender, [instance.pk], ChangeLogEntry.DELETE, using=using)
+
+
+@receiver(books_bulk_changed)
+def log_bulk_changed_books(sender, book_ids, using, **kwargs):
+    changelog.record(Book, book_ids, using=using)
+
+
+@receiver(post_save, sender=Author)
+def log_author_books(sender, instance, created, using, **kwargs):
+    if not created:
+        changelog.record(Book, Book.objects.using(using).filter(authors=instance).values_list('pk', flat=True), using=using)
+
+
+@receiver(post_delete, sender=Author)
+def log_former_author_books(sender, instance, using, **kwargs):
+    changelog.record(Book, getattr(instance, '_indexed_book_ids', ()), using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def log_author_changes(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        book_ids = [instance.pk]
+    elif action == 'post_clear':
+        book_ids = getattr(instance, '_indexed_book_ids', ())
+    else:
+        book_ids = pk_set or ()
+    changelog.record(Book, book_ids, using=using)
+
+
+@receiver(post_save, sender=Category)
+def log_saved_category(sender, instance, created, using, **kwargs):
+    if created:
+        changelog.record(Category, [instance.pk], using=using)
+        return
+    # A move rewrites the path of the whole subtree with one UPDATE
+    changelog.record(Category, Category.objects.using(using).filter(instance.subtree_q()).values_list('pk', flat=True), using=using)
+    changelog.record(Book, Book.objects.using(using).filter(category=instance).values_list('pk', flat=True), using=using)
+
+
+@receiver(pre_delete, sender=Category)
+def log_category_dependents(sender, instance, using, **kwargs):
+    # Logged before the delete, in its transaction: afterwards SET_NULL has
+    # detached the books, and the descendants have new paths
+    low, high = subtree_bounds(instance.path)
+    descendants = Category.objects.using(using).filter(path__gt=low, path__lt=high)
+    changelog.record(Category, descendants.values_list('pk', flat=True), using=using)
+    changelog.record(Book, Book.objects.using(using).filter(category=instance).values_list('pk', flat=True), using=using)
+
+
+@receiver(post_save, sender=Publisher)
+def log_publisher_books(sender, instance, created, using, **kwargs):
+    if not created:
+        changelog.record(Book, Book.objects.using(using).filter(publisher=instance).values_list('pk', flat=True), using=using)
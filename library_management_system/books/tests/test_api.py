@@ -0,0 +1,93 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.models import Author, Book, Category, Publisher
+
+
+@override_settings(BOOKS_PAGE_SIZE=2)
+class CatalogueApiTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.publisher = Publisher.objects.create(name='Penguin')
+        self.category = Category.objects.create(name='Fiction')
+        self.child = Category.objects.create(name='Noir', parent_category=self.category)
+        self.author = Author.objects.create(full_name='Raymond Chandler')
+        self.books = []
+        for i, title in enumerate(['The Big Sleep', 'Farewell, My Lovely', 'The Long Goodbye', 'Playback', 'Poodle Springs']):
+            book = Book.objects.create(
+                title=title, isbn=f'{9780000000000 + i}', price=10 + i, publish_date=date(1939 + i, 1, 1),
+                availability_status='available' if i % 2 else 'unavailable', publisher=self.publisher,
+                category=self.child if i < 3 else self.category,
+            )
+            book.authors.add(self.author)
+            self.books.append(book)
+        self.client.force_login(self.member)
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(name, args=args), params)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        resp = self.get('api_book_list')
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn('detail', resp.json())
+
+    def test_book_list_follows_cursors_and_filters(self):
+        ids, url = [], reverse('api_book_list') + f'?category={self.category.pk}&subcategories=1&max_price=13'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            ids.extend(book['id'] for book in data['results'])
+            url = data['next']
+        expected = sorted((b for b in self.books if b.price <= 13), key=lambda b: (b.title, b.id))
+        self.assertEqual(ids, [b.id for b in expected])
+
+    def test_limit_param(self):
+        self.assertEqual(len(self.get('api_book_list', limit=4).json()['results']), 4)
+
+    def test_book_detail_by_id_and_isbn(self):
+        book = self.books[2]
+        by_id = self.get('api_book_detail', book.pk).json()
+        self.assertEqual(by_id, self.get('api_book_by_isbn', book.isbn).json())
+        self.assertEqual(by_id['authors'], [{'id': self.author.pk, 'full_name': 'Raymond Chandler'}])
+        self.assertEqual(by_id['category'], {'id': self.child.pk, 'name': 'Noir'})
+        self.assertEqual(self.get('api_book_by_isbn', '0000000000000').status_code, 404)
+
+    def test_reference_endpoints(self):
+        self.assertEqual([a['full_name'] for a in self.get('api_author_list', q='chandler').json()['results']], ['Raymond Chandler'])
+        self.assertEqual(self.get('api_author_detail', self.author.pk).json()['id'], self.author.pk)
+        categories = self.get('api_category_list').json()['results']
+        self.assertEqual([c['name'] for c in categories], ['Fiction', 'Noir'])
+        self.assertEqual(categories[1]['parent_id'], self.category.pk)
+        self.assertEqual(self.get('api_publisher_list').json()['results'][0]['name'], 'Penguin')
+        self.assertEqual(self.get('api_publisher_detail', self.publisher.pk).json()['name'], 'Penguin')
+
+    def test_if_none_match_returns_304_without_touching_books(self):
+        first = self.get('api_book_list')
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('api_book_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(any('books_' in query['sql'] for query in ctx.captured_queries), ctx.captured_queries)
+
+    def test_writes_change_the_etag(self):
+        etag = self.get('api_book_detail', self.books[0].pk)['ETag']
+        Book.objects.filter(pk=self.books[0].pk).first().save()
+        self.assertEqual(self.client.get(reverse('api_book_detail', args=[self.books[0].pk]), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.get('api_book_list')['ETag']
+        self.publisher.name = 'Penguin Classics'
+        self.publisher.save()
+        resp = self.client.get(reverse('api_book_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['results'][0]['publisher']['name'], 'Penguin Classics')
+        # Publisher changes do not invalidate authors
+        etag = self.get('api_author_list')['ETag']
+        Publisher.objects.create(name='Other')
+        self.assertEqual(self.client.get(reverse('api_author_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -0,0 +1,94 @@
+import csv
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from books import loadtest
+from books.models import Author, Book, Category, FavoriteBook, Publisher
+from library_management_system.asgi import application as asgi_application
+from library_management_system.wsgi import application as wsgi_application
+
+
+class AsyncViewsTest(TestCase):
+    """The catalogue read views served through the ASGI handler (``AsyncClient``)."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.admin = User.objects.create_user(username='adm', password='pass', full_name='Admin', role='admin')
+        self.publisher = Publisher.objects.create(name='Penguin')
+        self.category = Category.objects.create(name='Fiction')
+        self.author = Author.objects.create(full_name='Raymond Chandler')
+        self.books = []
+        for i, title in enumerate(['The Big Sleep', 'Farewell, My Lovely', 'Playback']):
+            book = Book.objects.create(
+                title=title, isbn=f'{9780000000000 + i}', price=10 + i, publish_date=date(1939 + i, 1, 1),
+                availability_status='available', publisher=self.publisher, category=self.category,
+            )
+            book.authors.add(self.author)
+            self.books.append(book)
+        FavoriteBook.objects.create(user=self.member, book=self.books[0])
+
+    async def test_book_list(self):
+        await self.async_client.aforce_login(self.member)
+        response = await self.async_client.get(reverse('book_list'), {'q': 'sleep'})
+        self.assertContains(response, 'The Big Sleep')
+        self.assertNotContains(response, 'Playback')
+        self.assertContains(response, 'Raymond Chandler')
+        self.assertContains(response, 'title="Remove from favorites"')
+
+    async def test_anonymous_user_is_redirected(self):
+        response = await self.async_client.get(reverse('book_list'))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_favorites_list(self):
+        await self.async_client.aforce_login(self.member)
+        response = await self.async_client.get(reverse('favorites_list'))
+        self.assertContains(response, 'The Big Sleep')
+        self.assertNotContains(response, 'Playback')
+
+    async def test_category_list_is_admin_only(self):
+        await self.async_client.aforce_login(self.member)
+        self.assertEqual((await self.async_client.get(reverse('category_list'))).status_code, 403)
+        await self.async_client.aforce_login(self.admin)
+        self.assertContains(await self.async_client.get(reverse('category_list')), 'Fiction')
+
+    async def test_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.member)
+        response = await self.async_client.get(reverse('book_export'), {'format': 'csv', 'title': 'farewell'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['title'] for row in rows], ['Farewell, My Lovely'])
+        self.assertEqual(rows[0]['authors'], 'Raymond Chandler')
+
+    async def test_api(self):
+        response = await self.async_client.get(reverse('api_book_list'))
+        self.assertEqual(response.status_code, 401)
+        await self.async_client.aforce_login(self.member)
+        response = await self.async_client.get(reverse('api_book_list'))
+        self.assertEqual([book['title'] for book in response.json()['results']],
+                         ['Farewell, My Lovely', 'Playback', 'The Big Sleep'])
+        again = await self.async_client.get(reverse('api_book_list'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+        missing = await self.async_client.get(reverse('api_book_detail', args=[0]))
+        self.assertEqual(missing.status_code, 404)
+
+
+class LoadTestSmokeTest(TransactionTestCase):
+    def test_both_servers_serve_the_targets(self):
+        member = get_user_model().objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        Book.objects.create(
+            title='The Big Sleep', isbn='9780000000001', price=10, publish_date=date(1939, 1, 1),
+            publisher=Publisher.objects.create(name='Penguin'),
+        )
+        cookies = loadtest.session_cookies({'member': member})
+        for target in loadtest.build_targets():
+            for server, application in (('asgi', asgi_application), ('wsgi', wsgi_application)):
+                with self.subTest(target=target.name, server=server):
+                    result = loadtest.RUNNERS[server](application, target, cookies[target.user], 4, 2)
+                    self.assertEqual(result['requests'], 4)
+                    self.assertEqual(result['errors'], 0)
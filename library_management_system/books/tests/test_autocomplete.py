@@ -0,0 +1,99 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.autocomplete import hot_prefixes, normalize, prefix_bounds, suggestions_queryset
+from books.caching import get_cache
+from books.models import Author, Book, Publisher
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        hot_prefixes.clear()
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.admin = User.objects.create_user(
+            username='adm', password='pass', full_name='Admin', role='admin', is_staff=True, is_superuser=True,
+        )
+        self.publisher = Publisher.objects.create(name='Penguin Books')
+        Publisher.objects.create(name='Pan Macmillan')
+        for name in ('Raymond Chandler', 'Ray Bradbury', 'rachel carson', 'Dashiell Hammett'):
+            Author.objects.create(full_name=name)
+        for i, title in enumerate(['The Big Sleep', 'The Long Goodbye', 'Fahrenheit 451']):
+            Book.objects.create(
+                title=title, isbn=f'{9780000000000 + i}', price=10, publish_date=date(1950, 1, 1),
+                publisher=self.publisher,
+            )
+        self.client.force_login(self.member)
+
+    def suggest(self, kind, q, **params):
+        response = self.client.get(reverse('api_autocomplete', args=[kind]), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [suggestion['label'] for suggestion in response.json()['results']]
+
+    def test_prefix_matches_ignore_case(self):
+        self.assertEqual(self.suggest('authors', 'RA'), ['rachel carson', 'Ray Bradbury', 'Raymond Chandler'])
+        self.assertEqual(self.suggest('authors', '  ray  '), ['Ray Bradbury', 'Raymond Chandler'])
+        self.assertEqual(self.suggest('authors', 'chandler'), [])
+        self.assertEqual(self.suggest('titles', 'the '), ['The Big Sleep', 'The Long Goodbye'])
+        self.assertEqual(self.suggest('publishers', 'p'), ['Pan Macmillan', 'Penguin Books'])
+
+    def test_limit_and_empty_prefix(self):
+        self.assertEqual(self.suggest('authors', 'ra', limit='1'), ['rachel carson'])
+        self.assertEqual(self.suggest('authors', 'ra', limit='x'), ['rachel carson', 'Ray Bradbury', 'Raymond Chandler'])
+        self.assertEqual(self.suggest('authors', ''), [])
+
+    def test_unknown_kind_and_anonymous(self):
+        self.assertEqual(self.client.get(reverse('api_autocomplete', args=['isbns']), {'q': '97'}).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_autocomplete', args=['authors']), {'q': 'ra'}).status_code, 401)
+
+    def test_hot_prefix_skips_the_database_until_a_write(self):
+        self.suggest('authors', 'ray')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.suggest('authors', 'ray'), ['Ray Bradbury', 'Raymond Chandler'])
+        # Only the session and user lookups
+        self.assertFalse([q for q in ctx.captured_queries if 'books_author' in q['sql']])
+        Author.objects.create(full_name='Ray Monk')
+        self.assertEqual(self.suggest('authors', 'ray'), ['Ray Bradbury', 'Ray Monk', 'Raymond Chandler'])
+
+        self.suggest('publishers', 'pe')
+        self.publisher.name = 'Vintage'
+        self.publisher.save()
+        self.assertEqual(self.suggest('publishers', 'pe'), [])
+
+    def test_bulk_created_rows_get_keys(self):
+        Author.objects.bulk_create([Author(full_name='Rex Stout')])
+        self.assertEqual(self.suggest('authors', 'rex'), ['Rex Stout'])
+
+    def test_admin_author_autocomplete_uses_prefix(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': 'ray', 'app_label': 'books', 'model_name': 'book', 'field_name': 'authors',
+        })
+        self.assertEqual([result['text'] for result in response.json()['results']], ['Ray Bradbury', 'Raymond Chandler'])
+
+    def test_helpers(self):
+        self.assertEqual(normalize(' Émile  ZOLA '), 'Émile zola')
+        self.assertEqual(prefix_bounds('ray'), ('ray', 'raz'))
+        self.assertEqual(prefix_bounds('a\U0010ffff\U0010ffff'), ('a\U0010ffff\U0010ffff', 'b'))
+        self.assertEqual(prefix_bounds('\U0010ffff'), ('\U0010ffff', None))
+        self.assertEqual(prefix_bounds('a\ud7ff'), ('a\ud7ff', 'a\ue000'))
+
+    def test_highest_code_point_prefix(self):
+        Author.objects.create(full_name='\U0010ffff Tail')
+        self.assertEqual(self.suggest('authors', '\U0010ffff'), ['\U0010ffff Tail'])
+        self.assertEqual(self.suggest('authors', 'r\U0010ffff'), [])
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_suggestions_are_an_index_seek(self):
+        for kind, index in (('authors', 'author_name_key_idx'), ('titles', 'book_title_key_idx'),
+                            ('publishers', 'publisher_name_key_idx')):
+            plan = suggestions_queryset(kind, 'ra', 10).explain()
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
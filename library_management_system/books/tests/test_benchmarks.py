@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from books import benchmarks
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_run_suite_reports_every_scenario(self):
+        report = benchmarks.run_suite([40], iterations=2, seed=1, only={'book_list', 'favorites_list', 'toggle_favorite'})
+        names = {result['scenario'] for result in report['results']}
+        self.assertEqual(names, {'book_list', 'favorites_list', 'toggle_favorite'})
+        for result in report['results']:
+            self.assertEqual(result['size'], 40)
+            self.assertIn(result['status'], (200, 302))
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': [
+            {'scenario': 'book_list', 'label': 'all', 'size': 10, 'p95_ms': 10.0, 'queries': 5, 'peak_kb': 100.0},
+            {'scenario': 'login_view', 'label': 'get', 'size': 10, 'p95_ms': 1.0, 'queries': 0, 'peak_kb': 50.0},
+        ]}
+        report = {'results': [
+            {'scenario': 'book_list', 'label': 'all', 'size': 10, 'p95_ms': 20.0, 'queries': 6, 'peak_kb': 100.0},
+            # Relative growth below the absolute noise floor is ignored
+            {'scenario': 'login_view', 'label': 'get', 'size': 10, 'p95_ms': 1.5, 'queries': 0, 'peak_kb': 50.0},
+        ]}
+        regressions = benchmarks.compare(report, baseline, threshold=0.25)
+        self.assertEqual([r['key'] for r in regressions], ['book_list[all]@10'])
+        self.assertEqual(len(regressions[0]['problems']), 2)
@@ -0,0 +1,109 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.bulk_edit import adjusted_price, update_books
+from books.caching import get_cache
+from books.filters import BookFilter
+from books.models import Author, Book, Category, ChangeLogEntry, Publisher
+from books.search import FTS_TABLE
+
+
+class BulkEditTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='adm', password='pass', full_name='Admin', role='admin')
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.penguin = Publisher.objects.create(name='Penguin')
+        self.vintage = Publisher.objects.create(name='Vintage')
+        self.fiction = Category.objects.create(name='Fiction')
+        self.noir = Category.objects.create(name='Noir', parent_category=self.fiction)
+        author = Author.objects.create(full_name='Raymond Chandler')
+        for i in range(6):
+            book = Book.objects.create(
+                title=f'Book {i}', isbn=f'{9780000000000 + i}', price=Decimal('10.00') + i, publish_date=date(2000, 1, 1),
+                availability_status='available', publisher=self.penguin if i < 4 else self.vintage, category=self.fiction,
+            )
+            book.authors.add(author)
+        self.client.force_login(self.admin)
+
+    def test_preview_shows_the_match_count(self):
+        response = self.client.get(reverse('bulk_edit_books'), {'title': 'Book 1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['match_count'], 1)
+        self.assertContains(response, 'Update 1 book')
+        self.assertContains(self.client.get(reverse('bulk_edit_books')), 'every book')
+
+    def test_updates_only_the_filtered_books(self):
+        book_filter = BookFilter({'min_price': '12'})
+        response = self.client.post(reverse('bulk_edit_books'), {
+            'min_price': '12', 'filter_key': book_filter.key,
+            'set-availability_status': 'unavailable', 'set-category': self.noir.pk, 'set-price_change_percent': '-15',
+        })
+        self.assertRedirects(response, reverse('book_list') + '?min_price=12', fetch_redirect_response=False)
+        changed = Book.objects.filter(price__lt=12, availability_status='unavailable', category=self.noir)
+        self.assertEqual(sorted(changed.values_list('title', flat=True)), ['Book 2', 'Book 3', 'Book 4'])
+        self.assertEqual(Book.objects.get(title='Book 2').price, Decimal('10.20'))
+        self.assertEqual(Book.objects.get(title='Book 5').price, Decimal('12.75'))
+        self.assertEqual(Book.objects.filter(availability_status='available').count(), 2)
+
+    def test_form_needs_a_change_and_a_sane_percentage(self):
+        response = self.client.post(reverse('bulk_edit_books'), {'title': 'Book 1'})
+        self.assertContains(response, 'Choose at least one change.')
+        response = self.client.post(reverse('bulk_edit_books'), {'set-price_change_percent': '-100'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('price_change_percent', response.context['form'].errors)
+        self.assertFalse(Book.objects.exclude(price__gte=10).exists())
+
+    def test_changed_filters_are_refused(self):
+        response = self.client.post(reverse('bulk_edit_books'), {
+            'title': 'Book 1', 'filter_key': BookFilter({}).key, 'set-availability_status': 'unavailable',
+        })
+        self.assertRedirects(response, reverse('book_list'), fetch_redirect_response=False)
+        self.assertFalse(Book.objects.filter(availability_status='unavailable').exists())
+
+    def test_admin_only(self):
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(reverse('bulk_edit_books')).status_code, 403)
+        response = self.client.post(reverse('bulk_edit_books'), {'set-availability_status': 'unavailable'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Book.objects.filter(availability_status='unavailable').exists())
+
+    def test_queries_per_chunk_not_per_book(self):
+        books = Book.objects.filter(publisher=self.penguin)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(update_books(books, {'availability_status': 'unavailable'}, chunk_size=2), 4)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(update_books(Book.objects.all(), {'availability_status': 'available'}, chunk_size=3), 6)
+        # Two full chunks and the empty read that ends the loop either way
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len([q for q in large.captured_queries if q['sql'].startswith('UPDATE "books_book" SET "availability_status"')]), 2)
+
+    @override_settings(BOOKS_BULK_UPDATE_CHUNK_SIZE=4)
+    def test_a_changed_filter_field_does_not_skip_books(self):
+        self.assertEqual(update_books(BookFilter({'availability': 'available'}).apply(), {'availability_status': 'unavailable'}), 6)
+        self.assertFalse(Book.objects.filter(availability_status='available').exists())
+
+    def test_versions_caches_and_change_log_follow(self):
+        book = Book.objects.get(title='Book 0')
+        start = ChangeLogEntry.objects.order_by('-seq').values_list('seq', flat=True).first()
+        response = self.client.get(reverse('book_list'), {'availability': 'unavailable'})
+        self.assertNotContains(response, 'Book 0')
+
+        with CaptureQueriesContext(connection) as ctx:
+            update_books(Book.objects.filter(pk=book.pk), {'availability_status': 'unavailable', 'price': adjusted_price(10)})
+        # Availability and price are not indexed text, so no reindex
+        self.assertFalse([q for q in ctx.captured_queries if FTS_TABLE in q['sql']])
+        book_after = Book.objects.get(pk=book.pk)
+        self.assertNotEqual(book_after.version, book.version)
+        self.assertEqual(book_after.price, Decimal('11.00'))
+        self.assertContains(self.client.get(reverse('book_list'), {'availability': 'unavailable'}), 'Book 0')
+        self.assertEqual(
+            list(ChangeLogEntry.objects.filter(seq__gt=start).values_list('model', 'object_id')), [('book', book.pk)],
+        )
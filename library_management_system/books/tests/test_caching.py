@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books import caching
+from books.models import Category, Publisher
+
+
+class ReferenceCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+        self.category = Category.objects.create(name='Fiction')
+        Publisher.objects.create(name='Penguin')
+
+    def test_hits_skip_the_database(self):
+        self.assertEqual([c.name for c in caching.get_categories()], ['Fiction'])
+        self.assertEqual([p.name for p in caching.get_publishers()], ['Penguin'])
+        with self.assertNumQueries(0):
+            self.assertEqual([c.name for c in caching.get_categories()], ['Fiction'])
+            self.assertEqual([p.name for p in caching.get_publishers()], ['Penguin'])
+        self.assertEqual(caching.stats()['caches']['categories'], {'hits': 1, 'misses': 1})
+
+    def test_writes_bump_the_version(self):
+        caching.get_categories()
+        caching.get_publishers()
+        Category.objects.create(name='Poetry')
+        self.assertEqual([c.name for c in caching.get_categories()], ['Fiction', 'Poetry'])
+        Publisher.objects.create(name='Bloomsbury')
+        self.assertEqual([p.name for p in caching.get_publishers()], ['Bloomsbury', 'Penguin'])
+        self.category.delete()
+        self.assertEqual([c.name for c in caching.get_categories()], ['Poetry'])
+        self.assertEqual(caching.stats()['caches']['categories']['misses'], 3)
+
+    def test_version_survives_eviction(self):
+        before = caching.get_version('reference')
+        cache.delete('books:version:reference')
+        self.assertNotEqual(caching.get_version('reference'), before)
+
+
+class ReferenceCacheViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(username='admin', password='pass', full_name='Admin', role='admin')
+        User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        Category.objects.create(name='Fiction')
+
+    def test_steady_state_listing_skips_category_query(self):
+        self.client.login(username='mem', password='pass')
+        self.client.get(reverse('book_list'))
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('book_list'))
+        self.assertContains(resp, 'Fiction')
+        self.assertFalse([q for q in ctx.captured_queries if 'books_category' in q['sql'] and 'books_book' not in q['sql']])
+
+    def test_book_form_dropdowns_come_from_the_cache(self):
+        Publisher.objects.create(name='Penguin')
+        self.client.login(username='admin', password='pass')
+        self.client.get(reverse('book_add'))
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('book_add'))
+        self.assertContains(resp, 'Penguin')
+        self.assertContains(resp, 'Fiction')
+        self.assertFalse([q for q in ctx.captured_queries if 'books_category' in q['sql'] or 'books_publisher' in q['sql']])
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.client.login(username='mem', password='pass')
+        self.assertEqual(self.client.get(reverse('cache_statistics')).status_code, 403)
+        self.client.login(username='admin', password='pass')
+        self.client.get(reverse('category_list'))
+        data = self.client.get(reverse('cache_statistics')).json()
+        self.assertIn('categories', data['caches'])
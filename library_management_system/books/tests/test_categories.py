@@ -0,0 +1,86 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from books.models import Book, Category, Publisher
+
+
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fiction = Category.objects.create(name='Fiction')
+        self.fantasy = Category.objects.create(name='Fantasy', parent_category=self.fiction)
+        self.epic = Category.objects.create(name='Epic', parent_category=self.fantasy)
+        self.science = Category.objects.create(name='Science')
+
+    def paths(self):
+        return dict(Category.objects.values_list('name', 'path'))
+
+    def test_paths_and_depths(self):
+        self.assertEqual(self.epic.path, f'{self.fiction.pk:08d}/{self.fantasy.pk:08d}/{self.epic.pk:08d}/')
+        self.assertEqual([c.depth for c in (self.fiction, self.fantasy, self.epic)], [0, 1, 2])
+        self.assertEqual(
+            list(Category.objects.filter(self.fiction.subtree_q()).order_by('path')),
+            [self.fiction, self.fantasy, self.epic],
+        )
+
+    def test_move_rewrites_subtree(self):
+        self.fantasy.parent_category = self.science
+        self.fantasy.save()
+        self.epic.refresh_from_db()
+        self.assertTrue(self.epic.path.startswith(self.science.path))
+        self.assertEqual(self.epic.depth, 2)
+        self.assertEqual(list(Category.objects.filter(self.fiction.subtree_q())), [self.fiction])
+
+    def test_cannot_move_under_own_subtree(self):
+        self.fiction.parent_category = self.epic
+        with self.assertRaises(ValidationError):
+            self.fiction.clean()
+        with self.assertRaises(ValueError):
+            self.fiction.save()
+
+    def test_delete_reroots_children(self):
+        self.fantasy.delete()
+        self.epic.refresh_from_db()
+        self.assertIsNone(self.epic.parent_category)
+        self.assertEqual((self.epic.path, self.epic.depth), (f'{self.epic.pk:08d}/', 0))
+
+
+class CategoryViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(username='admin', password='pass', full_name='Admin', role='admin')
+        self.fiction = Category.objects.create(name='Fiction')
+        self.fantasy = Category.objects.create(name='Fantasy', parent_category=self.fiction)
+        self.epic = Category.objects.create(name='Epic', parent_category=self.fantasy)
+        publisher = Publisher.objects.create(name='P1')
+        self.books = [
+            Book.objects.create(
+                title=category.name, isbn=f'{1000000000000 + i}', price=10, publish_date=date(2020, 1, 1),
+                availability_status='available', publisher=publisher, category=category,
+            )
+            for i, category in enumerate([self.fiction, self.fantasy, self.epic, Category.objects.create(name='Other')])
+        ]
+        self.client.login(username='admin', password='pass')
+
+    def test_subtree_filter(self):
+        resp = self.client.get(reverse('book_list'), {'category': self.fantasy.id, 'subcategories': '1'})
+        self.assertEqual(sorted(b.title for b in resp.context['books']), ['Epic', 'Fantasy'])
+        resp = self.client.get(reverse('book_list'), {'category': self.fantasy.id})
+        self.assertEqual([b.title for b in resp.context['books']], ['Fantasy'])
+
+    def test_tree_page_is_one_query_regardless_of_depth(self):
+        parent = self.epic
+        for i in range(10):
+            parent = Category.objects.create(name=f'Level {i}', parent_category=parent)
+        # Session + user, then a single category query
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('category_list'))
+        names = [c.name for c in resp.context['categories']]
+        self.assertEqual(names[:3], ['Fiction', 'Fantasy', 'Epic'])
+        self.assertContains(resp, 'Level 8</td>', html=False)
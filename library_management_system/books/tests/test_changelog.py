@@ -0,0 +1,146 @@
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from books.changelog import compact
+from books.importer import BookImporter
+from books.models import Author, Book, Category, ChangeLogEntry, FavoriteBook, Publisher
+
+
+class ChangeLogTest(TestCase):
+    def setUp(self):
+        self.member = get_user_model().objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.publisher = Publisher.objects.create(name='Penguin')
+        self.category = Category.objects.create(name='Fiction')
+        self.author = Author.objects.create(full_name='Raymond Chandler')
+        self.book = Book.objects.create(
+            title='The Big Sleep', isbn='9780000000001', price=10, publish_date=date(1939, 1, 1),
+            publisher=self.publisher, category=self.category,
+        )
+        self.book.authors.add(self.author)
+        self.start = self.last_seq()
+
+    def last_seq(self):
+        return ChangeLogEntry.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+    def changes(self):
+        return [(entry.model, entry.object_id, entry.action) for entry in ChangeLogEntry.objects.filter(seq__gt=self.start).order_by('seq')]
+
+    def test_saves_and_deletes_are_logged(self):
+        book_id = self.book.pk
+        self.book.title = 'Farewell, My Lovely'
+        self.book.save()
+        favorite = FavoriteBook.objects.create(user=self.member, book=self.book)
+        favorite_id = favorite.pk
+        favorite.delete()
+        self.book.delete()
+        self.assertEqual(self.changes(), [
+            ('book', book_id, 'upsert'),
+            ('favoritebook', favorite_id, 'upsert'),
+            ('favoritebook', favorite_id, 'delete'),
+            ('book', book_id, 'delete'),
+        ])
+
+    def test_author_changes_log_their_books(self):
+        other = Author.objects.create(full_name='Dashiell Hammett')
+        self.book.authors.add(other)
+        self.author.full_name = 'R. Chandler'
+        self.author.save()
+        self.assertEqual(self.changes(), [
+            ('author', other.pk, 'upsert'),
+            ('book', self.book.pk, 'upsert'),
+            ('author', self.author.pk, 'upsert'),
+            ('book', self.book.pk, 'upsert'),
+        ])
+
+    def test_reverse_clear_and_author_delete_log_the_books(self):
+        self.author.book_set.clear()
+        self.assertEqual(self.changes(), [('book', self.book.pk, 'upsert')])
+        self.book.authors.add(self.author)
+        self.start = self.last_seq()
+        author_id = self.author.pk
+        self.author.delete()
+        self.assertEqual(self.changes(), [('author', author_id, 'delete'), ('book', self.book.pk, 'upsert')])
+
+    def test_category_move_and_delete_log_the_subtree_and_books(self):
+        child = Category.objects.create(name='Noir', parent_category=self.category)
+        parent = Category.objects.create(name='Genres')
+        self.start = self.last_seq()
+        self.category.parent_category = parent
+        self.category.save()
+        self.assertEqual(sorted(self.changes()), sorted([
+            ('category', self.category.pk, 'upsert'), ('category', child.pk, 'upsert'), ('book', self.book.pk, 'upsert'),
+        ]))
+        self.start = self.last_seq()
+        category_id = self.category.pk
+        self.category.delete()
+        self.assertEqual(sorted(self.changes()), sorted([
+            ('category', child.pk, 'upsert'), ('book', self.book.pk, 'upsert'), ('category', category_id, 'delete'),
+        ]))
+
+    def test_publisher_rename_logs_its_books(self):
+        self.publisher.name = 'Vintage'
+        self.publisher.save()
+        self.assertEqual(self.changes(), [('publisher', self.publisher.pk, 'upsert'), ('book', self.book.pk, 'upsert')])
+
+    def test_bulk_import_is_logged(self):
+        BookImporter().run(io.StringIO(
+            'isbn,title,authors,category,publisher,price,publish_date\n'
+            '9780000000001,The Big Sleep (Reissue),Raymond Chandler,Fiction,Penguin,12.00,1939-01-01\n'
+        ))
+        self.assertIn(('book', self.book.pk, 'upsert'), self.changes())
+
+    def test_compaction_keeps_the_latest_entry_per_object(self):
+        for title in ('One', 'Two', 'Three'):
+            self.book.title = title
+            self.book.save()
+        other = Publisher.objects.create(name='Other')
+        other_id = other.pk
+        other.delete()
+        before = ChangeLogEntry.objects.count()
+        latest = {(entry.model, entry.object_id): entry.seq for entry in ChangeLogEntry.objects.order_by('seq')}
+
+        self.assertEqual(compact(chunk_size=2), before - len(latest))
+        remaining = {(entry.model, entry.object_id): entry.seq for entry in ChangeLogEntry.objects.all()}
+        self.assertEqual(remaining, latest)
+        self.assertEqual(ChangeLogEntry.objects.get(model='publisher', object_id=other_id).action, 'delete')
+        out = io.StringIO()
+        call_command('compact_changelog', stdout=out)
+        self.assertIn('Removed 0', out.getvalue())
+
+
+class ChangeFeedApiTest(TestCase):
+    def setUp(self):
+        self.member = get_user_model().objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        publisher = Publisher.objects.create(name='Penguin')
+        for i in range(5):
+            Book.objects.create(
+                title=f'Book {i}', isbn=f'{9780000000000 + i}', price=10, publish_date=date(2000, 1, 1), publisher=publisher,
+            )
+        self.client.force_login(self.member)
+
+    def test_consumer_syncs_in_pages(self):
+        seen, since = [], 0
+        url = reverse('api_changes')
+        params = {'since': since, 'limit': 2}
+        while url:
+            body = self.client.get(url, params).json()
+            seen += [(change['model'], change['id']) for change in body['results']]
+            since, url, params = body['last_seq'], body['next'], None
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(seen[0][0], 'publisher')
+
+        # Polling from the last seq returns only what changed since
+        Book.objects.filter(title='Book 3').delete()
+        body = self.client.get(reverse('api_changes'), {'since': since}).json()
+        self.assertEqual([(change['model'], change['action']) for change in body['results']], [('book', 'delete')])
+        self.assertIsNone(body['next'])
+
+    def test_bad_parameters_and_auth(self):
+        self.assertEqual(self.client.get(reverse('api_changes'), {'since': 'x'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_changes')).status_code, 401)
@@ -0,0 +1,124 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from library_management_system.db import apply_pragmas, configure_sqlite
+
+PRODUCTION = settings.SQLITE_PROFILES['production']['pragmas']
+ROLLBACK_JOURNAL = {**PRODUCTION, 'journal_mode': 'delete'}
+
+
+class PragmaHookTest(TransactionTestCase):
+    # Some pragmas cannot change inside a transaction, so no TestCase wrapping
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4000, 'temp_store': 'memory'})
+    def test_connection_created_hook_applies_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        self.addCleanup(lambda: apply_pragmas(connection.cursor(), {'cache_size': -2000, 'temp_store': 'default'}))
+        configure_sqlite(sender=type(connection), connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_rejects_unsafe_values(self):
+        with sqlite3.connect(':memory:') as db:
+            with self.assertRaises(ValueError):
+                apply_pragmas(db.cursor(), {'journal_mode': 'wal; DROP TABLE x'})
+            with self.assertRaises(ValueError):
+                apply_pragmas(db.cursor(), {'cache_size': '1; DROP TABLE x'})
+
+
+class ConcurrencyStressTest(SimpleTestCase):
+    """Readers against a writer on a real database file, under each journal mode."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'stress.sqlite3'
+
+    def connect(self, pragmas, busy_timeout=None):
+        db = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        pragmas = dict(pragmas)
+        if busy_timeout is not None:
+            pragmas['busy_timeout'] = busy_timeout
+        apply_pragmas(db.cursor(), pragmas)
+        return db
+
+    def create_table(self, pragmas):
+        with self.connect(pragmas) as db:
+            db.execute('CREATE TABLE favorite (id INTEGER PRIMARY KEY, book_id INTEGER)')
+            db.executemany('INSERT INTO favorite (book_id) VALUES (?)', [(i,) for i in range(1000)])
+
+    def read_during_exclusive_write(self, pragmas):
+        """Count rows from a reader while another connection holds an EXCLUSIVE write transaction."""
+        self.create_table(pragmas)
+        writer = self.connect(pragmas)
+        reader = self.connect(pragmas, busy_timeout=100)
+        try:
+            writer.execute('BEGIN EXCLUSIVE')
+            writer.execute('INSERT INTO favorite (book_id) VALUES (-1)')
+            return reader.execute('SELECT count(*) FROM favorite').fetchone()[0]
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+            reader.close()
+
+    def test_rollback_journal_blocks_readers(self):
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+            self.read_during_exclusive_write(ROLLBACK_JOURNAL)
+
+    def test_wal_readers_see_last_commit_while_writing(self):
+        self.assertEqual(self.read_during_exclusive_write(PRODUCTION), 1000)
+
+    def test_wal_readers_never_wait_for_busy_writer(self):
+        self.create_table(PRODUCTION)
+        stop = threading.Event()
+        errors, read_times, writes = [], [], []
+
+        def write():
+            db = self.connect(PRODUCTION)
+            try:
+                while not stop.is_set():
+                    db.execute('BEGIN IMMEDIATE')
+                    db.execute('INSERT INTO favorite (book_id) VALUES (1)')
+                    time.sleep(0.005)  # hold the write lock
+                    db.execute('COMMIT')
+                    writes.append(1)
+            finally:
+                db.close()
+
+        def read():
+            # No busy timeout: any blocking shows up as an error
+            db = self.connect(PRODUCTION, busy_timeout=0)
+            try:
+                for _ in range(200):
+                    started = time.perf_counter()
+                    try:
+                        db.execute('SELECT count(*), max(id) FROM favorite WHERE book_id >= 0').fetchone()
+                    except sqlite3.OperationalError as exc:
+                        errors.append(str(exc))
+                    read_times.append(time.perf_counter() - started)
+            finally:
+                db.close()
+
+        writer = threading.Thread(target=write)
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writer.start()
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        stop.set()
+        writer.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(writes), 0)
+        self.assertEqual(len(read_times), 800)
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.models import Author, Book, Category, Publisher
+
+CHUNK = 50
+
+
+@override_settings(BOOKS_EXPORT_CHUNK_SIZE=CHUNK)
+class BookExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        cls.publisher = Publisher.objects.create(name='P1')
+        cls.category = Category.objects.create(name='C1')
+        cls.authors = [Author.objects.create(full_name=f'Author {i}') for i in range(3)]
+        cls.add_books(0, 230)
+
+    @classmethod
+    def add_books(cls, start, count):
+        books = Book.objects.bulk_create([
+            Book(
+                title=f'Book {i:05d}', isbn=f'{1000000000000 + i}', price=10 + i % 40,
+                publish_date=date(2000, 1, 1), availability_status='available' if i % 2 else 'unavailable',
+                publisher=cls.publisher, category=cls.category,
+            )
+            for i in range(start, start + count)
+        ])
+        through = Book.authors.through
+        through.objects.bulk_create([
+            through(book_id=book.pk, author_id=cls.authors[n % 3].pk) for n, book in enumerate(books)
+        ])
+
+    def setUp(self):
+        self.client.login(username='mem', password='pass')
+
+    def export(self, **params):
+        resp = self.client.get(reverse('book_export'), params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        return resp
+
+    def test_csv_applies_book_list_filters(self):
+        resp = self.export(availability='available', max_price='20')
+        self.assertIn('attachment; filename="books.csv"', resp['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(resp.streaming_content).decode())))
+        expected = Book.objects.filter(availability_status='available', price__lte=20).order_by('pk')
+        self.assertEqual([int(row['id']) for row in rows], list(expected.values_list('pk', flat=True)))
+        self.assertTrue(all(row['authors'].startswith('Author ') for row in rows))
+
+    def test_jsonl_exports_every_row_once(self):
+        resp = self.export(format='jsonl')
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        ids = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(ids, sorted(Book.objects.values_list('pk', flat=True)))
+
+    def test_unknown_format_rejected(self):
+        self.assertEqual(self.client.get(reverse('book_export'), {'format': 'xml'}).status_code, 400)
+
+    def test_queries_bounded_per_chunk(self):
+        content = iter(self.export(format='jsonl').streaming_content)
+        per_chunk = []
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                chunk = next(content, None)
+            if chunk is None:
+                break
+            per_chunk.append(len(ctx))
+        self.assertEqual(len(per_chunk), 5)  # 230 rows in chunks of 50
+        # One keyset seek plus one author prefetch per chunk
+        self.assertLessEqual(max(per_chunk), 2, per_chunk)
+
+    def peak_memory(self):
+        resp = self.export()
+        tracemalloc.start()
+        try:
+            for _ in resp.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_row_count(self):
+        small = self.peak_memory()
+        self.add_books(230, 1000)
+        large = self.peak_memory()
+        # Over five times the rows, but the peak is still one chunk's worth
+        self.assertLess(large, small * 1.5, (small, large))
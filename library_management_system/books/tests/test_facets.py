@@ -0,0 +1,121 @@
+from datetime import date
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from books.facets import aget_facets
+from books.filters import BookFilter
+from books.models import Book, Category, Publisher
+
+
+class FacetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.publisher = Publisher.objects.create(name='P1')
+        self.fiction = Category.objects.create(name='Fiction')
+        self.poetry = Category.objects.create(name='Poetry')
+        for i, (category, status, price) in enumerate([
+            (self.fiction, 'available', 5),
+            (self.fiction, 'unavailable', 15),
+            (self.poetry, 'available', 30),
+            (None, 'available', 150),
+        ]):
+            Book.objects.create(
+                title=f'B{i}', isbn=f'{1000000000000 + i}', price=price, publish_date=date(2020, 1, 1),
+                availability_status=status, publisher=self.publisher, category=category,
+            )
+
+    def facets(self, query=''):
+        return async_to_sync(aget_facets)(BookFilter(QueryDict(query)))
+
+    def test_counts(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['category'], {self.fiction.id: 2, self.poetry.id: 1, None: 1})
+        self.assertEqual(facets['availability'], {'available': 3, 'unavailable': 1})
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [1, 1, 1, 0, 1])
+
+    def test_counts_follow_the_filter(self):
+        facets = self.facets('availability=available')
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['category'], {self.fiction.id: 1, self.poetry.id: 1, None: 1})
+
+    def test_a_facet_is_counted_without_its_own_filter(self):
+        facets = self.facets(f'category={self.fiction.id}&availability=available')
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(facets['category'], {self.fiction.id: 1, self.poetry.id: 1, None: 1})
+        self.assertEqual(facets['availability'], {'available': 1, 'unavailable': 1})
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [1, 0, 0, 0, 0])
+        facets = self.facets('min_price=10&max_price=24.99')
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [1, 1, 1, 0, 1])
+
+    def test_bucket_links_select_what_the_bucket_counts(self):
+        Book.objects.create(
+            title='B10', isbn='1000000000010', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=self.publisher,
+        )
+        for bucket in self.facets()['price']:
+            with self.subTest(bucket=bucket['label']):
+                query = QueryDict(mutable=True)
+                for name in ('min_price', 'max_price'):
+                    if bucket[name] is not None:
+                        query[name] = str(bucket[name])
+                self.assertEqual(BookFilter(query).apply().count(), bucket['count'])
+        self.assertEqual(self.facets()['price'][0]['max_price'], Decimal('9.99'))
+
+    def test_single_query_regardless_of_category_count(self):
+        for i in range(30):
+            category = Category.objects.create(name=f'Extra {i}')
+            Book.objects.create(
+                title=f'E{i}', isbn=f'{2000000000000 + i}', price=20, publish_date=date(2020, 1, 1),
+                availability_status='available', publisher=self.publisher, category=category,
+            )
+        with self.assertNumQueries(1):
+            facets = self.facets()
+        self.assertEqual(len(facets['category']), 33)
+
+    def test_cached_until_a_book_is_written(self):
+        self.facets('min_price=10')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.facets('min_price=10.00')['total'], 3)
+        book = Book.objects.get(title='B0')
+        book.price = 12
+        book.save()
+        # The filtered count, and the price buckets counted without the price filter
+        with self.assertNumQueries(2):
+            self.assertEqual(self.facets('min_price=10')['total'], 4)
+
+    def test_category_delete_invalidates(self):
+        self.facets()
+        self.poetry.delete()
+        self.assertEqual(self.facets()['category'], {self.fiction.id: 2, None: 2})
+
+    def test_category_move_invalidates_subtree_counts(self):
+        self.assertEqual(self.facets(f'category={self.fiction.id}&subcategories=1')['total'], 2)
+        self.poetry.parent_category = self.fiction
+        self.poetry.save()
+        self.assertEqual(self.facets(f'category={self.fiction.id}&subcategories=1')['total'], 3)
+
+
+class FacetViewTest(TestCase):
+    def test_listing_shows_counts(self):
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        category = Category.objects.create(name='Fiction')
+        Book.objects.create(
+            title='B1', isbn='1234567890123', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=Publisher.objects.create(name='P1'), category=category,
+        )
+        self.client.login(username='mem', password='pass')
+        resp = self.client.get(reverse('book_list'))
+        self.assertContains(resp, 'Fiction (1)')
+        self.assertContains(resp, 'Available (1)')
+        self.assertContains(resp, 'Unavailable (0)')
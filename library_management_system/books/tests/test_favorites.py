@@ -0,0 +1,177 @@
+import io
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from books.favorites import most_favorited, rebuild_weekly_counts, recount, trending, week_start
+from books.models import Book, FavoriteBook, Publisher, WeeklyFavoriteCount
+
+
+@override_settings(BOOKS_PAGE_SIZE=5)
+class FavoriteCountTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.other = User.objects.create_user(username='other', password='pass', full_name='Other', role='member')
+        publisher = Publisher.objects.create(name='P1')
+        self.books = [
+            Book.objects.create(
+                title=f'Book {i:02d}', isbn=f'{1000000000000 + i}', price=10, publish_date=date(2020, 1, 1),
+                availability_status='available', publisher=publisher,
+            )
+            for i in range(12)
+        ]
+        self.client.force_login(self.member)
+
+    def counts(self):
+        return dict(Book.objects.values_list('pk', 'favorites_count'))
+
+    def test_count_follows_favorites(self):
+        book = self.books[0]
+        FavoriteBook.objects.create(user=self.member, book=book)
+        FavoriteBook.objects.create(user=self.other, book=book)
+        self.assertEqual(self.counts()[book.pk], 2)
+        FavoriteBook.objects.filter(user=self.member).delete()
+        self.assertEqual(self.counts()[book.pk], 1)
+        # Cascades from a deleted user count too
+        self.other.delete()
+        self.assertEqual(self.counts()[book.pk], 0)
+
+    def test_recount_repairs_bulk_created_favorites(self):
+        FavoriteBook.objects.bulk_create([FavoriteBook(user=self.member, book=book) for book in self.books[:3]])
+        self.assertEqual(self.counts()[self.books[0].pk], 0)
+        self.assertEqual(recount(), 12)
+        self.assertEqual([self.counts()[book.pk] for book in self.books[:4]], [1, 1, 1, 0])
+
+    def test_membership_is_looked_up_for_the_page_only(self):
+        for book in self.books:
+            FavoriteBook.objects.create(user=self.member, book=book)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('book_list'))
+        page_ids = {book.id for book in resp.context['books']}
+        self.assertEqual(resp.context['favorite_ids'], page_ids)
+        favorite_queries = [q['sql'] for q in ctx.captured_queries if 'books_favoritebook' in q['sql']]
+        self.assertEqual(len(favorite_queries), 1)
+        self.assertIn(' IN (', favorite_queries[0])
+
+    def test_popular_sort(self):
+        for user, books in ((self.member, self.books[3:9]), (self.other, self.books[5:7])):
+            for book in books:
+                FavoriteBook.objects.create(user=user, book=book)
+        ids, url = [], reverse('book_list') + '?sort=popular'
+        while url:
+            resp = self.client.get(url)
+            ids.extend(book.id for book in resp.context['books'])
+            url = reverse('book_list') + '?' + resp.context['next_query'] if resp.context['next_query'] else None
+        counts = self.counts()
+        self.assertEqual(ids, sorted(counts, key=lambda pk: (-counts[pk], pk)))
+        self.assertEqual(ids[:2], [self.books[5].pk, self.books[6].pk])
+
+
+class FavoriteToggleJsonTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        other = User.objects.create_user(username='other', password='pass', full_name='Other', role='member')
+        self.book = Book.objects.create(
+            title='B1', isbn='1000000000000', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=Publisher.objects.create(name='P1'),
+        )
+        FavoriteBook.objects.create(user=other, book=self.book)
+        self.url = reverse('book_favorite_toggle_json', args=[self.book.pk])
+        self.client.force_login(self.member)
+
+    def test_toggle_returns_state_and_count(self):
+        resp = self.client.post(self.url)
+        self.assertEqual(resp.json(), {'book': self.book.pk, 'favorited': True, 'favorites_count': 2})
+        self.assertTrue(FavoriteBook.objects.filter(user=self.member, book=self.book).exists())
+        resp = self.client.post(self.url)
+        self.assertEqual(resp.json(), {'book': self.book.pk, 'favorited': False, 'favorites_count': 1})
+        self.assertFalse(FavoriteBook.objects.filter(user=self.member, book=self.book).exists())
+
+    def test_toggle_does_not_render_the_listing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url)
+        # No book rows are loaded, only the existence check and the count
+        self.assertFalse(any('"books_book"."title"' in q['sql'] for q in ctx.captured_queries))
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # Session and user, then the lookup, existence check, insert, count
+        # update, this week's counter (update, then insert on first use) and count read
+        self.assertLessEqual(len(statements), 9, statements)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.assertEqual(self.client.post(reverse('book_favorite_toggle_json', args=[999])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.post(self.url).status_code, 302)
+
+    def test_listing_links_to_json_toggle(self):
+        resp = self.client.get(reverse('book_list'))
+        self.assertContains(resp, f'data-favorite-url="{self.url}"')
+        self.assertContains(resp, '☆ 1')
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f'u{i}', password='pass', full_name=f'U{i}', role='member')
+            for i in range(3)
+        ]
+        publisher = Publisher.objects.create(name='P1')
+        self.books = [
+            Book.objects.create(
+                title=f'Book {i}', isbn=f'{1000000000000 + i}', price=10, publish_date=date(2020, 1, 1),
+                availability_status='available', publisher=publisher,
+            )
+            for i in range(4)
+        ]
+        self.client.force_login(self.users[0])
+
+    def favorite(self, user, book, when=None):
+        favorite = FavoriteBook.objects.create(user=user, book=book)
+        if when is not None:
+            # An old favorite: move it, and its counter, to the earlier week
+            FavoriteBook.objects.filter(pk=favorite.pk).update(created_at=when)
+            rebuild_weekly_counts()
+        return favorite
+
+    def test_weekly_counts_follow_favorites(self):
+        week = week_start()
+        first = self.favorite(self.users[0], self.books[0])
+        self.favorite(self.users[1], self.books[0])
+        self.assertEqual(WeeklyFavoriteCount.objects.get(book=self.books[0], week=week).count, 2)
+        first.delete()
+        self.assertEqual(WeeklyFavoriteCount.objects.get(book=self.books[0], week=week).count, 1)
+
+    def test_leaderboards(self):
+        last_month = timezone.now() - timedelta(days=30)
+        for user in self.users:
+            self.favorite(user, self.books[3], when=last_month)
+        for user in self.users[:2]:
+            self.favorite(user, self.books[1])
+        self.favorite(self.users[0], self.books[2])
+
+        self.assertEqual(trending(), [(self.books[1], 2), (self.books[2], 1)])
+        self.assertEqual(most_favorited(), [self.books[3], self.books[1], self.books[2]])
+        resp = self.client.get(reverse('popular_books'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['trending'][0], (self.books[1], 2))
+        self.assertEqual(list(resp.context['most_favorited'])[0], self.books[3])
+
+    def test_reconcile_repairs_drift(self):
+        self.favorite(self.users[0], self.books[0])
+        self.favorite(self.users[1], self.books[1])
+        Book.objects.update(favorites_count=7)
+        WeeklyFavoriteCount.objects.all().delete()
+        FavoriteBook.objects.bulk_create([FavoriteBook(user=self.users[2], book=self.books[1])])
+        call_command('reconcile_favorites', stdout=io.StringIO())
+        self.assertEqual(Book.objects.get(pk=self.books[1].pk).favorites_count, 2)
+        self.assertEqual(Book.objects.get(pk=self.books[2].pk).favorites_count, 0)
+        self.assertEqual(trending(), [(self.books[1], 2), (self.books[0], 1)])
@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from books.filters import BookFilter
+from books.models import Author, Book, Category, Publisher
+
+
+class BookFilterTest(TestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name='P1')
+        self.category = Category.objects.create(name='C1')
+        self.smith = Author.objects.create(full_name='Ann Smith')
+        self.smithers = Author.objects.create(full_name='Bob Smithers')
+        self.book = Book.objects.create(
+            title='Shared', isbn='1234567890123', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=publisher, category=self.category,
+        )
+        self.book.authors.add(self.smith, self.smithers)
+        self.other = Book.objects.create(
+            title='Other', isbn='1234567890124', price=30, publish_date=date(2021, 6, 1),
+            availability_status='unavailable', publisher=publisher,
+        )
+
+    def test_invalid_and_empty_values_are_dropped(self):
+        book_filter = BookFilter(QueryDict(
+            'title=&category=None&availability=maybe&min_price=abc&max_price=NaN&publish_date=2020-13-01'
+        ))
+        self.assertFalse(book_filter)
+        self.assertEqual(book_filter.key, '')
+
+    def test_out_of_range_prices_are_dropped(self):
+        book_filter = BookFilter(QueryDict('min_price=1e5000000&max_price=-1e7'))
+        self.assertFalse(book_filter)
+        self.assertEqual(BookFilter(QueryDict('max_price=999999.99')).key, 'max_price=999999.99')
+        get_user_model().objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.client.login(username='mem', password='pass')
+        self.assertEqual(self.client.get(reverse('book_list'), {'min_price': '1e5000000'}).status_code, 200)
+
+    def test_key_is_canonical(self):
+        a = BookFilter(QueryDict('title=%20Shared%20&min_price=5.0&category=1'))
+        b = BookFilter(QueryDict('category=1&min_price=5&title=Shared&cursor=xyz'))
+        self.assertEqual(a.key, b.key)
+        self.assertEqual(a.digest, b.digest)
+        self.assertNotEqual(a.key, BookFilter(QueryDict('category=2')).key)
+
+    def test_author_match_uses_exists_without_duplicates(self):
+        books = BookFilter(QueryDict('author=smith')).apply()
+        self.assertEqual(list(books), [self.book])
+        sql = str(books.query).upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_all_filters(self):
+        cases = {
+            f'category={self.category.id}': [self.book],
+            'availability=unavailable': [self.other],
+            'min_price=20': [self.other],
+            'max_price=20': [self.book],
+            'publish_date=2020-01-01': [self.book],
+            'start_date=2021-01-01': [self.other],
+            'end_date=2020-12-31': [self.book],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(list(BookFilter(QueryDict(query)).apply().order_by('id')), expected)
+
+
+@override_settings(BOOKS_JOB_RUNNER='inline')
+class BulkDeleteFilterTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='admin', password='pass', full_name='Admin', role='admin')
+        publisher = Publisher.objects.create(name='P1')
+        self.keep = Book.objects.create(
+            title='B1', isbn='1234567890123', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=publisher,
+        )
+        self.drop = Book.objects.create(
+            title='B1 again', isbn='1234567890124', price=10, publish_date=date(2020, 1, 2),
+            availability_status='available', publisher=publisher,
+        )
+        self.client.login(username='admin', password='pass')
+
+    def test_listing_and_delete_agree_on_publish_date(self):
+        resp = self.client.get(reverse('book_list'), {'title': 'B1', 'publish_date': '2020-01-02'})
+        self.assertEqual(list(resp.context['books']), [self.drop])
+        book_filter = resp.context['filter']
+        self.client.post(reverse('delete_filtered_books'), {**book_filter.params, 'filter_key': book_filter.key})
+        self.assertEqual(list(Book.objects.all()), [self.keep])
+
+    def test_mismatched_filter_key_deletes_nothing(self):
+        resp = self.client.post(reverse('delete_filtered_books'), {'title': 'B1', 'filter_key': 'title=B1+again'})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Book.objects.count(), 2)
@@ -0,0 +1,119 @@
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.caching import get_cache
+from books.importer import BookImporter
+from books.models import Author, Book, Category, Publisher
+
+
+class BookRowCacheTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.admin = User.objects.create_user(username='adm', password='pass', full_name='Admin', role='admin')
+        self.publisher = Publisher.objects.create(name='Penguin')
+        self.category = Category.objects.create(name='Fiction')
+        self.author = Author.objects.create(full_name='Raymond Chandler')
+        self.book = Book.objects.create(
+            title='The Big Sleep', isbn='9780000000001', price=10, publish_date=date(1939, 1, 1),
+            availability_status='available', publisher=self.publisher, category=self.category,
+        )
+        self.book.authors.add(self.author)
+        self.client.force_login(self.member)
+
+    def get_list(self):
+        return self.client.get(reverse('book_list'))
+
+    def row(self, response):
+        return response.context['books'].object_list[0].row_html
+
+    def test_cached_row_skips_authors_query(self):
+        first = self.get_list()
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get_list()
+        self.assertEqual(self.row(first), self.row(second))
+        self.assertIn('Raymond Chandler', self.row(second))
+        self.assertFalse([q for q in ctx.captured_queries if 'books_book_authors' in q['sql']])
+
+    def test_save_renders_a_new_row(self):
+        self.get_list()
+        version = self.book.version
+        self.book.title = 'Farewell, My Lovely'
+        self.book.save()
+        self.assertNotEqual(self.book.version, version)
+        self.assertContains(self.get_list(), 'Farewell, My Lovely')
+
+    def test_update_fields_save_renders_a_new_row(self):
+        self.get_list()
+        self.book.availability_status = 'unavailable'
+        self.book.save(update_fields=['availability_status'])
+        self.assertIn('unavailable', self.row(self.get_list()))
+
+    def test_author_changes_render_a_new_row(self):
+        self.get_list()
+        self.book.authors.add(Author.objects.create(full_name='Dashiell Hammett'))
+        self.assertIn('Dashiell Hammett', self.row(self.get_list()))
+        self.author.full_name = 'R. Chandler'
+        self.author.save()
+        self.assertIn('R. Chandler', self.row(self.get_list()))
+        self.author.book_set.clear()
+        self.assertNotIn('Chandler', self.row(self.get_list()))
+
+    def test_category_and_publisher_changes_render_a_new_row(self):
+        self.get_list()
+        self.category.name = 'Crime'
+        self.category.save()
+        self.publisher.name = 'Vintage'
+        self.publisher.save()
+        row = self.row(self.get_list())
+        self.assertIn('Crime', row)
+        self.assertIn('Vintage', row)
+        self.category.delete()
+        self.assertIn('<td>-</td>', self.row(self.get_list()))
+
+    def test_import_renders_a_new_row(self):
+        self.get_list()
+        BookImporter().run(io.StringIO(
+            'isbn,title,authors,category,publisher,price,publish_date\n'
+            '9780000000001,The Big Sleep (Reissue),Raymond Chandler,Fiction,Penguin,12.00,1939-01-01\n'
+        ))
+        self.assertIn('The Big Sleep (Reissue)', self.row(self.get_list()))
+
+    def test_reused_id_does_not_match_the_old_row(self):
+        self.get_list()
+        pk = self.book.pk
+        self.book.delete()
+        replacement = Book.objects.create(
+            pk=pk, title='Playback', isbn='9780000000002', price=10, publish_date=date(1958, 1, 1),
+            availability_status='available', publisher=self.publisher,
+        )
+        self.assertEqual(replacement.pk, pk)
+        self.assertIn('Playback', self.row(self.get_list()))
+
+    def test_per_user_controls_stay_outside_the_cached_row(self):
+        self.get_list()
+        self.client.post(reverse('book_favorite_toggle_json', args=[self.book.pk]))
+        response = self.get_list()
+        self.assertContains(response, 'title="Remove from favorites">★ 1</a>', html=False)
+        self.assertNotContains(response, reverse('book_edit', args=[self.book.pk]))
+
+        self.client.force_login(self.admin)
+        response = self.get_list()
+        self.assertContains(response, reverse('book_edit', args=[self.book.pk]))
+        self.assertContains(response, 'title="Add to favorites">☆ 1</a>', html=False)
+
+
+class TemplateLoaderTest(SimpleTestCase):
+    def test_templates_are_compiled_once_per_process(self):
+        loaders = engines['django'].engine.template_loaders
+        self.assertEqual(len(loaders), 1)
+        self.assertIsInstance(loaders[0], CachedLoader)
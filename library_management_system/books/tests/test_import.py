@@ -0,0 +1,118 @@
+import csv
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from books.importer import BookImporter
+from books.models import Author, Book, Category, Publisher
+from books.search import apply_search
+
+HEADER = 'isbn,title,authors,category,publisher,price,publish_date,availability_status\n'
+
+
+class BookImportTest(TestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name='Penguin Books')
+        self.author = Author.objects.create(full_name='George Orwell')
+        self.book = Book.objects.create(
+            title='Old title', isbn='9780000000001', price=5, publish_date=date(1949, 6, 8),
+            availability_status='unavailable', publisher=self.publisher,
+        )
+        self.book.authors.add(Author.objects.create(full_name='Wrong Author'))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_csv(self, body):
+        path = Path(self.tmp.name) / 'feed.csv'
+        path.write_text(HEADER + body, encoding='utf-8')
+        return path
+
+    def test_command_upserts_by_isbn_and_reports_bad_rows(self):
+        path = self.write_csv(
+            '9780000000001,Nineteen Eighty-Four,George Orwell,Fiction,Penguin Books,9.99,1949-06-08,available\n'
+            '9780000000002,Animal Farm,George Orwell; Ghost Writer,Fiction,Secker,7.50,1945-08-17,\n'
+            '12345,Bad ISBN,George Orwell,Fiction,Penguin Books,1,2000-01-01,available\n'
+            '9780000000003,Bad price,George Orwell,Fiction,Penguin Books,lots,2000-01-01,available\n'
+        )
+        out = io.StringIO()
+        call_command('import_books', str(path), batch_size=1, stdout=out)
+        self.assertIn('2 rows rejected', out.getvalue())
+        self.assertIn('1 created, 1 updated', out.getvalue())
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Nineteen Eighty-Four')
+        self.assertEqual(self.book.price, Decimal('9.99'))
+        self.assertEqual(self.book.category.name, 'Fiction')
+        # Author rows are replaced, not merged
+        self.assertEqual([a.full_name for a in self.book.authors.all()], ['George Orwell'])
+
+        farm = Book.objects.get(isbn='9780000000002')
+        self.assertEqual(farm.availability_status, 'available')
+        self.assertEqual(farm.publisher.name, 'Secker')
+        self.assertEqual(sorted(a.full_name for a in farm.authors.all()), ['George Orwell', 'Ghost Writer'])
+        self.assertEqual(Author.objects.filter(full_name='George Orwell').count(), 1)
+        self.assertEqual(Category.objects.filter(name='Fiction').count(), 1)
+        # Bulk writes still reach the search index
+        self.assertEqual(set(apply_search(Book.objects.all(), 'writer')), {farm})
+
+        with open(f'{path}.errors.csv', newline='') as errors:
+            rows = list(csv.DictReader(errors))
+        self.assertEqual([row['line'] for row in rows], ['4', '5'])
+        self.assertIn('ISBN must be 13 numeric characters.', rows[0]['error'])
+        self.assertTrue(rows[1]['error'].startswith('price:'))
+
+    def test_missing_column_rejected(self):
+        path = Path(self.tmp.name) / 'bad.csv'
+        path.write_text('isbn,title\n9780000000009,X\n')
+        with self.assertRaisesMessage(CommandError, 'publisher, price, publish_date'):
+            call_command('import_books', str(path), stdout=io.StringIO())
+
+    def test_partial_feed_leaves_absent_columns_alone(self):
+        category = Category.objects.create(name='Classics')
+        Book.objects.filter(pk=self.book.pk).update(category=category)
+        importer = BookImporter().run(io.StringIO(
+            'isbn,title,publisher,price,publish_date\n'
+            '9780000000001,Nineteen Eighty-Four,Penguin Books,9.99,1949-06-08\n'
+            '9780000000002,Animal Farm,Penguin Books,7.50,1945-08-17\n'
+        ))
+        self.assertEqual((importer.created, importer.updated, importer.error_count), (1, 1, 0))
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.title, self.book.price), ('Nineteen Eighty-Four', Decimal('9.99')))
+        self.assertEqual(self.book.category, category)
+        self.assertEqual(self.book.availability_status, 'unavailable')
+        self.assertEqual([a.full_name for a in self.book.authors.all()], ['Wrong Author'])
+        # New books still get the defaults
+        farm = Book.objects.get(isbn='9780000000002')
+        self.assertEqual((farm.availability_status, farm.category, farm.authors.count()), ('available', None, 0))
+
+    def test_export_round_trips(self):
+        self.client.force_login(get_user_model().objects.create_user(
+            username='mem', password='pass', full_name='Member', role='member',
+        ))
+        exported = b''.join(self.client.get(reverse('book_export')).streaming_content).decode()
+        Book.objects.filter(pk=self.book.pk).update(title='Changed')
+        importer = BookImporter().run(io.StringIO(exported))
+        self.assertEqual((importer.created, importer.updated, importer.error_count), (0, 1, 0))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Old title')
+
+    def test_admin_upload(self):
+        admin = get_user_model().objects.create_superuser(username='root', password='pass', full_name='Root')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('feed.csv', (
+            HEADER + '9780000000004,Burmese Days,George Orwell,,Penguin Books,8,1934-10-25,available\n'
+            'x,Broken,,,,,,\n'
+        ).encode())
+        resp = self.client.post(reverse('admin:books_book_import'), {'file': upload, 'batch_size': 100})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['importer'].created, 1)
+        self.assertEqual(resp.context['importer'].error_samples[0]['line'], 3)
+        self.assertTrue(Book.objects.filter(isbn='9780000000004', category=None).exists())
@@ -0,0 +1,133 @@
+import io
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from books import jobs
+from books.jobs import run_job
+from books.models import Author, Book, BulkDeleteJob, FavoriteBook, Publisher
+
+
+def make_books(publisher, author, titles):
+    books = []
+    for title in titles:
+        book = Book.objects.create(
+            title=title, isbn=f'{1000000000000 + Book.objects.count()}', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=publisher,
+        )
+        book.authors.add(author)
+        books.append(book)
+    return books
+
+
+@override_settings(BOOKS_JOB_RUNNER='inline', BOOKS_BULK_DELETE_CHUNK_SIZE=3)
+class BulkDeleteJobTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', password='pass', full_name='Admin', role='admin')
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        publisher = Publisher.objects.create(name='P1')
+        author = Author.objects.create(full_name='A1')
+        self.doomed = make_books(publisher, author, [f'Doomed {i}' for i in range(10)])
+        self.kept = make_books(publisher, author, ['Kept 1', 'Kept 2'])
+        for book in self.doomed[:4] + self.kept:
+            FavoriteBook.objects.create(user=self.member, book=book)
+        self.client.login(username='admin', password='pass')
+
+    def test_deletes_matching_books_in_chunks(self):
+        resp = self.client.post(reverse('delete_filtered_books'), {'title': 'doomed'})
+        self.assertEqual(resp.status_code, 302)
+        job = BulkDeleteJob.objects.get()
+        self.assertEqual((job.status, job.total, job.deleted), (BulkDeleteJob.DONE, 10, 10))
+        self.assertEqual(job.last_pk, self.doomed[-1].pk)
+        self.assertEqual(job.created_by, self.admin)
+        self.assertEqual(list(Book.objects.order_by('pk')), self.kept)
+        self.assertEqual(FavoriteBook.objects.count(), 2)
+        self.assertFalse(Book.authors.through.objects.filter(book_id__in=[b.pk for b in self.doomed]).exists())
+
+    def test_progress_endpoint(self):
+        self.client.post(reverse('delete_filtered_books'), {'title': 'doomed'})
+        job = BulkDeleteJob.objects.get()
+        data = self.client.get(reverse('bulk_delete_job', args=[job.pk])).json()
+        self.assertEqual(data['status'], 'done')
+        self.assertEqual(data['deleted'], 10)
+        self.assertEqual(data['progress'], 1.0)
+        self.client.login(username='mem', password='pass')
+        self.assertEqual(self.client.get(reverse('bulk_delete_job', args=[job.pk])).status_code, 403)
+
+    def test_resume_after_crash(self):
+        # A worker died after deleting the first four books
+        last_pk = self.doomed[3].pk
+        for book in self.doomed[:4]:
+            book.delete()
+        job = BulkDeleteJob.objects.create(
+            filter_key='title=doomed', status=BulkDeleteJob.RUNNING, total=10, deleted=4, last_pk=last_pk,
+        )
+        # Still heartbeating: left alone
+        out = io.StringIO()
+        call_command('resume_bulk_deletes', stdout=out)
+        self.assertIn('No bulk delete jobs', out.getvalue())
+
+        BulkDeleteJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=10))
+        call_command('resume_bulk_deletes', stdout=out)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted), (BulkDeleteJob.DONE, 10))
+        self.assertEqual(list(Book.objects.order_by('pk')), self.kept)
+
+    def test_failed_job_is_retried_from_its_last_chunk(self):
+        last_pk = self.doomed[3].pk
+        for book in self.doomed[:4]:
+            book.delete()
+        job = BulkDeleteJob.objects.create(
+            filter_key='title=doomed', status=BulkDeleteJob.FAILED, total=10, deleted=4, last_pk=last_pk,
+            error='OperationalError: database is locked',
+        )
+        out = io.StringIO()
+        call_command('resume_bulk_deletes', stdout=out)
+        self.assertIn('No bulk delete jobs', out.getvalue())
+        self.assertIsNone(run_job(job.pk))
+
+        call_command('resume_bulk_deletes', '--retry-failed', stdout=out)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted, job.error), (BulkDeleteJob.DONE, 10, ''))
+        self.assertEqual(list(Book.objects.order_by('pk')), self.kept)
+
+    def test_job_is_claimed_once(self):
+        job = BulkDeleteJob.objects.create(filter_key='title=doomed', status=BulkDeleteJob.RUNNING)
+        self.assertIsNone(run_job(job.pk))
+        self.assertEqual(Book.objects.count(), 12)
+
+
+@override_settings(BOOKS_JOB_RUNNER='thread', BOOKS_BULK_DELETE_CHUNK_SIZE=2)
+class BackgroundBulkDeleteTest(TransactionTestCase):
+    def test_request_returns_before_the_delete_runs(self):
+        admin = get_user_model().objects.create_user(username='admin', password='pass', full_name='Admin', role='admin')
+        make_books(Publisher.objects.create(name='P1'), Author.objects.create(full_name='A1'), ['X 1', 'X 2', 'X 3', 'Y'])
+        self.client.force_login(admin)
+        # Hold the runner until the response is in
+        release = threading.Event()
+        original_run_job = jobs.run_job
+
+        def blocked_run_job(job_id):
+            release.wait(timeout=10)
+            return original_run_job(job_id)
+
+        with mock.patch('books.jobs.run_job', blocked_run_job):
+            resp = self.client.post(reverse('delete_filtered_books'), {'title': 'x'})
+            self.assertEqual(resp.status_code, 302)
+            job = BulkDeleteJob.objects.get()
+            self.assertEqual(job.status, BulkDeleteJob.PENDING)
+            self.assertEqual(Book.objects.count(), 4)
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == f'bulk-delete-{job.pk}':
+                    thread.join(timeout=10)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted), (BulkDeleteJob.DONE, 3))
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Y'])
@@ -0,0 +1,110 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.models import Author, Book, Category, FavoriteBook, Publisher
+from books.pagination import KeysetPaginator
+
+
+@override_settings(BOOKS_PAGE_SIZE=5)
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        publisher = Publisher.objects.create(name='P1')
+        self.category = Category.objects.create(name='C1')
+        other = Category.objects.create(name='C2')
+        author = Author.objects.create(full_name='A1')
+        self.books = []
+        for i in range(23):
+            book = Book.objects.create(
+                # Duplicate titles make the id tie-breaker matter
+                title=f'Book {i // 2:02d}', isbn=f'{1000000000000 + i}', price=10 + i,
+                publish_date=date(2020, 1, 1), availability_status='available',
+                publisher=publisher, category=self.category if i % 3 else other,
+            )
+            book.authors.add(author)
+            self.books.append(book)
+        self.client.login(username='mem', password='pass')
+
+    def expected_order(self, books):
+        return [b.id for b in sorted(books, key=lambda b: (b.title, b.id))]
+
+    def walk(self, url, params=None):
+        """Follow next links from the first page, returning (ids, queries per page)."""
+        ids, query_counts = [], []
+        # Warm per-filter caches (facet counts) so every page is measured alike
+        self.client.get(url, params)
+        target = url
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(target, params)
+            self.assertEqual(resp.status_code, 200)
+            query_counts.append(len(ctx))
+            ids.extend(book.id for book in resp.context['books'])
+            next_query = resp.context['next_query']
+            if not next_query:
+                return ids, query_counts
+            target, params = url + '?' + next_query, None
+
+    def test_book_list_walks_every_row_once_in_order(self):
+        ids, _ = self.walk(reverse('book_list'))
+        self.assertEqual(ids, self.expected_order(self.books))
+
+    # Cached rows skip the authors query, which the warm-up request would give page 1 only
+    @override_settings(BOOKS_ROW_CACHE=False)
+    def test_book_list_query_count_constant_across_pages(self):
+        _, query_counts = self.walk(reverse('book_list'))
+        self.assertEqual(len(query_counts), 5)
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+    def test_next_link_preserves_filters(self):
+        params = {'category': str(self.category.id), 'min_price': '12'}
+        resp = self.client.get(reverse('book_list'), params)
+        next_query = resp.context['next_query']
+        self.assertIn(f'category={self.category.id}', next_query)
+        self.assertIn('min_price=12', next_query)
+        ids, _ = self.walk(reverse('book_list'), params)
+        matching = [b for b in self.books if b.category_id == self.category.id and b.price >= 12]
+        self.assertEqual(ids, self.expected_order(matching))
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(reverse('book_list'))
+        second = self.client.get(reverse('book_list') + '?' + first.context['next_query'])
+        back = self.client.get(reverse('book_list') + '?' + second.context['previous_query'])
+        self.assertEqual([b.id for b in back.context['books']], [b.id for b in first.context['books']])
+        self.assertIsNone(back.context['previous_query'])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        resp = self.client.get(reverse('book_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([b.id for b in resp.context['books']], self.expected_order(self.books)[:5])
+
+    def test_cursor_rejected_for_other_ordering(self):
+        paginator = KeysetPaginator(Book.objects.all(), ordering=('title', 'id'), per_page=5)
+        token = paginator.page().next_cursor
+        other = KeysetPaginator(Book.objects.all(), ordering=('-price', 'id'), per_page=5)
+        self.assertEqual(list(other.page(token)), list(other.page()))
+
+    def test_descending_ordering(self):
+        paginator = KeysetPaginator(Book.objects.all(), ordering=('-price', 'id'), per_page=4)
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(b.id for b in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [b.id for b in sorted(self.books, key=lambda b: (-b.price, b.id))])
+
+    def test_favorites_list_paginates_with_constant_queries(self):
+        for book in self.books[:12]:
+            FavoriteBook.objects.create(user=self.member, book=book)
+        ids, query_counts = self.walk(reverse('favorites_list'))
+        self.assertEqual(ids, self.expected_order(self.books[:12]))
+        self.assertEqual(len(query_counts), 3)
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
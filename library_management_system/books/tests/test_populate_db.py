@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from books import search
+from books.models import Author, Book, Category, Publisher
+
+
+class PopulateDbTest(TestCase):
+    def populate(self, **options):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('populate_db', stdout=out, **options)
+        return out.getvalue(), len(ctx)
+
+    def snapshot(self):
+        return list(Book.objects.order_by('isbn').values_list(
+            'isbn', 'title', 'price', 'publish_date', 'availability_status', 'publisher__name', 'category__name',
+        ))
+
+    def test_bulk_inserts_in_batches(self):
+        output, queries = self.populate(count=500, batch_size=100, seed=1, authors=25, categories=10, publishers=8)
+        self.assertEqual(Book.objects.count(), 500)
+        self.assertEqual(Author.objects.count(), 25)
+        self.assertEqual(Category.objects.count(), 10)
+        self.assertEqual(Publisher.objects.count(), 8)
+        self.assertEqual(Book.objects.filter(authors__isnull=True).count(), 0)
+        self.assertIn('rows/s', output)
+        # Per batch: a few statements (insert, through insert, index, savepoint), not per book
+        self.assertLess(queries, 150)
+
+    def test_same_seed_same_catalogue(self):
+        self.populate(count=60, batch_size=25, seed=42)
+        first = self.snapshot()
+        Book.objects.all().delete()
+        self.populate(count=60, batch_size=25, seed=42)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_new_books_are_searchable(self):
+        if not search.fts_available():
+            self.skipTest('SQLite FTS5 is not available')
+        self.populate(count=30, batch_size=10, seed=3)
+        expected = Book.objects.filter(authors__full_name='George Orwell').count()
+        self.assertGreater(expected, 0)
+        self.assertEqual(search.apply_search(Book.objects.all(), 'orwell').count(), expected)
@@ -0,0 +1,70 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from books.models import Category
+from library_management_system.middleware import RequestProfilingMiddleware
+
+PROFILING = {'ENABLED': True, 'SAMPLE_RATE': 1.0, 'SLOW_REQUEST_MS': 10_000, 'DUPLICATE_QUERY_THRESHOLD': 3}
+
+
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+
+    def test_disabled_middleware_removes_itself(self):
+        with override_settings(REQUEST_PROFILING={'ENABLED': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                RequestProfilingMiddleware(lambda request: HttpResponse())
+            self.client.login(username='mem', password='pass')
+            self.assertNotIn('Server-Timing', self.client.get(reverse('book_list')).headers)
+
+    @override_settings(REQUEST_PROFILING=PROFILING)
+    def test_server_timing_header(self):
+        self.client.login(username='mem', password='pass')
+        resp = self.client.get(reverse('book_list'))
+        timing = resp.headers['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertGreater(resp.wsgi_request.profile['template_ms'], 0)
+        self.assertGreater(resp.wsgi_request.profile['query_count'], 0)
+
+    @override_settings(REQUEST_PROFILING={**PROFILING, 'SAMPLE_RATE': 0.0})
+    def test_unsampled_requests_are_untouched(self):
+        self.client.login(username='mem', password='pass')
+        self.assertNotIn('Server-Timing', self.client.get(reverse('book_list')).headers)
+
+    @override_settings(REQUEST_PROFILING={**PROFILING, 'SLOW_REQUEST_MS': 0})
+    def test_duplicate_queries_and_slow_log(self):
+        def n_plus_one(request):
+            for _ in range(4):
+                list(Category.objects.filter(pk=1))
+            return HttpResponse()
+
+        middleware = RequestProfilingMiddleware(n_plus_one)
+        request = RequestFactory().get('/slow/?x=1')
+        with self.assertLogs('library_management_system.slow_requests', 'WARNING') as logs:
+            middleware(request)
+        self.assertEqual(request.profile['query_count'], 4)
+        self.assertEqual(request.profile['duplicates'][0]['count'], 4)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/slow/?x=1')
+        self.assertEqual(len(entry['queries']), 4)
+        self.assertIn('books_category', entry['queries'][0]['sql'])
+
+    @override_settings(REQUEST_PROFILING=PROFILING)
+    async def test_async_stack_is_profiled(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(RequestProfilingMiddleware(view).async_mode)
+        await self.async_client.alogin(username='mem', password='pass')
+        resp = await self.async_client.get(reverse('book_list'))
+        self.assertRegex(resp.headers['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertGreater(resp.asgi_request.profile['template_ms'], 0)
+        self.assertGreater(resp.asgi_request.profile['query_count'], 0)
@@ -0,0 +1,107 @@
+import re
+from datetime import date
+from itertools import combinations
+
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.test import TestCase, skipUnlessDBFeature
+
+from books.filters import BookFilter
+from books.models import Book, Category, Publisher, WeeklyFavoriteCount
+from books.pagination import KeysetPaginator
+
+# One representative value per book_list filter
+FILTER_VALUES = {
+    'title': 'harry',
+    'author': 'king',
+    'category': '1',
+    'subcategories': '1',
+    'availability': 'available',
+    'min_price': '10',
+    'max_price': '40',
+    'publish_date': '2000-01-01',
+    'start_date': '1990-01-01',
+    'end_date': '2010-12-31',
+}
+
+# Any plan line walking books_book or one of its indexes from the start
+FULL_SCAN = re.compile(r'\bSCAN books_book\b(?!_).*')
+
+# Expected exceptions. No index can serve these filters ahead of the (title,
+# id) ordering: title and author are substring matches, subcategories filters
+# on the joined category path, and for price and date ranges SQLite prefers
+# walking the ordering index and stopping at the page limit over a range
+# search plus a sort (unless the range is closed), with or without ANALYZE
+# statistics. A first page built only from them may read book_title_id_idx in
+# order, so that walk is the one scan allowed, and only there: cursor pages
+# must seek.
+ORDERED_WALK_FILTERS = {'title', 'author', 'subcategories', 'min_price', 'max_price', 'start_date', 'end_date'}
+ORDERED_WALK = 'SCAN books_book USING INDEX book_title_id_idx'
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class BookQueryPlanTest(TestCase):
+    """EXPLAIN QUERY PLAN for every filter combination book_list can issue."""
+
+    @classmethod
+    def setUpTestData(cls):
+        publisher = Publisher.objects.create(name='P1')
+        category = Category.objects.create(name='C1')
+        Category.objects.create(name='C1.1', parent_category=category)
+        cls.filter_values = {**FILTER_VALUES, 'category': str(category.id)}
+        Book.objects.create(
+            title='Seed', isbn='1234567890123', price=20, publish_date=date(2000, 1, 1),
+            availability_status='available', publisher=publisher, category=category,
+        )
+
+    def listing_queryset(self, params, cursor=False, ordering=('title', 'id')):
+        books = Book.objects.select_related('publisher', 'category')
+        books = BookFilter(QueryDict(params)).apply(books)
+        paginator = KeysetPaginator(books, ordering=ordering, per_page=25)
+        token = paginator.encode_cursor(Book.objects.get(), 'n') if cursor else None
+        queryset, _ = paginator.get_queryset(token)
+        return queryset[:26]
+
+    def assertNoFullScan(self, params, cursor=False):
+        plan = self.listing_queryset(params, cursor).explain()
+        scans = [match.group().strip() for match in FULL_SCAN.finditer(plan)]
+        names = set(QueryDict(params))
+        allowed = ([], [ORDERED_WALK]) if not cursor and names <= ORDERED_WALK_FILTERS else ([],)
+        self.assertIn(scans, allowed, f'{params or "(no filters)"} scans books_book:\n{plan}')
+
+    def combinations(self, max_size=3):
+        names = sorted(self.filter_values)
+        for size in range(0, max_size + 1):
+            for combo in combinations(names, size):
+                yield '&'.join(f'{name}={self.filter_values[name]}' for name in combo)
+
+    def test_no_filter_combination_scans_the_book_table(self):
+        for params in self.combinations():
+            with self.subTest(params=params):
+                self.assertNoFullScan(params)
+
+    def test_later_pages_do_not_scan_the_book_table(self):
+        for params in self.combinations(max_size=2):
+            with self.subTest(params=params):
+                self.assertNoFullScan(params, cursor=True)
+
+    def test_popularity_sort_reads_the_index_in_order(self):
+        for cursor in (False, True):
+            with self.subTest(cursor=cursor):
+                plan = self.listing_queryset('', cursor, ordering=('-favorites_count', 'id')).explain()
+                scans = [match.group().strip() for match in FULL_SCAN.finditer(plan)]
+                # The first page is an ordered walk stopped by the limit; later ones seek
+                self.assertEqual(scans, [] if cursor else ['SCAN books_book USING INDEX book_popularity_idx'], plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_trending_is_an_index_read(self):
+        plan = WeeklyFavoriteCount.objects.filter(week=date(2020, 1, 6), count__gt=0).order_by('-count', 'book_id')[:10].explain()
+        self.assertIn('weekly_favorite_top_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_detector_flags_a_full_scan(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plan text is SQLite specific')
+        plan = Book.objects.filter(price__gt=F('id')).explain()
+        self.assertIsNotNone(FULL_SCAN.search(plan), plan)
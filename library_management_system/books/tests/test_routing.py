@@ -0,0 +1,145 @@
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from books.models import Book, Category, Publisher
+from library_management_system.routers import PIN_COOKIE, ReplicaRouter, reads_from
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    The primary is the usual test database; the replica is a second SQLite
+    file that only sees what ``sync_replica`` copies over, so anything
+    written after the last sync shows which database a view read from.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Registered here rather than in settings or a class attribute, so
+        # the test runner never creates a test database for the alias
+        cls.tmp = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            **connections.settings['default'],
+            'NAME': str(Path(cls.tmp.name) / 'replica.sqlite3'),
+            'OPTIONS': {},
+        }
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.tmp.cleanup()
+
+    def sync_replica(self):
+        primary, replica = connections['default'], connections['replica']
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def setUp(self):
+        User = get_user_model()
+        self.member = User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        self.admin = User.objects.create_user(username='adm', password='pass', full_name='Admin', role='admin')
+        self.publisher = Publisher.objects.create(name='Penguin')
+        self.replicated = self.create_book('Replicated Book', 0)
+        self.sync_replica()
+        # Not copied yet: as if replication were lagging behind
+        self.unreplicated = self.create_book('Unreplicated Book', 1)
+        self.client.force_login(self.member)
+
+    def create_book(self, title, number):
+        return Book.objects.create(
+            title=title, isbn=f'{9780000000000 + number}', price=10, publish_date=date(2020, 1, 1),
+            publisher=self.publisher,
+        )
+
+    def test_book_list_reads_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('book_list'))
+        self.assertContains(response, 'Replicated Book')
+        self.assertNotContains(response, 'Unreplicated Book')
+        self.assertTrue(replica_queries.captured_queries)
+
+        self.sync_replica()
+        self.assertContains(self.client.get(reverse('book_list')), 'Unreplicated Book')
+
+    def test_write_pins_reads_to_primary(self):
+        response = self.client.post(reverse('book_favorite_toggle_json', args=[self.unreplicated.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+        # The favorite and the lagging book are both visible to the writer
+        response = self.client.get(reverse('favorites_list'))
+        self.assertContains(response, 'Unreplicated Book')
+
+    def test_get_toggle_pins_reads_to_primary(self):
+        response = self.client.get(reverse('book_favorite_toggle', args=[self.replicated.pk]))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_unpinned_user_reads_stale_favorites(self):
+        self.client.post(reverse('book_favorite_toggle_json', args=[self.replicated.pk]))
+        self.client.cookies.pop(PIN_COOKIE)
+        self.assertNotContains(self.client.get(reverse('favorites_list')), 'Replicated Book')
+
+    def test_export_streams_from_replica(self):
+        response = self.client.get(reverse('book_export'), {'format': 'jsonl'})
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Replicated Book', content)
+        self.assertNotIn('Unreplicated Book', content)
+
+    def test_etagged_api_reads_from_primary(self):
+        # Cached under the newest ETag, a replica's stale body would be answered 304 until the next write
+        response = self.client.get(reverse('api_book_list'))
+        self.assertTrue(response.has_header('ETag'))
+        self.assertEqual([book['title'] for book in response.json()['results']], ['Replicated Book', 'Unreplicated Book'])
+
+    def test_change_feed_reads_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('api_changes'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertTrue([q for q in replica_queries.captured_queries if 'books_changelogentry' in q['sql']])
+
+    def test_cached_reference_data_loads_from_primary(self):
+        # A replica-loaded cache entry would stay stale until the next category write
+        Category.objects.create(name='Unreplicated Category')
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get(reverse('category_list')), 'Unreplicated Category')
+
+    def test_views_that_write_read_from_primary(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('book_edit', args=[self.unreplicated.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_go_to_primary_for_replica_instances(self):
+        book = Book.objects.using('replica').get(pk=self.replicated.pk)
+        book.title = 'Renamed'
+        book.save()
+        self.assertEqual(Book.objects.using('default').get(pk=book.pk).title, 'Renamed')
+        self.assertEqual(Book.objects.using('replica').get(pk=book.pk).title, 'Replicated Book')
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Book))
+        with reads_from('replica'):
+            self.assertEqual(router.db_for_read(Book), 'replica')
+            self.assertEqual(router.db_for_write(Book), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'books'))
+        self.assertIsNone(router.allow_migrate('default', 'books'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_falls_back_to_primary_without_replicas(self):
+        self.assertContains(self.client.get(reverse('book_list')), 'Unreplicated Book')
+        response = self.client.post(reverse('book_favorite_toggle_json', args=[self.replicated.pk]))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
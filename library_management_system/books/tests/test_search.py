@@ -0,0 +1,122 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from books import search
+from books.models import Author, Book, Category, Publisher
+from books.pagination import KeysetPaginator
+
+
+def indexed(book_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT title, authors FROM {search.FTS_TABLE} WHERE rowid = %s', [book_id])
+        return cursor.fetchone()
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        if not search.fts_available():
+            self.skipTest('SQLite FTS5 is not available')
+        self.publisher = Publisher.objects.create(name='P1')
+        self.category = Category.objects.create(name='C1')
+        self.orwell = Author.objects.create(full_name='George Orwell')
+        self.king = Author.objects.create(full_name='Stephen King')
+        self.book = self.make_book('Animal Farm', '1234567890123')
+        self.book.authors.add(self.orwell)
+
+    def make_book(self, title, isbn):
+        return Book.objects.create(
+            title=title, isbn=isbn, price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=self.publisher, category=self.category,
+        )
+
+    def test_book_save_and_author_changes_are_indexed(self):
+        self.assertEqual(indexed(self.book.id), ('Animal Farm', 'George Orwell'))
+        self.book.title = 'Nineteen Eighty-Four'
+        self.book.save()
+        self.assertEqual(indexed(self.book.id)[0], 'Nineteen Eighty-Four')
+        self.book.authors.add(self.king)
+        self.assertIn('Stephen King', indexed(self.book.id)[1])
+        self.book.authors.remove(self.orwell)
+        self.assertEqual(indexed(self.book.id)[1], 'Stephen King')
+        self.book.authors.clear()
+        self.assertEqual(indexed(self.book.id)[1], '')
+
+    def test_reverse_m2m_and_author_rename(self):
+        self.king.book_set.add(self.book)
+        self.assertIn('Stephen King', indexed(self.book.id)[1])
+        self.orwell.full_name = 'Eric Blair'
+        self.orwell.save()
+        self.assertIn('Eric Blair', indexed(self.book.id)[1])
+        self.king.book_set.clear()
+        self.assertEqual(indexed(self.book.id)[1], 'Eric Blair')
+
+    def test_deletes_are_removed(self):
+        self.orwell.delete()
+        self.assertEqual(indexed(self.book.id)[1], '')
+        self.book.delete()
+        self.assertIsNone(indexed(self.book.id))
+
+    def test_search_matches_prefixes_and_ranks(self):
+        other = self.make_book('Farm Farm Farm', '1234567890124')
+        found = search.apply_search(Book.objects.all(), 'far')
+        self.assertEqual(set(found), {self.book, other})
+        ranked, is_ranked = search.annotate_rank(found, 'farm')
+        self.assertTrue(is_ranked)
+        self.assertEqual(list(ranked.order_by('search_rank', 'id'))[0], other)
+        self.assertEqual(list(search.apply_search(Book.objects.all(), 'orwell')), [self.book])
+
+    def test_ranked_listing_matches_once(self):
+        other = self.make_book('Farm Farm Farm', '1234567890124')
+        ranked, _ = search.annotate_rank(search.apply_search(Book.objects.all(), 'farm'), 'farm')
+        paginator = KeysetPaginator(ranked, ordering=('search_rank', 'id'), per_page=1)
+        first = paginator.page()
+        self.assertEqual(list(first), [other])
+        cursor = first.next_cursor
+        self.assertEqual(list(paginator.page(cursor)), [self.book])
+        # The rank comes from the joined index, not a MATCH rerun per book
+        for queryset in (ranked.order_by('search_rank', 'id'), paginator.get_queryset(cursor)[0]):
+            self.assertNotIn('CORRELATED', queryset.explain())
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 1 books', out.getvalue())
+        self.assertEqual(indexed(self.book.id), ('Animal Farm', 'George Orwell'))
+
+
+class SearchViewTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='mem', password='pass', full_name='Member', role='member')
+        publisher = Publisher.objects.create(name='P1')
+        author = Author.objects.create(full_name='Agatha Christie')
+        self.match = Book.objects.create(
+            title='Death on the Nile', isbn='1234567890123', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=publisher,
+        )
+        self.match.authors.add(author)
+        Book.objects.create(
+            title='Foundation', isbn='1234567890124', price=10, publish_date=date(2020, 1, 1),
+            availability_status='available', publisher=publisher,
+        )
+        self.client.login(username='mem', password='pass')
+
+    def test_ranked_search_mode(self):
+        resp = self.client.get(reverse('book_list'), {'q': 'christie'})
+        self.assertEqual(list(resp.context['books']), [self.match])
+
+    def test_falls_back_without_fts(self):
+        with mock.patch('books.search.fts_available', return_value=False):
+            resp = self.client.get(reverse('book_list'), {'q': 'christie'})
+            self.assertEqual(list(resp.context['books']), [self.match])
+            resp = self.client.get(reverse('book_list'), {'q': 'nile'})
+            self.assertEqual(list(resp.context['books']), [self.match])
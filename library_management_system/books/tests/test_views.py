@@ -1,10 +1,11 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from books.models import Book, Author, Category, Publisher, FavoriteBook
 from datetime import date
 
 
+@override_settings(BOOKS_JOB_RUNNER='inline')
 class BookViewsTest(TestCase):
     def setUp(self):
         User = get_user_model()
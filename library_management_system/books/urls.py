@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.book_list, name='home'),                  # Home page: book list
@@ -8,9 +8,27 @@ urlpatterns = [
     path('books/<int:pk>/edit/', views.book_edit, name='book_edit'),
     path('books/<int:pk>/delete/', views.book_delete, name='book_delete'),
     path('books/delete-filtered/', views.delete_filtered_books, name='delete_filtered_books'),
+    path('books/bulk-edit/', views.bulk_edit_books, name='bulk_edit_books'),
+    path('books/delete-jobs/<int:pk>/', views.bulk_delete_job, name='bulk_delete_job'),
+    path('books/export/', views.export_books, name='book_export'),
     path('books/<int:pk>/favorite-toggle/', views.toggle_favorite, name='book_favorite_toggle'),
+    path('books/<int:pk>/favorite/', views.toggle_favorite_json, name='book_favorite_toggle_json'),
     path('books/favorites/', views.favorites_list, name='favorites_list'),
+    path('books/popular/', views.popular_books, name='popular_books'),
     path('categories/', views.category_list, name='category_list'),
     path('categories/add/', views.category_create, name='category_add'),
     path('categories/<int:pk>/delete/', views.category_delete, name='category_delete'),
+    path('cache-stats/', views.cache_statistics, name='cache_statistics'),
+    # Read-only JSON API
+    path('api/books/', api.book_list, name='api_book_list'),
+    path('api/books/<int:pk>/', api.book_detail, name='api_book_detail'),
+    path('api/books/isbn/<str:isbn>/', api.book_by_isbn, name='api_book_by_isbn'),
+    path('api/authors/', api.author_list, name='api_author_list'),
+    path('api/authors/<int:pk>/', api.author_detail, name='api_author_detail'),
+    path('api/categories/', api.category_list, name='api_category_list'),
+    path('api/categories/<int:pk>/', api.category_detail, name='api_category_detail'),
+    path('api/publishers/', api.publisher_list, name='api_publisher_list'),
+    path('api/publishers/<int:pk>/', api.publisher_detail, name='api_publisher_detail'),
+    path('api/autocomplete/<str:kind>/', api.autocomplete, name='api_autocomplete'),
+    path('api/changes/', api.changes, name='api_changes'),
 ]
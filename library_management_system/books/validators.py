@@ -0,0 +1,9 @@
+from django.core.exceptions import ValidationError
+
+
+def clean_isbn(value):
+    """The normalized ISBN, or ValidationError unless it is 13 digits."""
+    isbn = (value or '').strip()
+    if len(isbn) != 13 or not isbn.isdigit():
+        raise ValidationError('ISBN must be 13 numeric characters.')
+    return isbn
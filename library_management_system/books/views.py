@@ -1,106 +1,158 @@
+from django.http import Http404, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
 from django.urls import reverse
-from .forms import BookForm
-from .models import Book, Category, FavoriteBook
-
-@login_required
-def book_list(request):
-    books = Book.objects.all().select_related('publisher', 'category').prefetch_related('authors')
-    categories = Category.objects.all()
-
-    title_query = request.GET.get('title', '').strip()
-    author_query = request.GET.get('author', '').strip()
-    category_id = request.GET.get('category')
-    availability = request.GET.get('availability')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    publish_date = request.GET.get('publish_date')
-
-    # Normalize 'None' and empty strings to None
-    if category_id in (None, '', 'None'):
-        category_id = None
-    if availability not in ['available', 'unavailable']:
-        availability = None
-    if min_price in (None, '', 'None'):
-        min_price = None
-    if max_price in (None, '', 'None'):
-        max_price = None
-    if publish_date in (None, '', 'None'):
-        publish_date = None
-
-    # Title search
-    if title_query:
-        books = books.filter(title__icontains=title_query)
-
-    # Author search
-    if author_query:
-        # Using filter with ManyToManyField
-        books = books.filter(authors__full_name__icontains=author_query).distinct()
-
-    # Category filter
-    if category_id and str(category_id).isdigit():
-        books = books.filter(category_id=int(category_id))
-
-    # Availability filter
-    if availability:
-        books = books.filter(availability_status=availability)
-
-    # Price filter
-    if min_price is not None:
-        try:
-            float(min_price)
-            books = books.filter(price__gte=min_price)
-        except (TypeError, ValueError):
-            pass
-    if max_price is not None:
-        try:
-            float(max_price)
-            books = books.filter(price__lte=max_price)
-        except (TypeError, ValueError):
-            pass
-
-    # Publish date (exact)
-    if publish_date:
-        books = books.filter(publish_date=publish_date)
-
-    # Disable pagination: show all (requested)
-    books = books.order_by('title')
-
-    # Favorite ids for current user to color buttons
-    favorite_ids = set()
-    if request.user.is_authenticated:
-        favorite_ids = set(FavoriteBook.objects.filter(user=request.user).values_list('book_id', flat=True))
+from django.views.decorators.http import require_POST
+from . import favorites
+from .bulk_edit import update_books
+from .forms import BookForm, BulkEditForm
+from .models import Book, BulkDeleteJob, Category
+from .pagination import KeysetPaginator, cursor_querystring
+from .caching import aget_categories, get_categories, stats as cache_stats
+from .export import ASYNC_STREAMERS, EXPORT_FORMATS, STREAMERS
+from .facets import aget_facets
+from .filters import BookFilter
+from .fragments import aattach_rows
+from .jobs import start_job
+from .search import annotate_rank
+from library_management_system.routers import pin_to_primary, replica_reads
 
+SORT_CHOICES = ('popular',)
+LEADERBOARD_SIZE = 10
+
+
+def _page_links(request, page):
+    # Next/previous query strings keep every active filter and only swap the cursor
+    return {
+        'next_query': cursor_querystring(request.GET, page.next_cursor) if page.has_next() else None,
+        'previous_query': cursor_querystring(request.GET, page.previous_cursor) if page.has_previous() else None,
+    }
+
+
+async def arender(request, template_name, context):
+    """``render`` for async views, whose context must be fully loaded: a lazy query in a template fails."""
+    # Context processors read request.user, which would load the user synchronously
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
+
+# The catalogue read views are async: under ASGI they run on the event loop
+# with the async ORM instead of a worker thread per request.
+
+@login_required
+@replica_reads
+async def book_list(request):
+    # Authors are loaded by aattach_rows, and only for rows not cached yet
+    books = Book.objects.all().select_related('publisher', 'category')
+    categories = await aget_categories()
+
+    # Parse and normalize every filter once; invalid values are dropped
+    book_filter = BookFilter(request.GET)
+    books = await book_filter.aapply(books)
+
+    # Ranked search orders by relevance, everything else by title, unless
+    # popularity is asked for (denormalized count, no COUNT join)
+    ordering = ('title', 'id')
+    search_query = book_filter.get('q', '')
+    sort = request.GET.get('sort') if request.GET.get('sort') in SORT_CHOICES else ''
+    if sort == 'popular':
+        ordering = ('-favorites_count', 'id')
+    elif search_query:
+        books, ranked = annotate_rank(books, search_query)
+        if ranked:
+            ordering = ('search_rank', 'id')
+
+    # Keyset pagination: every page is a single indexed seek
+    page = await KeysetPaginator(books, ordering=ordering).apage(request.GET.get('cursor'))
+    await aattach_rows(page)
+
+    # Sidebar counts for the current result set: one grouped query, cached per filter key
+    facets = await aget_facets(book_filter)
+    for category in categories:
+        category.book_count = facets['category'].get(category.id, 0)
+    price_facets = []
+    for bucket in facets['price']:
+        query = request.GET.copy()
+        for name in ('cursor', 'min_price', 'max_price'):
+            query.pop(name, None)
+        if bucket['min_price'] is not None:
+            query['min_price'] = bucket['min_price']
+        if bucket['max_price'] is not None:
+            query['max_price'] = bucket['max_price']
+        price_facets.append({**bucket, 'query': query.urlencode()})
+
+    # Favorite state only for the books on this page
+    favorite_ids = await favorites.afavorited_among(await request.auser(), [book.id for book in page])
+
+    params = book_filter.params
     context = {
-        'books': books,
+        'books': page,
         'categories': categories,
-        'title_query': title_query,
-        'author_query': author_query,
-        'category_id': category_id,
-        'availability': availability,
-        'min_price': min_price,
-        'max_price': max_price,
-        'publish_date': publish_date,
-        'page_obj': None,
+        'filter': book_filter,
+        'facets': facets,
+        'price_facets': price_facets,
+        'search_query': search_query,
+        'title_query': params.get('title', ''),
+        'author_query': params.get('author', ''),
+        'category_id': params.get('category'),
+        'subcategories': 'subcategories' in params,
+        'availability': params.get('availability'),
+        'min_price': params.get('min_price'),
+        'max_price': params.get('max_price'),
+        'publish_date': params.get('publish_date'),
+        'start_date': params.get('start_date'),
+        'end_date': params.get('end_date'),
+        'page_obj': page,
         'favorite_ids': favorite_ids,
+        'sort': sort,
+        **_page_links(request, page),
     }
-    return render(request, 'books/book_list.html', context)
+    return await arender(request, 'books/book_list.html', context)
     
     
+@login_required
+@replica_reads
+async def export_books(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unsupported export format.")
+    # Same filters as book_list; rows are streamed chunk by chunk, never all at once
+    books = await BookFilter(request.GET).aapply()
+    # Each server consumes its own kind of iterator; given the other, Django
+    # would read the whole export into memory first
+    streamers = ASYNC_STREAMERS if isinstance(request, ASGIRequest) else STREAMERS
+    response = StreamingHttpResponse(streamers[export_format](books), content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="books.{export_format}"'
+    return response
+
+
 @login_required
 def toggle_favorite(request, pk):
-    book = get_object_or_404(Book, pk=pk)
-    from .models import FavoriteBook
-    fav, created = FavoriteBook.objects.get_or_create(user=request.user, book=book)
-    if not created:
-        fav.delete()
-        messages.info(request, 'Removed from favorites.')
-    else:
+    # Link fallback for browsers without JavaScript; see toggle_favorite_json
+    try:
+        favorited, _ = favorites.toggle(request.user, pk)
+    except Book.DoesNotExist:
+        raise Http404("No Book matches the given query.")
+    # A write behind a GET: the middleware only pins unsafe methods by itself
+    pin_to_primary(request)
+    if favorited:
         messages.success(request, 'Added to favorites.')
+    else:
+        messages.info(request, 'Removed from favorites.')
     return redirect('book_list')
 
+
+@login_required
+@require_POST
+def toggle_favorite_json(request, pk):
+    try:
+        favorited, count = favorites.toggle(request.user, pk)
+    except Book.DoesNotExist:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse({'book': pk, 'favorited': favorited, 'favorites_count': count})
+
 @login_required
 def book_create(request):
     if request.user.role != 'admin':
@@ -146,60 +198,56 @@ def delete_filtered_books(request):
     if request.method == "POST":
         if not request.user.is_authenticated or request.user.role != 'admin':
             return HttpResponseForbidden("Only admins can perform bulk delete.")
-        books = Book.objects.all()
-
-        title_query = request.POST.get('title', '').strip()
-        author_query = request.POST.get('author', '').strip()
-        category = request.POST.get('category')
-        availability = request.POST.get('availability')
-        min_price = request.POST.get('min_price')
-        max_price = request.POST.get('max_price')
-        start_date = request.POST.get('start_date')
-        end_date = request.POST.get('end_date')
-
-        if title_query:
-            books = books.filter(title__icontains=title_query)
-        if author_query:
-            books = books.filter(authors__full_name__icontains=author_query).distinct()
-
-        # --- Category ---
-        if category and category.isdigit():
-            books = books.filter(category_id=int(category))
-
-        # --- Availability ---
-        if availability in ['available', 'unavailable']:
-            books = books.filter(availability_status=availability)
-
-        # --- Price filtering (safe casting) ---
-        if min_price:
-            try:
-                books = books.filter(price__gte=float(min_price))
-            except ValueError:
-                pass  # ignore invalid inputs
-        if max_price:
-            try:
-                books = books.filter(price__lte=float(max_price))
-            except ValueError:
-                pass
-        # Dates
-        if start_date:
-            books = books.filter(publish_date__gte=start_date)
-        if end_date:
-            books = books.filter(publish_date__lte=end_date)
-
-        # --- Delete ---
-        count = books.count()
-        books.delete()
-
-        messages.success(request, f"{count} books deleted.")
+        book_filter = BookFilter(request.POST)
+
+        # The listing posts the key of the filters it rendered; refuse if they differ
+        expected_key = request.POST.get('filter_key')
+        if expected_key is not None and expected_key != book_filter.key:
+            messages.error(request, "Filters changed before the delete was submitted; nothing was deleted.")
+            return redirect(reverse('book_list'))
+
+        # Deleted in primary-key chunks by a background job; see books.jobs
+        job = BulkDeleteJob.objects.create(filter_key=book_filter.key, created_by=request.user)
+        start_job(job)
+
+        progress_url = reverse('bulk_delete_job', args=[job.pk])
+        messages.success(request, f"Deleting the filtered books in the background (job #{job.pk}, progress: {progress_url}).")
         return redirect(reverse('book_list'))
-    
+
 @login_required
-def category_list(request):
+def bulk_edit_books(request):
     if request.user.role != 'admin':
+        return HttpResponseForbidden("Only admins can perform bulk edits.")
+    # Filters come in the query string for the preview and with the form on submit
+    book_filter = BookFilter(request.POST if request.method == "POST" else request.GET)
+    form = BulkEditForm(request.POST or None)
+    if request.method == "POST":
+        expected_key = request.POST.get('filter_key')
+        if expected_key is not None and expected_key != book_filter.key:
+            messages.error(request, "Filters changed before the edit was submitted; nothing was updated.")
+            return redirect(reverse('book_list'))
+        if form.is_valid():
+            # Set-based UPDATEs in primary-key chunks; see books.bulk_edit
+            updated = update_books(book_filter.apply(), form.values())
+            messages.success(request, f"Updated {updated} books.")
+            return redirect(reverse('book_list') + (f'?{book_filter.key}' if book_filter else ''))
+    return render(request, 'books/book_bulk_edit.html', {
+        'form': form,
+        'filter': book_filter,
+        'match_count': book_filter.apply().count(),
+    })
+
+@login_required
+@replica_reads
+async def category_list(request):
+    if (await request.auser()).role != 'admin':
         return HttpResponseForbidden("Only admins can manage categories.")
-    categories = Category.objects.all()
-    return render(request, 'books/category_list.html', { 'categories': categories })
+    # One (cached) query in tree order; parent names come from the same list
+    categories = await aget_categories()
+    names = {category.id: category.name for category in categories}
+    for category in categories:
+        category.parent_name = names.get(category.parent_category_id)
+    return await arender(request, 'books/category_list.html', { 'categories': categories })
 
 @login_required
 def category_create(request):
@@ -216,7 +264,7 @@ def category_create(request):
             messages.success(request, 'Category created.')
             return redirect('category_list')
         messages.error(request, 'Name is required.')
-    categories = Category.objects.all()
+    categories = get_categories()
     return render(request, 'books/category_form.html', { 'categories': categories })
 
 @login_required
@@ -231,7 +279,48 @@ def category_delete(request, pk):
     return render(request, 'books/category_confirm_delete.html', { 'category': category })
 
 @login_required
-def favorites_list(request):
-    fav_books = Book.objects.filter(favoritebook__user=request.user).select_related('publisher', 'category').prefetch_related('authors')
-    return render(request, 'books/favorites_list.html', { 'books': fav_books })
-from django.http import HttpResponseForbidden
+@replica_reads
+async def favorites_list(request):
+    user = await request.auser()
+    fav_books = Book.objects.filter(favoritebook__user=user).select_related('publisher', 'category').prefetch_related('authors')
+    page = await KeysetPaginator(fav_books, ordering=('title', 'id')).apage(request.GET.get('cursor'))
+    return await arender(request, 'books/favorites_list.html', {
+        'books': page,
+        'page_obj': page,
+        **_page_links(request, page),
+    })
+
+
+@login_required
+def cache_statistics(request):
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("Only admins can view cache statistics.")
+    return JsonResponse(cache_stats())
+
+
+@login_required
+def bulk_delete_job(request, pk):
+    if request.user.role != 'admin':
+        return HttpResponseForbidden("Only admins can view bulk delete jobs.")
+    job = get_object_or_404(BulkDeleteJob, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'total': job.total,
+        'deleted': job.deleted,
+        'progress': round(job.progress, 4),
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    })
+
+
+@login_required
+@replica_reads
+def popular_books(request):
+    week = favorites.week_start()
+    return render(request, 'books/popular.html', {
+        'most_favorited': favorites.most_favorited(LEADERBOARD_SIZE),
+        'trending': favorites.trending(LEADERBOARD_SIZE, week),
+        'week': week,
+    })
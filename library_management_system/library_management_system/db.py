@@ -0,0 +1,31 @@
+from django.conf import settings
+
+# Pragmas whose value is a keyword rather than a number
+_KEYWORD_PRAGMAS = {'journal_mode', 'synchronous', 'temp_store'}
+
+
+def apply_pragmas(cursor, pragmas):
+    """Run ``PRAGMA name = value`` for each item on a DB-API cursor."""
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ValueError(f'Invalid pragma name: {name!r}')
+        if name in _KEYWORD_PRAGMAS:
+            value = str(value)
+            if not value.isalnum():
+                raise ValueError(f'Invalid value for {name}: {value!r}')
+        else:
+            value = int(value)
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver applying ``settings.SQLITE_PRAGMAS`` to
+    every new SQLite connection. With ``CONN_MAX_AGE`` set this runs once
+    per persistent connection, not once per request.
+    """
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
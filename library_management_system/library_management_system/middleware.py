@@ -0,0 +1,232 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+from django.utils.deprecation import MiddlewareMixin
+
+from . import routers
+
+logger = logging.getLogger('library_management_system.slow_requests')
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Fraction of requests to profile, e.g. 0.01 in production
+    'SAMPLE_RATE': 1.0,
+    'SLOW_REQUEST_MS': 500,
+    # The same SQL this many times in one request is reported as a likely N+1
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+    'SERVER_TIMING': True,
+    # Cap on statements written per slow-request log entry
+    'MAX_LOGGED_QUERIES': 50,
+}
+
+_template_time = contextvars.ContextVar('template_time', default=None)
+_patched = False
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+def _instrument_templates():
+    """Time top-level Django template renders; installed once, on first use of template_timer."""
+    global _patched
+    if _patched:
+        return
+    original = django_backend.Template.render
+
+    def render(self, *args, **kwargs):
+        timer = _template_time.get()
+        if timer is None:
+            return original(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            timer[0] += time.perf_counter() - started
+
+    django_backend.Template.render = render
+    _patched = True
+
+
+@contextmanager
+def template_timer():
+    """Add the time spent rendering Django templates in this block to the yielded ``[seconds]``."""
+    _instrument_templates()
+    timer = [0.0]
+    token = _template_time.set(timer)
+    try:
+        yield timer
+    finally:
+        _template_time.reset(token)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+
+_recorder = contextvars.ContextVar('query_recorder', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_query_hook(sender=None, connection=None, **kwargs):
+    # One permanent wrapper per connection, reporting to the recorder of the
+    # current context: under ASGI, async ORM queries run on a connection of a
+    # worker thread, which the request's context (and recorder) follows.
+    # Inserted first, as execute_wrapper() blocks pop the last entry.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _install_query_hooks(**kwargs):
+    """Hook this thread's open connections; request_started is sent on the thread that runs the ORM."""
+    for connection in connections.all(initialized_only=True):
+        _install_query_hook(connection=connection)
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in per-request profiling: query count, DB time, template render time
+    and repeated-statement (N+1) detection, reported as ``Server-Timing`` and
+    logged as one JSON line per slow request.
+
+    Configured by ``settings.REQUEST_PROFILING``; when disabled the middleware
+    removes itself from the stack at startup, so it costs nothing. Sync and
+    async capable, so under ASGI it does not push async views (or unsampled
+    requests) through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(_install_query_hook, dispatch_uid='library_management_system.profile_queries')
+        request_started.connect(_install_query_hooks, dispatch_uid='library_management_system.profile_queries')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with self.recording() as recording:
+            response = self.get_response(request)
+        return self.report(request, response, recording)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with self.recording() as recording:
+            response = await self.get_response(request)
+        return self.report(request, response, recording)
+
+    def sampled(self):
+        sample_rate = self.config['SAMPLE_RATE']
+        return sample_rate >= 1 or random.random() < sample_rate
+
+    @contextmanager
+    def recording(self):
+        recorder = QueryRecorder()
+        recording = {'queries': recorder.queries}
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            with template_timer() as timer:
+                yield recording
+        finally:
+            _recorder.reset(token)
+            recording['total'] = time.perf_counter() - started
+            recording['template'] = timer[0]
+
+    def report(self, request, response, recording):
+        queries = recording['queries']
+        profile = {
+            'total_ms': round(recording['total'] * 1000, 2),
+            'db_ms': round(sum(duration for _, duration in queries) * 1000, 2),
+            'template_ms': round(recording['template'] * 1000, 2),
+            'query_count': len(queries),
+            'duplicates': self.duplicates(queries),
+        }
+        request.profile = profile
+        if self.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = self.server_timing(profile)
+        if profile['total_ms'] >= self.config['SLOW_REQUEST_MS']:
+            self.log_slow_request(request, response, profile, queries)
+        return response
+
+    def duplicates(self, queries):
+        counts = Counter(sql for sql, _ in queries)
+        threshold = self.config['DUPLICATE_QUERY_THRESHOLD']
+        return [{'sql': sql, 'count': count} for sql, count in counts.most_common() if count >= threshold]
+
+    def server_timing(self, profile):
+        return ', '.join([
+            f'db;dur={profile["db_ms"]};desc="{profile["query_count"]} queries"',
+            f'tpl;dur={profile["template_ms"]};desc="templates"',
+            f'total;dur={profile["total_ms"]}',
+        ])
+
+    def log_slow_request(self, request, response, profile, queries):
+        slowest = sorted(queries, key=lambda query: query[1], reverse=True)[:self.config['MAX_LOGGED_QUERIES']]
+        entry = {
+            'time': time.time(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            **profile,
+            'queries': [{'sql': sql, 'ms': round(duration * 1000, 3)} for sql, duration in slowest],
+        }
+        logger.warning(json.dumps(entry, default=str))
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """
+    After a write (any unsafe method, or a view calling ``pin_to_primary``)
+    set a short-lived cookie that keeps the user's ``replica_reads`` views on
+    the primary for ``DATABASE_REPLICA_PIN_SECONDS``, longer than replication
+    normally lags. Does nothing while no replica is configured.
+
+    Built on MiddlewareMixin so it runs natively under ASGI too: a sync-only
+    middleware would push every async view back through a thread.
+    """
+
+    def process_response(self, request, response):
+        wrote = request.method not in routers.SAFE_METHODS or getattr(request, 'pin_to_primary', False)
+        if wrote and response.status_code < 500 and routers.replica_aliases():
+            response.set_cookie(
+                routers.PIN_COOKIE, '1', max_age=routers.pin_seconds(), httponly=True, samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,150 @@
+import contextvars
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set while a view decorated with replica_reads runs; None means "primary"
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+PIN_COOKIE = 'lms_pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def replica_aliases():
+    """The configured ``settings.DATABASE_REPLICAS`` that exist in ``DATABASES``."""
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', ()) if alias in connections]
+
+
+def pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+
+@contextmanager
+def reads_from(alias):
+    """Route ORM reads in this block to ``alias`` (``None``: the primary)."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def primary_reads():
+    """
+    Read from the primary in this block, e.g. to fill a cache: an entry
+    loaded from a lagging replica would outlive the write that bumped the
+    cache version, until the next one.
+    """
+    return reads_from(None)
+
+
+def pin_to_primary(request):
+    """Pin the user's reads to the primary for a while, for writes made by a GET view."""
+    request.pin_to_primary = True
+
+
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def _streaming_from(alias, iterator):
+    # Set per chunk rather than around the whole loop: servers may advance
+    # the iterator from different contexts (e.g. threads under ASGI)
+    while True:
+        with reads_from(alias):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+async def _astreaming_from(alias, iterator):
+    while True:
+        with reads_from(alias):
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+def _stream_from(alias, response):
+    if response.is_async:
+        response.streaming_content = _astreaming_from(alias, aiter(response.streaming_content))
+    else:
+        response.streaming_content = _streaming_from(alias, iter(response.streaming_content))
+
+
+def _choose_replica(request):
+    aliases = [] if is_pinned(request) else replica_aliases()
+    return random.choice(aliases) if aliases else None
+
+
+def replica_reads(view):
+    """
+    Run a read-only view's queries on a randomly chosen replica.
+
+    The primary is used when no replica is configured or the user wrote
+    recently (see ``ReplicaPinMiddleware``), so nobody reads their own
+    write from a replica that has not caught up yet. A streaming response
+    keeps reading from the same replica while it is consumed. Apply inside
+    ``login_required`` so the user and session are still read from the
+    primary. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            alias = _choose_replica(request)
+            if alias is None:
+                return await view(request, *args, **kwargs)
+            with reads_from(alias):
+                response = await view(request, *args, **kwargs)
+            if response.streaming:
+                _stream_from(alias, response)
+            return response
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = _choose_replica(request)
+        if alias is None:
+            return view(request, *args, **kwargs)
+        with reads_from(alias):
+            response = view(request, *args, **kwargs)
+        if response.streaming:
+            _stream_from(alias, response)
+        return response
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Send reads to the alias chosen by ``replica_reads`` and everything else,
+    writes included, to the primary (``default``).
+
+    Replicas are copies of the primary kept in sync outside Django, so they
+    are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write an instance back to the replica it was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', ()):
+            return False
+        return None
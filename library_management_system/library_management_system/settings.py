@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,17 +44,25 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Opt-in profiling (see REQUEST_PROFILING); removes itself when disabled
+    'library_management_system.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Keeps a user's reads on the primary right after they write (see DATABASE_REPLICAS)
+    'library_management_system.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'library_management_system.urls'
 
+# No 'loaders' option on purpose: Django then wraps the default loaders in the
+# cached loader, so each template is compiled once per process (with DEBUG on
+# it also reloads edited files). Spelling out 'loaders' would require
+# APP_DIRS=False and repeating that setup.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -76,12 +86,141 @@ WSGI_APPLICATION = 'library_management_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# LMS_DB_PROFILE=production switches SQLite to WAL (readers no longer wait
+# for writers), relaxed fsync, a larger page cache and memory map, a busy
+# timeout instead of immediate "database is locked" errors, and persistent
+# connections. The pragmas are applied per connection by
+# library_management_system.db.configure_sqlite.
+
+DB_PROFILE = os.environ.get('LMS_DB_PROFILE', 'development')
+SQLITE_PROFILES = {
+    'development': {
+        'pragmas': {},
+        'conn_max_age': 0,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'wal',
+            # Durable across application crashes; only an OS crash can lose the last commits
+            'synchronous': 'normal',
+            'cache_size': -64000,  # KiB, i.e. 64 MB
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'memory',
+            'busy_timeout': 5000,  # ms
+        },
+        'conn_max_age': 600,
+    },
+}
+if DB_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f'Unknown LMS_DB_PROFILE {DB_PROFILE!r}; expected one of {", ".join(SQLITE_PROFILES)}')
+SQLITE_PRAGMAS = SQLITE_PROFILES[DB_PROFILE]['pragmas']
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': SQLITE_PROFILES[DB_PROFILE]['conn_max_age'],
+        'CONN_HEALTH_CHECKS': DB_PROFILE == 'production',
+        'OPTIONS': {},
     }
 }
+if DB_PROFILE == 'production':
+    # Take the write lock at BEGIN, where the busy timeout applies, rather than
+    # failing at once when a read transaction later tries to write
+    DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+
+# Read replicas
+# LMS_DB_REPLICAS is a comma-separated list of SQLite files kept in sync with
+# the primary outside Django (e.g. Litestream or LiteFS). Read-only views
+# (the book list, favorites, categories, export and the JSON API) then read
+# from a random replica, except for DATABASE_REPLICA_PIN_SECONDS after the
+# same user wrote something. Without replicas everything uses 'default'.
+
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('LMS_DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path.strip(),
+        # Read only: no write lock to take at BEGIN
+        'OPTIONS': {},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['library_management_system.routers.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The books app caches reference data and facet counts here; point
+# BOOKS_CACHE_ALIAS at a shared backend (Redis, Memcached) when running
+# more than one process so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'library-management-system',
+    }
+}
+BOOKS_CACHE_ALIAS = 'default'
+# Cache the rendered cells of each book_list row, keyed by Book.version
+BOOKS_ROW_CACHE = True
+# Hot autocomplete prefixes kept per process, checked against the cache versions
+BOOKS_AUTOCOMPLETE_LRU_SIZE = 1024
+# The admin book changelist counts up to this many rows exactly, then estimates
+BOOKS_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+
+# Background jobs
+# "Delete Filtered" runs as a BulkDeleteJob deleting BOOKS_BULK_DELETE_CHUNK_SIZE
+# books per transaction. 'thread' runs it in the web process; 'inline' runs it
+# within the request. `manage.py resume_bulk_deletes` finishes interrupted jobs.
+
+BOOKS_JOB_RUNNER = 'thread'
+BOOKS_BULK_DELETE_CHUNK_SIZE = 500
+# "Bulk Edit" updates the filtered books with one UPDATE per this many books
+BOOKS_BULK_UPDATE_CHUNK_SIZE = 5000
+# `manage.py compact_changelog` examines this many change log seqs per transaction
+BOOKS_CHANGELOG_COMPACT_CHUNK_SIZE = 10000
+
+
+# Request profiling
+# Query count, DB/template time and N+1 detection per request, exposed as a
+# Server-Timing header; requests slower than SLOW_REQUEST_MS are appended to
+# the slow-request log below. Use SAMPLE_RATE (e.g. 0.01) in production.
+
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('LMS_REQUEST_PROFILING', '') == '1',
+    'SAMPLE_RATE': float(os.environ.get('LMS_PROFILING_SAMPLE_RATE', '1.0')),
+    'SLOW_REQUEST_MS': 500,
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'library_management_system.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation